@@ -0,0 +1,224 @@
+from time import perf_counter, process_time
+from typing import Optional
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+
+import numpy as np
+import pyglet
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[1])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from benchmarks.bench_simulation import load_baselines
+
+
+# rendering benchmark of the scenes, on a hidden window (or an offscreen EGL context without display server)
+# every state of the scenes is drawn for a number of frames while the mouse follows a scripted path over the window
+# usage:
+#   python benchmarks/bench_rendering.py                      run every state, fail if one regressed
+#   python benchmarks/bench_rendering.py --update-baselines   run every state and store the results as the baselines
+
+BASELINES_FILE_PATH = Path(__file__).resolve().parent / "rendering_baselines.json"
+
+# spacing (pixels) of the mouse positions of the scripted path, scanned line by line from the top left corner
+MOUSE_PATH_STEP = 40
+# empty tile of the starting colony, selecting it opens the build menu
+BUILD_MENU_TILE = (4, 4)
+
+
+def mouse_path(width: int, height: int, step: int = MOUSE_PATH_STEP) -> list[tuple[int, int]]:
+    # the same positions on every run: the hovered widgets change from one frame to the next
+    return [(x, y) for y in range(height - step // 2, 0, -step) for x in range(step // 2, width, step)]
+
+
+def benchmark_states(game_config: dict[str]) -> dict[str, tuple[str, Optional[tuple[int, int]]]]:
+    # state name: (scene name, tile selected in the colony)
+    states = {
+        "main_menu": ("main menu", None),
+        "colony": ("colony", None),
+        "colony_build_menu": ("colony", BUILD_MENU_TILE)
+    }
+    for building_dict in game_config["starting_assets"]["buildings"]:
+        states[f"colony_{building_dict["name"]}"] = ("colony", tuple(building_dict["coords"]))
+    return states
+
+
+def run_state(window, game_manager, scene_name: str, selected_tile: Optional[tuple[int, int]], frames: int, warmup_frames: int,
+              simulate: bool) -> dict[str]:
+    game_data = game_manager.game_data
+    simulation = game_data.simulation
+    game_manager.switch_scene(scene_name)
+    game_data.colonies[game_data.active_colony].selected_building_tile_coords = selected_tile
+    scene = game_manager.current_scene
+    positions = mouse_path(game_data.window_width, game_data.window_height)
+    # number of garbage collections during the measured frames
+    gc_collections = []
+    def on_gc(phase: str, info: dict[str]):
+        if phase == "stop":
+            gc_collections.append(info["generation"])
+    draw_cpu_times = []
+    draw_wall_times = []
+    finish_times = []
+    allocated_blocks_deltas = []
+    first_frame_time = 0.
+    vertex_lists_allocated = 0
+    for frame_index in range(warmup_frames + frames):
+        if frame_index == warmup_frames:
+            vertex_lists_allocated = scene.batch.vertex_lists_allocated
+            gc.callbacks.append(on_gc)
+        # the simulation moves on between the frames (not measured), the displayed values change
+        if simulate:
+            simulation.step(simulation.tick_duration)
+        x, y = positions[frame_index % len(positions)]
+        game_manager.on_mouse_motion(x, y, 0, 0)
+        game_data.assets.upload_pending()
+        window.clear()
+        allocated_blocks = sys.getallocatedblocks()
+        cpu_start_time = process_time()
+        wall_start_time = perf_counter()
+        scene.draw()
+        wall_time = perf_counter() - wall_start_time
+        cpu_time = process_time() - cpu_start_time
+        # wait for OpenGL to render the frame (not part of the draw time): without it the driver queues the frames
+        # and stalls once in a while in the middle of a draw
+        finish_start_time = perf_counter()
+        pyglet.gl.glFinish()
+        finish_time = perf_counter() - finish_start_time
+        if frame_index == 0:
+            # the first frame of a state builds its widgets (right window content)
+            first_frame_time = wall_time
+        if frame_index >= warmup_frames:
+            draw_cpu_times.append(cpu_time)
+            draw_wall_times.append(wall_time)
+            finish_times.append(finish_time)
+            allocated_blocks_deltas.append(sys.getallocatedblocks() - allocated_blocks)
+    gc.callbacks.remove(on_gc)
+    vertex_lists_allocated = scene.batch.vertex_lists_allocated - vertex_lists_allocated
+    draw_cpu_times = np.array(draw_cpu_times) * 1e3
+    draw_wall_times = np.array(draw_wall_times) * 1e3
+    return {
+        "frames": frames,
+        "first_frame_ms": round(first_frame_time * 1e3, 3),
+        "draw_cpu_ms": {
+            "mean": round(float(draw_cpu_times.mean()), 3),
+            "p50": round(float(np.percentile(draw_cpu_times, 50)), 3),
+            "p95": round(float(np.percentile(draw_cpu_times, 95)), 3),
+            "max": round(float(draw_cpu_times.max()), 3)
+        },
+        "draw_wall_ms_p50": round(float(np.percentile(draw_wall_times, 50)), 3),
+        # OpenGL rendering time of the frame, depends mostly on the driver
+        "gl_finish_ms_p50": round(float(np.percentile(finish_times, 50)) * 1e3, 3),
+        "batch": scene.batch.counts(),
+        "vertex_lists_allocated_per_frame": round(vertex_lists_allocated / frames, 3),
+        "allocated_blocks_per_frame": round(float(np.mean(allocated_blocks_deltas)), 1),
+        "gc_collections": len(gc_collections)
+    }
+
+
+def check_regressions(results: dict[str, dict[str]], baselines: dict[str], tolerance: float) -> list[str]:
+    # regressions of the results compared with the baselines: draw slower by more than tolerance,
+    # more vertex lists allocated per frame (the Sprite / Label / document churn) or more vertices in the batch
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get("states", {}).get(name)
+        if baseline is None:
+            continue
+        if result["draw_cpu_ms"]["p50"] > baseline["draw_cpu_ms_p50"] * (1 + tolerance):
+            regressions.append(f"{name}: draw {result["draw_cpu_ms"]["p50"]:.3f} ms CPU, baseline {baseline["draw_cpu_ms_p50"]:.3f} ms")
+        # the frames are scripted, the allocations only change with the code (a few relayouts of slack)
+        if result["vertex_lists_allocated_per_frame"] > baseline["vertex_lists_allocated_per_frame"] + 0.02:
+            regressions.append(f"{name}: {result["vertex_lists_allocated_per_frame"]} vertex lists allocated per frame, "
+                               f"baseline {baseline["vertex_lists_allocated_per_frame"]}")
+        if result["batch"]["vertices"] > baseline["vertices"] * (1 + tolerance):
+            regressions.append(f"{name}: {result["batch"]["vertices"]} vertices in the batch, baseline {baseline["vertices"]}")
+    return regressions
+
+
+def print_result(name: str, result: dict[str], baseline: Optional[dict[str]]):
+    reference = "" if baseline is None else f" (baseline {baseline["draw_cpu_ms_p50"]:.2f})"
+    draw_cpu = result["draw_cpu_ms"]
+    batch = result["batch"]
+    print(f"{name}: draw CPU ms p50 {draw_cpu["p50"]:.2f}{reference} p95 {draw_cpu["p95"]:.2f} max {draw_cpu["max"]:.2f}, "
+          f"first frame {result["first_frame_ms"]:.1f} ms, OpenGL {result["gl_finish_ms_p50"]:.1f} ms")
+    print(f"    batch {batch["vertex_lists"]} vertex lists ({batch["text_vertex_lists"]} text), {batch["vertices"]} vertices, "
+          f"{batch["draw_calls"]} draw calls")
+    print(f"    per frame {result["vertex_lists_allocated_per_frame"]} vertex lists allocated, "
+          f"{result["allocated_blocks_per_frame"]:+.1f} memory blocks, {result["gc_collections"]} gc collections")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="rendering benchmark of the scenes")
+    parser.add_argument("--states", nargs="+", help="states to run (default: all of them)")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per state")
+    parser.add_argument("--warmup-frames", type=int, default=30, help="frames drawn before the measure, per state")
+    parser.add_argument("--no-simulation", action="store_true", help="do not advance the simulation between the frames")
+    parser.add_argument("--headless", action="store_true", default=(sys.platform == "linux" and "DISPLAY" not in os.environ),
+                        help="offscreen EGL context instead of a hidden window (default without display server)")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slowdown (or growth of the batch) above which a state counts as a regression")
+    parser.add_argument("--baselines", type=Path, default=BASELINES_FILE_PATH, help="baselines file")
+    parser.add_argument("--update-baselines", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    # the rendering backend is chosen before pyglet creates its first OpenGL context (imported by the scenes)
+    pyglet.options["headless"] = args.headless
+    from pyglet.window import Window
+    from lib.game_config import load_game_config
+    from lib.game_manager import GameManager
+
+    game_config = load_game_config()
+    window_config = game_config["pyglet"]["window"]
+    window = Window(window_config["width"], window_config["height"], visible=False)
+    game_manager = GameManager(game_config)
+    states = benchmark_states(game_config)
+    state_names = args.states or list(states)
+    for name in state_names:
+        if name not in states:
+            parser.error(f"unknown state '{name}' (expected one of: {", ".join(states)})")
+    baselines = load_baselines(args.baselines)
+    results = {}
+    for name in state_names:
+        scene_name, selected_tile = states[name]
+        results[name] = run_state(window, game_manager, scene_name, selected_tile, args.frames, args.warmup_frames, not args.no_simulation)
+        print_result(name, results[name], baselines.get("states", {}).get(name))
+    game_manager.game_data.save_worker.close()
+    game_manager.game_data.assets.close()
+    window.close()
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.update_baselines:
+        # the draw times depend on the machine and the OpenGL driver, the baselines record where they were measured
+        baselines = {
+            "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine(),
+                        "renderer": "headless" if args.headless else "window"},
+            "states": {**baselines.get("states", {}), **{
+                name: {
+                    "draw_cpu_ms_p50": result["draw_cpu_ms"]["p50"],
+                    "vertex_lists_allocated_per_frame": result["vertex_lists_allocated_per_frame"],
+                    "vertices": result["batch"]["vertices"]
+                }
+                for name, result in results.items()
+            }}
+        }
+        with open(args.baselines, "w", encoding="utf-8") as baselines_file:
+            json.dump(baselines, baselines_file, indent=2)
+            baselines_file.write("\n")
+        print(f"baselines written to {args.baselines}")
+        return 0
+    regressions = check_regressions(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
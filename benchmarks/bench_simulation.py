@@ -0,0 +1,274 @@
+from time import perf_counter
+from typing import Optional
+import argparse
+import copy
+import gc
+import json
+import platform
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[1])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from lib.game_config import load_game_config
+from lib.game_entities.colony import Colony
+from lib.simulation import Simulation
+
+
+# headless benchmark of the colony economy (Simulation.step, no pyglet)
+# usage:
+#   python benchmarks/bench_simulation.py                      run every scenario, fail if one regressed
+#   python benchmarks/bench_simulation.py --update-baselines   run every scenario and store the results as the baselines
+
+BASELINES_FILE_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+# buildings of the full grid, in the order of the tiles (the headquarters take the center tile)
+FULL_GRID_BUILDINGS = (
+    "solar_panels", "drilling_station", "warehouse", "liquid_tank", "electrolysis_station", "furnace",
+    "greenhouse", "school", "factory", "drilling_station", "solar_panels", "furnace"
+)
+# resources extracted by the drilling stations and smelted by the furnaces, one per building in turn
+DRILLED_RESOURCES = ("water", "iron_ore", "aluminium_ore", "copper_ore", "titanium_ore")
+SMELTED_RESOURCES = ("iron", "aluminium", "copper", "titanium")
+# workers given to every colony of the scenarios
+SCENARIO_WORKERS = 500
+
+
+def scenario_config(game_config: dict[str], colonies_count: int) -> dict[str]:
+    # copy of the configuration with colonies_count colonies (the moon first, then copies of the configured colonies)
+    config = copy.copy(game_config)
+    configured_colonies = game_config["colonies"]
+    colonies = {"moon": configured_colonies["moon"]}
+    other_names = [name for name in configured_colonies if name != "moon"]
+    for index in range(colonies_count - 1):
+        base_name = other_names[index % len(other_names)]
+        colonies[f"{base_name}_{index}"] = configured_colonies[base_name]
+    config["colonies"] = colonies
+    return config
+
+
+def staff_colony(colony: Colony):
+    # give work to every building: workers on every production job, drilling stations and furnaces producing,
+    # schools and factories with a full queue
+    workers = colony.data["workers"]
+    for worker_type in ("engineers", "scientists"):
+        workers[worker_type]["available"] = workers[worker_type]["total"] = SCENARIO_WORKERS
+    # full storage, the factories can pay for their items
+    max_storage = colony.max_storage
+    for resource in colony.data["resources"].keys():
+        colony.data["resources"][resource] = max_storage[resource]
+    drilling_stations_count = 0
+    furnaces_count = 0
+    for line in colony.building_grid:
+        for building in line:
+            if building is None:
+                continue
+            for worker_type in ("engineers", "scientists"):
+                building.assign_worker(True, "production", worker_type, all=True)
+            if building.name == "drilling_station":
+                building.produce(DRILLED_RESOURCES[drilling_stations_count % len(DRILLED_RESOURCES)])
+                drilling_stations_count += 1
+            elif building.name == "furnace":
+                building.switch_production(SMELTED_RESOURCES[furnaces_count % len(SMELTED_RESOURCES)])
+                furnaces_count += 1
+            elif building.name == "school":
+                for _ in range(5):
+                    building.add_worker_to_queue("engineers")
+            elif building.name == "factory":
+                for _ in range(5):
+                    building.add_item_to_queue("spaceship_small")
+
+
+def build_full_grid(colony: Colony, game_config: dict[str], level: int = 3):
+    # fill the 7x7 grid with built buildings, at level (or their maximum level if it is lower)
+    buildings_config = game_config["rules"].buildings
+    tile_index = 0
+    for line_index in range(7):
+        for column_index in range(7):
+            if (column_index, line_index) == (3, 3):
+                building_name = "headquarters"
+            else:
+                building_name = FULL_GRID_BUILDINGS[tile_index % len(FULL_GRID_BUILDINGS)]
+                tile_index += 1
+            building = Colony.building_types_dict[building_name](colony.data, game_config)
+            building.level = min(level, max(buildings_config[building_name].parameters_per_level))
+            building.is_constructing = False
+            colony.set_building((column_index, line_index), building)
+
+
+def build_starting_simulation(game_config: dict[str]) -> Simulation:
+    # the moon alone, with the buildings and workers of starting_assets
+    simulation = Simulation(scenario_config(game_config, 1))
+    staff_colony(simulation.colonies["moon"])
+    return simulation
+
+
+def build_full_grid_simulation(game_config: dict[str], colonies_count: int) -> Simulation:
+    # colonies_count colonies, every one of them fully built at level 3 and staffed
+    simulation = Simulation(scenario_config(game_config, colonies_count))
+    for colony in simulation.colonies.values():
+        build_full_grid(colony, simulation.game_config)
+        staff_colony(colony)
+    return simulation
+
+
+# scenario name: (function building the simulation, arguments)
+SCENARIOS = {
+    "starting_moon": (build_starting_simulation, ()),
+    "full_grid": (build_full_grid_simulation, (1,)),
+    "colonies_5": (build_full_grid_simulation, (5,)),
+    "colonies_50": (build_full_grid_simulation, (50,)),
+    "colonies_500": (build_full_grid_simulation, (500,))
+}
+
+
+def run_scenario(name: str, game_config: dict[str], min_time: float, min_ticks: int, warmup_ticks: int = 10) -> dict[str]:
+    build_function, arguments = SCENARIOS[name]
+    # memory allocated by the colonies (the configuration is loaded before), without the garbage of the previous scenarios
+    gc.collect()
+    tracemalloc.start()
+    simulation = build_function(game_config, *arguments)
+    gc.collect()
+    colonies_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    colonies_count = len(simulation.colonies)
+    dt = simulation.tick_duration
+    # the first ticks compile the production registries
+    for _ in range(warmup_ticks):
+        simulation.step(dt)
+    # ticks per second, without the timings
+    ticks_count = 0
+    start_time = perf_counter()
+    elapsed_time = 0.
+    while (elapsed_time < min_time) or (ticks_count < min_ticks):
+        simulation.step(dt)
+        ticks_count += 1
+        elapsed_time = perf_counter() - start_time
+    ticks_per_second = ticks_count / elapsed_time
+    # cost per building type, measured on a separate run (the timings slow the simulation down)
+    simulation.enable_timings(True)
+    timed_ticks_count = max(min_ticks, ticks_count // 4)
+    for _ in range(timed_ticks_count):
+        simulation.step(dt)
+    buildings_tick_time = {}
+    buildings_count = {}
+    for colony in simulation.colonies.values():
+        for building_name, building_time in colony.update_timings.items():
+            buildings_tick_time[building_name] = buildings_tick_time.get(building_name, 0.) + building_time * 1e6 / timed_ticks_count
+        for line in colony.building_grid:
+            for building in line:
+                if building is not None:
+                    buildings_count[building.name] = buildings_count.get(building.name, 0) + 1
+    simulation.enable_timings(False)
+    return {
+        "colonies": colonies_count,
+        "ticks": ticks_count,
+        "ticks_per_second": round(ticks_per_second, 1),
+        "us_per_colony_tick": round(1e6 / ticks_per_second / colonies_count, 2),
+        # microseconds per tick, all the colonies, and per building of the type (the production registry has no building)
+        "buildings_us_per_tick": {
+            building_name: {
+                "total": round(building_time, 2),
+                "per_building": round(building_time / buildings_count[building_name], 3) if building_name in buildings_count else None
+            }
+            for building_name, building_time in sorted(buildings_tick_time.items(), key=lambda item: -item[1])
+        },
+        "memory_per_colony_kb": round(colonies_memory / colonies_count / 1024, 1)
+    }
+
+
+def load_baselines(baselines_file_path: Path) -> dict[str]:
+    try:
+        with open(baselines_file_path, "r", encoding="utf-8") as baselines_file:
+            return json.load(baselines_file)
+    except FileNotFoundError:
+        return {}
+
+
+def current_machine() -> dict[str, str]:
+    # where the benchmark runs, the ticks per second are only comparable on the same machine
+    return {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine()}
+
+
+def check_regressions(results: dict[str, dict[str]], baselines: dict[str], tolerance: float, check_timings: bool = True) -> list[str]:
+    # regressions of the results compared with the baselines (slower by more than tolerance, or bigger by more than tolerance)
+    # check_timings: compare the ticks per second too (only meaningful on the machine of the baselines)
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get("scenarios", {}).get(name)
+        if baseline is None:
+            continue
+        if check_timings and (result["ticks_per_second"] < baseline["ticks_per_second"] * (1 - tolerance)):
+            regressions.append(f"{name}: {result["ticks_per_second"]:.0f} ticks/s, baseline {baseline["ticks_per_second"]:.0f} ticks/s")
+        if result["memory_per_colony_kb"] > baseline["memory_per_colony_kb"] * (1 + tolerance):
+            regressions.append(f"{name}: {result["memory_per_colony_kb"]} kB per colony, baseline {baseline["memory_per_colony_kb"]} kB")
+    return regressions
+
+
+def print_result(name: str, result: dict[str], baseline: Optional[dict[str]]):
+    reference = "" if baseline is None else f" (baseline {baseline["ticks_per_second"]:.0f})"
+    print(f"{name}: {result["colonies"]} colonies, {result["ticks_per_second"]:.0f} ticks/s{reference}, "
+          f"{result["us_per_colony_tick"]:.1f} us per colony per tick, {result["memory_per_colony_kb"]:.1f} kB per colony")
+    for building_name, building_time in result["buildings_us_per_tick"].items():
+        per_building = "" if building_time["per_building"] is None else f" ({building_time["per_building"]:.2f} us per building)"
+        print(f"    {building_name:<22}{building_time["total"]:>10.1f} us/tick{per_building}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="headless benchmark of the colony economy")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS),
+                        help="scenarios to run (default: all of them)")
+    parser.add_argument("--min-time", type=float, default=2., help="minimum measured time per scenario, in seconds")
+    parser.add_argument("--min-ticks", type=int, default=20, help="minimum number of measured ticks per scenario")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slowdown (or memory growth) above which a scenario counts as a regression")
+    parser.add_argument("--baselines", type=Path, default=BASELINES_FILE_PATH, help="baselines file")
+    parser.add_argument("--update-baselines", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    # no cache: every run parses the same configuration file
+    game_config = load_game_config(cache_file_path=None)
+    baselines = load_baselines(args.baselines)
+    # the first simulation built and run allocates the lazily created objects shared by every colony,
+    # done once here so that the memory measured does not depend on the order of the scenarios
+    warmup_simulation = build_full_grid_simulation(game_config, 1)
+    for _ in range(10):
+        warmup_simulation.step(warmup_simulation.tick_duration)
+    del warmup_simulation
+    results = {}
+    for name in args.scenarios:
+        results[name] = run_scenario(name, game_config, args.min_time, args.min_ticks)
+        print_result(name, results[name], baselines.get("scenarios", {}).get(name))
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.update_baselines:
+        # the ticks per second depend on the machine, the baselines record where they were measured
+        baselines = {
+            "machine": current_machine(),
+            "scenarios": {**baselines.get("scenarios", {}), **{
+                name: {key: result[key] for key in ("ticks_per_second", "memory_per_colony_kb")} for name, result in results.items()
+            }}
+        }
+        with open(args.baselines, "w", encoding="utf-8") as baselines_file:
+            json.dump(baselines, baselines_file, indent=2)
+            baselines_file.write("\n")
+        print(f"baselines written to {args.baselines}")
+        return 0
+    # the memory is compared everywhere, the ticks per second only on the machine that recorded the baselines
+    check_timings = baselines.get("machine") == current_machine()
+    if not check_timings:
+        print(f"ticks per second not checked: the baselines were measured on another machine ({baselines.get("machine")})")
+    regressions = check_regressions(results, baselines, args.tolerance, check_timings)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,72 @@
+import sys
+from time import perf_counter
+
+from lib.startup_profiler import startup_profiler
+
+# the startup profile starts before the other imports to time them
+if "--profile-startup" in sys.argv:
+    startup_profiler.start()
+
+import argparse
+import tempfile
+from pathlib import Path
 import pyglet
+
+# offscreen OpenGL context (EGL), to play the replays without display server
+if "--headless" in sys.argv:
+    pyglet.options["headless"] = True
+
 from pyglet.window import key, mouse
-from pathlib import Path
-import yaml
 
+from lib.game_config import load_game_config
 from lib.game_manager import GameManager
+from lib.frame_stats import FrameStats
+from lib.replay import Replay, ReplayError, ReplayRecorder, replay_game_config, run_replay
 
 
 class GameWindow(pyglet.window.Window):
 
-    def __init__(self):
+    def __init__(self, startup_profile_path: str = None, exit_after_startup: bool = False, frame_stats_path: str = None,
+                 replay_file_path: str = None):
         # load the configurations
-        config_file_path = Path(__file__).parent / "lib" / "config.yml"
-        with open(config_file_path, "r") as f:
-            self.game_config: dict[str] = yaml.safe_load(f)
+        with startup_profiler.span("load_game_config", "config"):
+            self.game_config: dict[str] = load_game_config()
         # print(self.game_config["buildings"])
         # init pyglet window
-        super().__init__(**self.game_config["pyglet"]["window"])
+        with startup_profiler.span("create window", "window"):
+            super().__init__(**self.game_config["pyglet"]["window"])
         # create the game manager and give it the window handlers
         # self.game_manager = GameManager(self.width, self.height)
-        self.game_manager = GameManager(self.game_config)
+        # record the session in a replay file if asked
+        replay_recorder = None
+        if replay_file_path is not None:
+            replay_recorder = ReplayRecorder(replay_file_path, checkpoint_interval=self.game_config["replays"]["checkpoint_interval"])
+        with startup_profiler.span("GameManager.__init__", "startup"):
+            self.game_manager = GameManager(self.game_config, replay_recorder)
         self.push_handlers(self.game_manager)
         # cursors types
         self.cursors = {
             "default": self.get_system_mouse_cursor(self.CURSOR_DEFAULT),
             "hand": self.get_system_mouse_cursor(self.CURSOR_HAND)
         }
+        self.cursor_name = "default"
         # window icon
         self.set_icon(self.game_manager.game_data.game_logo)
         # update the game 30 times per seconds
         # update_rate = 30
         # pyglet.clock.schedule_interval(self.update, 1/update_rate)
         pyglet.clock.schedule_interval(self.update, 1/self.game_config["pyglet"]["update_rate"])
+        # redraw the window up to redraw_rate times per second, only when the scene changed (see redraw)
+        self.redraw_on_change_only: bool = self.game_config["pyglet"]["redraw_on_change_only"]
+        pyglet.clock.schedule_interval(self.redraw, 1/self.game_config["pyglet"]["redraw_rate"])
         # FPS counter
         self.fps_counter = pyglet.window.FPSDisplay(window=self, color=(255, 0, 0, 255))
+        # frame statistics: overlay toggled with F3, JSON lines stream if a file is given
+        self.frame_stats = FrameStats(self.game_manager, snapshot_interval=self.game_config["debug"]["stats_interval"],
+                                      stats_file_path=frame_stats_path)
+        # startup profile: written after the first frame
+        self.startup_profile_path = startup_profile_path
+        self.exit_after_startup = exit_after_startup
 
         # self.counter = 0
 
@@ -42,11 +76,14 @@ class GameWindow(pyglet.window.Window):
         # print(f"mouse position: {x} {y}")
         # print("window on_mouse_motion call")
         # print(f"clickable area : {self.game_manager.game_state.mouse_clickable_area}")
-        # update the cursor shape
-        if self.game_manager.game_data.mouse_clickable_area:
-            self.set_mouse_cursor(self.cursors["hand"])
-        else:
-            self.set_mouse_cursor(self.cursors["default"])
+        self.update_cursor()
+
+    def update_cursor(self):
+        # update the cursor shape, called after the game manager handled the events that change the region under the mouse
+        cursor_name = "hand" if self.game_manager.game_data.mouse_clickable_area else "default"
+        if cursor_name != self.cursor_name:
+            self.cursor_name = cursor_name
+            self.set_mouse_cursor(self.cursors[cursor_name])
 
     def on_mouse_press(self, x, y, button, modifiers):
         # print("window mouse press")
@@ -63,6 +100,7 @@ class GameWindow(pyglet.window.Window):
         #     print("MOUSE5 button")
         # else:
         #     print("unknown button")
+        self.update_cursor()
         if self.game_manager.game_data.exit_game:
             self.close()
 
@@ -86,6 +124,9 @@ class GameWindow(pyglet.window.Window):
     # keyboard events
     def on_key_press(self, symbol, modifiers):
         # print(symbol)
+        self.update_cursor()
+        if symbol == key.F3:
+            self.frame_stats.toggle_overlay()
         if symbol == key.ESCAPE:
             # exit()
             self.close()
@@ -117,31 +158,117 @@ class GameWindow(pyglet.window.Window):
         self.close()
         # super().on_close()
 
+    def on_expose(self):
+        # the window contents were lost (window uncovered or shown again), draw them again
+        self.game_manager.invalidate()
+
+    def redraw(self, dt):
+        # draw the next frame, replaces the redraw of every frame by pyglet.app.run
+        # the frames that would look like the previous one are skipped: no draw and no buffer swap
+        # (the frame statistics overlay measures every frame, it is redrawn while visible)
+        if self.redraw_on_change_only and not (self.game_manager.needs_redraw or self.frame_stats.overlay_visible):
+            self.frame_stats.skip_frame()
+            return
+        self.switch_to()
+        self.dispatch_event("on_draw")
+        self.flip()
+
     # update window display
     def on_draw(self):
+        frame_start_time = perf_counter()
+        self.frame_stats.begin_frame()
         # print(f"on_draw call #{self.counter}")
         # self.counter += 1
         self.clear()
         # self.game_manager.scenes[self.game_manager.current_scene].batch.draw()
         # self.game_manager.scenes[self.game_manager.current_scene].draw()
-        self.game_manager.current_scene.draw()
-        # update the cursor shape
-        self.dispatch_event("on_mouse_motion", self.game_manager.game_data.mouse_x, self.game_manager.game_data.mouse_y, 0, 0)
+        self.game_manager.draw()
         # FPS
         self.fps_counter.draw()
+        # frame statistics overlay
+        self.frame_stats.end_frame()
+        self.frame_stats.draw()
+        # the startup ends with the first frame
+        if startup_profiler.enabled:
+            startup_profiler.add_span("first frame", "frame", frame_start_time, perf_counter())
+            self.finish_startup_profile()
+
+    def finish_startup_profile(self):
+        # write the startup timeline and print a summary
+        startup_profiler.instant("interactive")
+        time_to_interactive = startup_profiler.elapsed_time()
+        startup_profiler.stop()
+        startup_profiler.dump(self.startup_profile_path)
+        totals = ", ".join(f"{category}: {total:.1f} ms" for category, total in startup_profiler.summary().items())
+        print(f"first frame drawn {time_to_interactive * 1e3:.1f} ms after the start ({totals})")
+        print(f"startup profile written to {self.startup_profile_path}")
+        if self.exit_after_startup:
+            # (closing the window while pyglet iterates over the windows to draw them is not allowed)
+            pyglet.app.exit()
 
     # only useful for stuff that needs to know how much time passed between each frames
     def update(self, dt):
         # print(dt)
         self.game_manager.update(dt)
+        self.update_cursor()
+
+
+def play_replay(replay_file_path: str) -> int:
+    # play a recorded session back as fast as possible and compare the game states with the recording
+    # returns the exit status of the program
+    try:
+        replay = Replay(replay_file_path)
+        with tempfile.TemporaryDirectory() as save_dir_path:
+            # the saves of the replay never replace the saved game of the player
+            game_config = replay_game_config(load_game_config(), replay, Path(save_dir_path) / "replay.sav")
+            # the scenes are drawn (the clicks depend on their widgets) but nothing is looked at: smallest hidden window
+            window = pyglet.window.Window(1, 1, visible=False)
+            game_manager = GameManager(game_config)
+            result = run_replay(replay, game_manager)
+            game_manager.game_data.save_worker.close()
+            game_manager.game_data.assets.close()
+            window.close()
+    except (OSError, ReplayError) as error:
+        print(f"could not play the replay: {error}")
+        return 2
+    print(f"{result["ticks"]} ticks, {result["frames"]} frames and {result["inputs"]} inputs replayed in {result["run_time"]:.2f} s "
+          f"({result["ticks"] / max(result["run_time"], 1e-9):.0f} ticks/s), {result["checkpoints"]} checkpoints matched")
+    if result["desync"] is not None:
+        print(f"DESYNC {result["desync"]}")
+        return 1
+    if not result["complete"]:
+        print("the replay ends before the end of the recording (interrupted session)")
+    return 0
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Homebound")
+    parser.add_argument("--profile-startup", nargs="?", const="startup_profile.json", default=None, metavar="TRACE_FILE",
+                        help="record the startup (imports, config, assets, scenes, first frame) as a Chrome trace "
+                             "(default file: startup_profile.json)")
+    parser.add_argument("--exit-after-startup", action="store_true", help="quit after the first frame (with --profile-startup)")
+    parser.add_argument("--frame-stats", default=None, metavar="STATS_FILE",
+                        help="write the frame statistics (shown by F3) to a JSON lines file, one record per debug.stats_interval")
+    parser.add_argument("--record-replay", default=None, metavar="REPLAY_FILE",
+                        help="record the inputs and the simulation updates of the session to a replay file")
+    parser.add_argument("--replay", default=None, metavar="REPLAY_FILE",
+                        help="play a replay file back as fast as possible on a hidden window, and check the recorded game states")
+    parser.add_argument("--headless", action="store_true", help="offscreen OpenGL context (EGL) for --replay, no display server needed")
+    args = parser.parse_args()
+    if args.replay is not None:
+        sys.exit(play_replay(args.replay))
     # init the window
     # window = GameWindow(1280, 720, "Homebound", resizable=False)
-    window = GameWindow()
+    window = GameWindow(startup_profile_path=args.profile_startup, exit_after_startup=args.exit_after_startup,
+                        frame_stats_path=args.frame_stats, replay_file_path=args.record_replay)
     # update the game 60 times per seconds
     # update_rate = 30
     # pyglet.clock.schedule_interval(window.update, 1/update_rate)
-    # run the game
-    pyglet.app.run()
+    # run the game, the window schedules its own redraws
+    pyglet.app.run(None)
+    # finish the replay file and the last save before exiting
+    if window.game_manager.replay_recorder is not None:
+        window.game_manager.replay_recorder.close()
+    window.game_manager.game_data.save_worker.close()
+    window.game_manager.game_data.assets.close()
+    window.frame_stats.close()
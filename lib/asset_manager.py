@@ -0,0 +1,232 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import perf_counter
+from typing import Optional
+import ctypes
+import hashlib
+import io
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+import pyglet
+from pyglet import resource
+from pyglet.image import AbstractImage, ImageData
+from pyglet.image.atlas import TextureBin
+from pyglet.sprite import Sprite
+import yaml
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[1])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from lib.game_config import YAML_SAFE_LOADER
+from lib.startup_profiler import startup_profiler
+
+
+ASSETS_MANIFEST_FILE_PATH = Path(ROOT_DIR_PATH) / "lib" / "assets.yml"
+
+
+def load_assets_manifest(manifest_file_path: Path = ASSETS_MANIFEST_FILE_PATH) -> dict[str]:
+    with open(manifest_file_path, "r", encoding="utf-8") as manifest_file:
+        return yaml.load(manifest_file, Loader=YAML_SAFE_LOADER)
+
+
+# decoded images cache: one file per image, named after the image file and the hash of its content
+# header (magic, format version, width, height, pitch, pixel format) followed by the raw pixels
+ASSETS_CACHE_MAGIC = b"HBAC"
+ASSETS_CACHE_VERSION = 1
+ASSETS_CACHE_HEADER = struct.Struct("<4sHIII4s")
+
+
+def _cache_file_path(cache_dir: Path, file_name: str, file_hash: str) -> Path:
+    return cache_dir / f"{file_name}.{file_hash}.rgba"
+
+
+def _read_cached_image(cache_file_path: Path) -> Optional[ImageData]:
+    # memory-map a decoded image from the cache, None if it is missing or unreadable
+    try:
+        with open(cache_file_path, "rb") as cache_file:
+            # copy on write: the pixels are only read from the disk when they are uploaded, the file is never modified
+            cached_data = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+    if len(cached_data) < ASSETS_CACHE_HEADER.size:
+        return None
+    magic, version, width, height, pitch, pixel_format = ASSETS_CACHE_HEADER.unpack_from(cached_data)
+    data_size = pitch * height
+    if magic != ASSETS_CACHE_MAGIC or version != ASSETS_CACHE_VERSION or len(cached_data) != ASSETS_CACHE_HEADER.size + data_size:
+        return None
+    # ctypes array over the mapped pixels, passed as is to OpenGL (keeps the mapping alive)
+    pixels = (ctypes.c_ubyte * data_size).from_buffer(cached_data, ASSETS_CACHE_HEADER.size)
+    return ImageData(width, height, pixel_format.rstrip(b"\0").decode("ascii"), pixels, pitch)
+
+
+def _write_cached_image(cache_dir: Path, file_name: str, file_hash: str, image_data: ImageData):
+    # store a decoded image in the cache, and delete the entries of the previous versions of the file
+    pitch = abs(image_data.pitch)
+    pixels = image_data.get_data(image_data.format, pitch)
+    header = ASSETS_CACHE_HEADER.pack(ASSETS_CACHE_MAGIC, ASSETS_CACHE_VERSION, image_data.width, image_data.height,
+                                      pitch, image_data.format.encode("ascii"))
+    cache_file_path = _cache_file_path(cache_dir, file_name, file_hash)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for old_cache_file_path in cache_dir.glob(f"{file_name}.*.rgba"):
+            if old_cache_file_path != cache_file_path:
+                old_cache_file_path.unlink(missing_ok=True)
+        # written next to the entry then renamed: a concurrent launch never maps a partial entry
+        temporary_file_path = cache_file_path.with_name(f"{cache_file_path.name}.{os.getpid()}.tmp")
+        with open(temporary_file_path, "wb") as cache_file:
+            cache_file.write(header)
+            cache_file.write(pixels)
+        os.replace(temporary_file_path, cache_file_path)
+    except OSError:
+        # the cache is only an optimization
+        pass
+
+
+def _decode_image(file_name: str, cache_dir: Optional[Path] = None) -> ImageData:
+    # runs on the thread pool: reads and decodes the image file (or maps it from the cache), no OpenGL call
+    with startup_profiler.span(f"decode {file_name}", "asset"):
+        with resource.file(file_name) as image_file:
+            file_content = image_file.read()
+        if cache_dir is None:
+            return pyglet.image.load(file_name, file=io.BytesIO(file_content)).get_image_data()
+        # keyed by the content of the file: a modified asset is decoded again
+        file_hash = hashlib.blake2b(file_content, digest_size=16).hexdigest()
+        image_data = _read_cached_image(_cache_file_path(cache_dir, file_name, file_hash))
+        if image_data is None:
+            image_data = pyglet.image.load(file_name, file=io.BytesIO(file_content)).get_image_data()
+            _write_cached_image(cache_dir, file_name, file_hash, image_data)
+        return image_data
+
+
+class AssetManager:
+    "loads the images of the manifest: decoded on a thread pool, uploaded to OpenGL on the main thread"
+
+    def __init__(self, manifest: dict[str], max_workers: int = 4, upload_budget: float = 0.004, cache_dir: Optional[Path] = None):
+        # manifest: {"images": {name: {"file": ..., "group": ..., "atlas": ..., "anchor": ..., "tint": ...}}}
+        self.images_manifest: dict[str, dict[str]] = manifest["images"]
+        # names of the images using each file (the colour variants of an icon share the file of its white variant)
+        self.file_images: dict[str, list[str]] = {}
+        for name, image_manifest in self.images_manifest.items():
+            self.file_images.setdefault(image_manifest["file"], []).append(name)
+        # decoded files waiting for their upload
+        self.decoding: dict[str, Future] = {}
+        # uploaded files (textures or texture atlas regions)
+        self.textures: dict[str, AbstractImage] = {}
+        # images of the manifest, one region of the texture of their file each (with their own anchor and tint)
+        self.images: dict[str, AbstractImage] = {}
+        # maximum time (seconds) spent uploading the decoded images in one call to upload_pending
+        self.upload_budget = upload_budget
+        # directory of the decoded images cache, no cache if None
+        self.cache_dir = cache_dir
+        self.thread_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asset decoder")
+        # small images share atlas textures, the tall ones are packed separately (same heuristic as pyglet.resource)
+        self.texture_bins: dict[int, TextureBin] = {}
+        # the images of a named atlas are packed in their own textures
+        self.atlases: dict[str, TextureBin] = {}
+
+    def names(self, group: Optional[str] = None) -> list[str]:
+        # names of the images of a group (every image if group is None)
+        return [name for name, image_manifest in self.images_manifest.items() if group is None or image_manifest["group"] == group]
+
+    def request(self, group: Optional[str] = None):
+        # start decoding the images of a group in the background (every image if group is None)
+        for name in self.names(group):
+            self.request_image(name)
+
+    def request_image(self, name: str):
+        # start decoding the file of one image in the background
+        file_name = self.images_manifest[name]["file"]
+        if (file_name not in self.textures) and (file_name not in self.decoding):
+            self.decoding[file_name] = self.thread_pool.submit(_decode_image, file_name, self.cache_dir)
+
+    def get(self, name: str) -> AbstractImage:
+        # return an image, decode (if it was not requested) and upload its file now if it is not ready
+        if name not in self.images:
+            file_name = self.images_manifest[name]["file"]
+            if file_name not in self.textures:
+                self.request_image(name)
+                self._upload(file_name, self.decoding.pop(file_name).result())
+        return self.images[name]
+
+    def upload_pending(self) -> int:
+        # upload the images already decoded, until the time budget is spent (main thread only)
+        # returns the number of images uploaded
+        start_time = perf_counter()
+        uploaded_count = 0
+        for file_name, future in list(self.decoding.items()):
+            if perf_counter() - start_time > self.upload_budget:
+                break
+            if future.done():
+                del self.decoding[file_name]
+                self._upload(file_name, future.result())
+                uploaded_count += 1
+        return uploaded_count
+
+    def _texture_bin(self, width: int, height: int, border: int) -> Optional[TextureBin]:
+        max_size = min(2048, pyglet.image.get_max_texture_size()) - border
+        # large images are not placed in an atlas
+        if width > max_size or height > max_size:
+            return None
+        bin_size = 2 if height > max_size / 4 else 1
+        if bin_size not in self.texture_bins:
+            self.texture_bins[bin_size] = TextureBin()
+        return self.texture_bins[bin_size]
+
+    def _atlas(self, name: str) -> TextureBin:
+        if name not in self.atlases:
+            self.atlases[name] = TextureBin()
+        return self.atlases[name]
+
+    def _upload(self, file_name: str, image_data: ImageData):
+        # upload a decoded file, then create the images using it
+        atlas_name = self.images_manifest[self.file_images[file_name][0]].get("atlas")
+        if atlas_name is not None:
+            texture_bin = self._atlas(atlas_name)
+        else:
+            texture_bin = self._texture_bin(image_data.width, image_data.height, border=1)
+        with startup_profiler.span(f"upload {file_name}", "asset"):
+            if texture_bin is None:
+                texture = image_data.get_texture()
+            else:
+                texture = texture_bin.add(image_data, border=1)
+        self.textures[file_name] = texture
+        for name in self.file_images[file_name]:
+            # one region per image: the variants sharing the file do not share their anchor and tint
+            image = texture.get_region(0, 0, texture.width, texture.height)
+            anchor = self.images_manifest[name].get("anchor")
+            if anchor == "center":
+                image.anchor_x = image.width // 2
+                image.anchor_y = image.height // 2
+            elif anchor == "middle_y":
+                image.anchor_y = image.height // 2
+            tint = self.images_manifest[name].get("tint")
+            if tint is not None:
+                image.tint = tuple(int(tint[index:index + 2], 16) for index in (0, 2, 4))
+            self.images[name] = image
+
+    def progress(self, group: Optional[str] = None) -> float:
+        # fraction of the images of a group (every image if group is None) ready to be used
+        names = self.names(group)
+        if not names:
+            return 1.
+        return sum(name in self.images for name in names) / len(names)
+
+    def close(self):
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+
+
+class IconSprite(Sprite):
+    "sprite colouring itself with the tint of its image (white for the images without tint)"
+
+    def __init__(self, img, *args, **kwargs):
+        super().__init__(img, *args, **kwargs)
+        self.color = getattr(img, "tint", (255, 255, 255))
+
+    @Sprite.image.setter
+    def image(self, img):
+        Sprite.image.fset(self, img)
+        self.color = getattr(img, "tint", (255, 255, 255))
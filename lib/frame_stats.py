@@ -0,0 +1,200 @@
+from collections import deque
+from time import perf_counter
+from typing import Optional, TextIO
+import gc
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+from pyglet.graphics import Batch
+from pyglet.text import Label
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[1])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from lib.game_manager import GameManager
+
+
+# number of frames used for the frame time percentiles
+FRAME_TIMES_WINDOW = 600
+
+
+class FrameStats:
+    "per-frame instrumentation: frame times, simulation and draw timings, batch contents, allocations and GC pauses"
+
+    def __init__(self, game_manager: GameManager, snapshot_interval: float = 1., stats_file_path: Optional[Path] = None):
+        self.game_manager = game_manager
+        # real time (seconds) between two snapshots (overlay refresh and stats stream record)
+        self.snapshot_interval = snapshot_interval
+        # overlay, toggled by the window (F3)
+        self.overlay_visible = False
+        self.overlay_batch = Batch()
+        self.overlay_label = Label("", font_name="Courier New", font_size=10, color=(255, 255, 0, 255),
+                                   x=10, y=game_manager.game_data.window_height - 10, width=620, multiline=True,
+                                   anchor_y="top", batch=self.overlay_batch)
+        # machine-readable stream: one JSON record per snapshot
+        self.stats_file: Optional[TextIO] = None
+        if stats_file_path is not None:
+            Path(stats_file_path).parent.mkdir(parents=True, exist_ok=True)
+            self.stats_file = open(stats_file_path, "w", encoding="utf-8")
+        # time between two consecutive frames, and time spent drawing each frame (seconds)
+        self.frame_times: deque[float] = deque(maxlen=FRAME_TIMES_WINDOW)
+        self.draw_times: deque[float] = deque(maxlen=FRAME_TIMES_WINDOW)
+        self.last_frame_start_time: Optional[float] = None
+        self.frame_start_time = 0.
+        self.frame_allocated_blocks = 0
+        # accumulated since the last snapshot
+        self.snapshot_start_time = perf_counter()
+        self.snapshot_start_tick_count = game_manager.game_data.simulation.tick_count
+        self.frames_count = 0
+        # frames not drawn because nothing changed on the screen
+        self.skipped_frames_count = 0
+        self.scene_draw_times: dict[str, float] = {}
+        self.allocated_blocks_deltas: list[int] = []
+        self.gc_pauses: list[float] = []
+        self.gc_start_time = 0.
+        self.records_written = 0
+        self.enabled = False
+        self.set_enabled(self.stats_file is not None)
+
+    def set_enabled(self, enabled: bool):
+        # the measures cost a little, they only run while the overlay is visible or the stream is written
+        if enabled != self.enabled:
+            self.enabled = enabled
+            self.game_manager.game_data.simulation.enable_timings(enabled)
+            if enabled:
+                gc.callbacks.append(self._on_gc)
+                self._reset_snapshot()
+            else:
+                gc.callbacks.remove(self._on_gc)
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        self.set_enabled(self.overlay_visible or (self.stats_file is not None))
+
+    def _on_gc(self, phase: str, info: dict[str]):
+        # called by the garbage collector before and after every collection
+        if phase == "start":
+            self.gc_start_time = perf_counter()
+        else:
+            self.gc_pauses.append(perf_counter() - self.gc_start_time)
+
+    def _reset_snapshot(self):
+        simulation = self.game_manager.game_data.simulation
+        self.snapshot_start_time = perf_counter()
+        self.snapshot_start_tick_count = simulation.tick_count
+        self.frames_count = 0
+        self.skipped_frames_count = 0
+        self.scene_draw_times = {}
+        self.allocated_blocks_deltas = []
+        self.gc_pauses = []
+        if simulation.colony_update_timings is not None:
+            simulation.enable_timings(True)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start_time = perf_counter()
+        if self.last_frame_start_time is not None:
+            self.frame_times.append(self.frame_start_time - self.last_frame_start_time)
+        self.last_frame_start_time = self.frame_start_time
+        self.frame_allocated_blocks = sys.getallocatedblocks()
+
+    def skip_frame(self):
+        # called by the window instead of drawing a frame
+        if self.enabled:
+            self.skipped_frames_count += 1
+
+    def end_frame(self):
+        # called once the frame is drawn (before the overlay)
+        if not self.enabled:
+            return
+        self.draw_times.append(perf_counter() - self.frame_start_time)
+        # net number of memory blocks allocated by Python during the frame
+        self.allocated_blocks_deltas.append(sys.getallocatedblocks() - self.frame_allocated_blocks)
+        self.frames_count += 1
+        for section, section_time in self.game_manager.current_scene.draw_times.items():
+            self.scene_draw_times[section] = self.scene_draw_times.get(section, 0.) + section_time
+        if perf_counter() - self.snapshot_start_time >= self.snapshot_interval:
+            record = self.snapshot()
+            if self.stats_file is not None:
+                self.stats_file.write(json.dumps(record) + "\n")
+                self.stats_file.flush()
+                self.records_written += 1
+            if self.overlay_visible:
+                self.overlay_label.text = self.format_overlay(record)
+            self._reset_snapshot()
+
+    def snapshot(self) -> dict[str]:
+        # statistics of the frames since the last snapshot (the frame time percentiles cover the last frames)
+        simulation = self.game_manager.game_data.simulation
+        scene = self.game_manager.current_scene
+        ticks_count = simulation.tick_count - self.snapshot_start_tick_count
+        frames_count = max(self.frames_count, 1)
+        frame_times = np.array(self.frame_times) * 1e3
+        percentiles = np.percentile(frame_times, (50, 95, 99)) if len(frame_times) else (0., 0., 0.)
+        # simulation time per tick (microseconds), per colony and per building type (all colonies)
+        colonies_tick_time = {}
+        buildings_tick_time = {}
+        for colony_name, colony in simulation.colonies.items():
+            colonies_tick_time[colony_name] = simulation.colony_update_timings[colony_name] * 1e6 / max(ticks_count, 1)
+            for building_name, building_time in colony.update_timings.items():
+                buildings_tick_time[building_name] = buildings_tick_time.get(building_name, 0.) + building_time * 1e6 / max(ticks_count, 1)
+        return {
+            "duration": round(perf_counter() - self.snapshot_start_time, 3),
+            "scene": self.game_manager.current_scene_name,
+            "frames": self.frames_count,
+            "skipped_frames": self.skipped_frames_count,
+            "frame_time_ms": {
+                "p50": round(float(percentiles[0]), 3),
+                "p95": round(float(percentiles[1]), 3),
+                "p99": round(float(percentiles[2]), 3),
+                "max": round(float(frame_times.max()), 3) if len(frame_times) else 0.
+            },
+            "draw_ms": round(float(np.mean(self.draw_times)) * 1e3, 3) if self.draw_times else 0.,
+            "scene_draw_ms": {section: round(section_time * 1e3 / frames_count, 3) for section, section_time in self.scene_draw_times.items()},
+            "simulation": {
+                "ticks": ticks_count,
+                "colonies_us_per_tick": {name: round(value, 1) for name, value in colonies_tick_time.items()},
+                "buildings_us_per_tick": {name: round(value, 1) for name, value in sorted(buildings_tick_time.items(), key=lambda item: -item[1])}
+            },
+            "batch": {
+                **scene.batch.counts(),
+                "vertex_lists_allocated_last_frame": scene.frame_vertex_lists_allocated
+            },
+            "memory": {
+                "allocated_blocks_per_frame": round(sum(self.allocated_blocks_deltas) / frames_count, 1),
+                "gc_collections": len(self.gc_pauses),
+                "gc_pause_ms": round(sum(self.gc_pauses) * 1e3, 3),
+                "gc_pause_max_ms": round(max(self.gc_pauses, default=0.) * 1e3, 3)
+            }
+        }
+
+    def format_overlay(self, record: dict[str]) -> str:
+        frame_time = record["frame_time_ms"]
+        simulation = record["simulation"]
+        batch = record["batch"]
+        memory = record["memory"]
+        lines = [
+            f"frame ms  p50 {frame_time["p50"]:.2f}  p95 {frame_time["p95"]:.2f}  p99 {frame_time["p99"]:.2f}  max {frame_time["max"]:.2f}",
+            f"draw ms   {record["draw_ms"]:.2f}  " + "  ".join(f"{section} {value:.2f}" for section, value in record["scene_draw_ms"].items()),
+            f"sim       {simulation["ticks"]} ticks  " + "  ".join(f"{name} {value:.0f}us" for name, value in simulation["colonies_us_per_tick"].items()),
+            "buildings " + "  ".join(f"{name} {value:.0f}us" for name, value in list(simulation["buildings_us_per_tick"].items())[:5]),
+            f"batch     {batch["vertex_lists"]} vertex lists ({batch["text_vertex_lists"]} text)  {batch["draw_calls"]} draw calls  "
+            f"{batch["vertex_lists_allocated_last_frame"]} allocated",
+            f"memory    {memory["allocated_blocks_per_frame"]:+.0f} blocks/frame  gc {memory["gc_collections"]}x {memory["gc_pause_ms"]:.2f} ms "
+            f"(max {memory["gc_pause_max_ms"]:.2f} ms)"
+        ]
+        return "\n".join(lines)
+
+    def draw(self):
+        if self.overlay_visible:
+            self.overlay_batch.draw()
+
+    def close(self):
+        self.set_enabled(False)
+        if self.stats_file is not None:
+            self.stats_file.close()
+            self.stats_file = None
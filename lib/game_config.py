@@ -0,0 +1,261 @@
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+import hashlib
+import os
+import pickle
+import sys
+
+import yaml
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[1])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from lib.game_entities.resource_ledger import RESOURCE_NAMES
+from lib.startup_profiler import startup_profiler
+
+
+CONFIG_FILE_PATH = Path(__file__).resolve().parent / "config.yml"
+# parsed and validated configuration, reused while the configuration file does not change
+CONFIG_CACHE_FILE_PATH = Path(ROOT_DIR_PATH) / "cache" / "config.pickle"
+CONFIG_CACHE_VERSION = 2
+# C LibYAML loader when PyYAML was built with it (several times faster than the pure Python one)
+YAML_SAFE_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+JOB_TYPES = ("construction", "production")
+# workers that can be assigned to the jobs of a building
+JOB_WORKER_TYPES = ("engineers", "scientists")
+WORKER_TYPES = ("engineers", "scientists", "pilots")
+# buildings placed at level 1 and never constructed, the other buildings start at level 0 (not built)
+UNCONSTRUCTED_BUILDINGS = ("headquarters",)
+# buildings whose production (or training, or manufacture) runs at the production_speed of their level
+PRODUCING_BUILDINGS = ("drilling_station", "furnace", "electrolysis_station", "greenhouse", "school", "factory")
+
+
+class ConfigError(Exception):
+    "raised when the configuration file is malformed, with the path of the faulty entry"
+
+
+@dataclass(frozen=True, slots=True)
+class PowerParameters:
+    "power consumed and produced by a building at one level"
+    consumed: float
+    produced: float
+
+
+@dataclass(frozen=True, slots=True)
+class LevelParameters:
+    "parameters of a building at one level"
+    power: PowerParameters
+    # max storage added to the colony, per resource (None: no storage)
+    storage: Optional[Mapping[str, float]]
+    # jobs[job type][worker type]: number of workers the building can employ
+    jobs: Mapping[str, Mapping[str, int]]
+    # cost and workload of the construction of the next level (None at the maximum level)
+    construction_costs: Optional[Mapping[str, float]] = None
+    construction_workload: Optional[float] = None
+    # production per worker and per second (None for the buildings that do not produce)
+    production_speed: Optional[float] = None
+
+
+@dataclass(frozen=True, slots=True)
+class BuildingConfig:
+    "displayed name and parameters per level of a building type"
+    name: str
+    displayed_name: str
+    parameters_per_level: Mapping[int, LevelParameters]
+
+
+@dataclass(frozen=True, slots=True)
+class ItemPrice:
+    "resources and workload needed by the factory to manufacture an item"
+    resources: Mapping[str, float]
+    workload: float
+
+
+@dataclass(frozen=True, slots=True)
+class GameRules:
+    "economy sections of the configuration, validated and compiled into immutable objects"
+    buildings: Mapping[str, BuildingConfig]
+    ore_per_ingot: Mapping[str, float]
+    workers_training_workload: Mapping[str, float]
+    items_price: Mapping[str, ItemPrice]
+
+
+def _get(section: Mapping[str, Any], key: Any, path: str) -> Any:
+    if not isinstance(section, Mapping):
+        raise ConfigError(f"{path}: expected a mapping, got {section!r}")
+    if key not in section:
+        raise ConfigError(f"{path}: missing entry '{key}'")
+    return section[key]
+
+
+def _number(value: Any, path: str) -> float:
+    # bool is a subclass of int, but never a valid quantity
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ConfigError(f"{path}: expected a non-negative number, got {value!r}")
+    return value
+
+
+def _amounts(section: Any, path: str, allowed_keys: tuple[str, ...]) -> Mapping[str, float]:
+    # {name: non-negative number} mapping, with names taken from allowed_keys
+    if not isinstance(section, Mapping):
+        raise ConfigError(f"{path}: expected a mapping, got {section!r}")
+    for key in section:
+        if key not in allowed_keys:
+            raise ConfigError(f"{path}: unknown entry '{key}' (expected one of: {", ".join(allowed_keys)})")
+    return MappingProxyType({key: _number(value, f"{path}.{key}") for key, value in section.items()})
+
+
+def _complete_amounts(section: Any, path: str, keys: tuple[str, ...]) -> Mapping[str, float]:
+    # like _amounts, with an entry required for every key
+    amounts = _amounts(section, path, keys)
+    missing_keys = [key for key in keys if key not in amounts]
+    if missing_keys:
+        raise ConfigError(f"{path}: missing entries {", ".join(repr(key) for key in missing_keys)}")
+    return amounts
+
+
+def _level_parameters(section: Any, path: str) -> LevelParameters:
+    power = _get(section, "power", path)
+    storage = _get(section, "storage", path)
+    jobs = _get(section, "jobs", path)
+    construction_costs = section.get("construction_costs")
+    construction_workload = section.get("construction_workload")
+    production_speed = section.get("production_speed")
+    return LevelParameters(
+        power=PowerParameters(
+            consumed=_number(_get(power, "consumed", f"{path}.power"), f"{path}.power.consumed"),
+            produced=_number(_get(power, "produced", f"{path}.power"), f"{path}.power.produced")
+        ),
+        storage=None if storage is None else _amounts(storage, f"{path}.storage", RESOURCE_NAMES),
+        jobs=MappingProxyType({
+            job_type: _amounts(_get(jobs, job_type, f"{path}.jobs"), f"{path}.jobs.{job_type}", JOB_WORKER_TYPES)
+            for job_type in JOB_TYPES
+        }),
+        construction_costs=None if construction_costs is None else _amounts(construction_costs, f"{path}.construction_costs", RESOURCE_NAMES),
+        construction_workload=None if construction_workload is None else _number(construction_workload, f"{path}.construction_workload"),
+        production_speed=None if production_speed is None else _number(production_speed, f"{path}.production_speed")
+    )
+
+
+def _building_config(name: str, section: Any, path: str) -> BuildingConfig:
+    displayed_name = _get(section, "displayed_name", path)
+    if not isinstance(displayed_name, str):
+        raise ConfigError(f"{path}.displayed_name: expected a string, got {displayed_name!r}")
+    parameters_per_level = _get(section, "parameters_per_level", path)
+    if not isinstance(parameters_per_level, Mapping) or not parameters_per_level:
+        raise ConfigError(f"{path}.parameters_per_level: expected a non-empty mapping, got {parameters_per_level!r}")
+    compiled_levels = {}
+    for level, level_section in parameters_per_level.items():
+        if isinstance(level, bool) or not isinstance(level, int):
+            raise ConfigError(f"{path}.parameters_per_level: expected integer levels, got {level!r}")
+        compiled_levels[level] = _level_parameters(level_section, f"{path}.parameters_per_level.{level}")
+    # the levels follow each other from the first level of the building
+    min_level, max_level = 1 if name in UNCONSTRUCTED_BUILDINGS else 0, max(compiled_levels)
+    if sorted(compiled_levels) != list(range(min_level, max_level + 1)):
+        raise ConfigError(f"{path}.parameters_per_level: expected the levels {min_level} to {max_level}, got {sorted(compiled_levels)}")
+    for level, level_parameters in compiled_levels.items():
+        level_path = f"{path}.parameters_per_level.{level}"
+        # the construction of the next level
+        if level < max_level:
+            if level_parameters.construction_costs is None:
+                raise ConfigError(f"{level_path}: missing entry 'construction_costs' (required below the maximum level)")
+            if level_parameters.construction_workload is None:
+                raise ConfigError(f"{level_path}: missing entry 'construction_workload' (required below the maximum level)")
+        if (name in PRODUCING_BUILDINGS) and (level >= 1) and (level_parameters.production_speed is None):
+            raise ConfigError(f"{level_path}: missing entry 'production_speed' (required for the built levels of a {name})")
+    return BuildingConfig(name, displayed_name, MappingProxyType(compiled_levels))
+
+
+def compile_game_rules(game_config: dict[str]) -> GameRules:
+    # validate the economy sections of the configuration and compile them, raises ConfigError if they are malformed
+    buildings = _get(game_config, "buildings", "config")
+    if not isinstance(buildings, Mapping):
+        raise ConfigError(f"buildings: expected a mapping, got {buildings!r}")
+    compiled_buildings = MappingProxyType({
+        name: _building_config(name, section, f"buildings.{name}") for name, section in buildings.items()
+    })
+    ingots = tuple(resource for resource in RESOURCE_NAMES if f"{resource}_ore" in RESOURCE_NAMES)
+    ore_per_ingot = _complete_amounts(_get(game_config, "ore_per_ingot", "config"), "ore_per_ingot", ingots)
+    workers_training_workload = _complete_amounts(_get(game_config, "workers_training_workload", "config"), "workers_training_workload", WORKER_TYPES)
+    items_price_section = _get(game_config, "items_price", "config")
+    if not isinstance(items_price_section, Mapping):
+        raise ConfigError(f"items_price: expected a mapping, got {items_price_section!r}")
+    items_price = MappingProxyType({
+        item: ItemPrice(
+            resources=_amounts(_get(section, "resources", f"items_price.{item}"), f"items_price.{item}.resources", RESOURCE_NAMES),
+            workload=_number(_get(section, "workload", f"items_price.{item}"), f"items_price.{item}.workload")
+        )
+        for item, section in items_price_section.items()
+    })
+    # the other sections refer to the buildings and the resources
+    colonies = _get(game_config, "colonies", "config")
+    for colony_name, colony_section in colonies.items():
+        _amounts(_get(colony_section, "production_factors", f"colonies.{colony_name}"),
+                 f"colonies.{colony_name}.production_factors", RESOURCE_NAMES)
+    starting_assets = _get(game_config, "starting_assets", "config")
+    for index, building_dict in enumerate(_get(starting_assets, "buildings", "starting_assets")):
+        building_name = _get(building_dict, "name", f"starting_assets.buildings.{index}")
+        if building_name not in compiled_buildings:
+            raise ConfigError(f"starting_assets.buildings.{index}.name: unknown building '{building_name}'")
+    _amounts(_get(starting_assets, "workers", "starting_assets"), "starting_assets.workers", WORKER_TYPES)
+    return GameRules(compiled_buildings, ore_per_ingot, workers_training_workload, items_price)
+
+
+def _config_cache_key(config_file_path: Path, config_file_content: bytes) -> tuple:
+    return (
+        CONFIG_CACHE_VERSION,
+        str(Path(config_file_path).resolve()),
+        os.stat(config_file_path).st_mtime_ns,
+        hashlib.blake2b(config_file_content, digest_size=16).hexdigest()
+    )
+
+
+def _read_cached_config(cache_file_path: Path, cache_key: tuple) -> Optional[dict[str]]:
+    # parsed configuration stored for this exact configuration file, None if there is none
+    try:
+        with open(cache_file_path, "rb") as cache_file:
+            cached_key, game_config = pickle.load(cache_file)
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        return None
+    return game_config if cached_key == cache_key else None
+
+
+def _write_cached_config(cache_file_path: Path, cache_key: tuple, game_config: dict[str]):
+    try:
+        cache_file_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_file_path = cache_file_path.with_name(f"{cache_file_path.name}.{os.getpid()}.tmp")
+        with open(temporary_file_path, "wb") as cache_file:
+            pickle.dump((cache_key, game_config), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_file_path, cache_file_path)
+    except OSError:
+        # the cache is only an optimization
+        pass
+
+
+def load_game_config(config_file_path: Path = CONFIG_FILE_PATH, cache_file_path: Optional[Path] = CONFIG_CACHE_FILE_PATH) -> dict[str]:
+    # load the game configurations from the yaml file
+    # the economy sections are compiled once into game_config["rules"] (see GameRules), a malformed file raises ConfigError
+    # the parsed file is cached (keyed by the modification time and the hash of the file), no cache if cache_file_path is None
+    with open(config_file_path, "rb") as f:
+        config_file_content = f.read()
+    cache_key = _config_cache_key(config_file_path, config_file_content)
+    with startup_profiler.span("read config cache", "config"):
+        game_config = None if cache_file_path is None else _read_cached_config(cache_file_path, cache_key)
+    if game_config is None:
+        with startup_profiler.span("parse config.yml", "config", loader=YAML_SAFE_LOADER.__name__):
+            game_config: dict[str] = yaml.load(config_file_content.decode("utf_8"), Loader=YAML_SAFE_LOADER)
+        # validated before being cached
+        with startup_profiler.span("compile config rules", "config"):
+            game_rules = compile_game_rules(game_config)
+        if cache_file_path is not None:
+            _write_cached_config(cache_file_path, cache_key, game_config)
+    else:
+        # the cache stores the parsed file, the rules are compiled by the current version of this module
+        with startup_profiler.span("compile config rules", "config"):
+            game_rules = compile_game_rules(game_config)
+    game_config["rules"] = game_rules
+    return game_config
@@ -1,4 +1,8 @@
 from pyglet import resource, font
+from pyglet.image import AbstractImage
+from functools import cached_property
+from time import perf_counter
+from typing import Optional
 import sys
 from pathlib import Path
 
@@ -7,11 +11,10 @@ if ROOT_DIR_PATH not in sys.path:
     sys.path.insert(0, ROOT_DIR_PATH)
 
 from lib.game_entities.colony import Colony
-
-
-def center_image(img):
-    img.anchor_x = img.width // 2
-    img.anchor_y = img.height // 2
+from lib.simulation import Simulation
+from lib.asset_manager import AssetManager, load_assets_manifest
+from lib.save_game import SaveFormatError, SaveWorker, read_saved_game, validate_game_state
+from lib.startup_profiler import startup_profiler
 
 
 class GameData:
@@ -34,9 +37,20 @@ class GameData:
 
         # flags
         self.sound_on = True
-        self.saved_game_available = False
+        self.save_file_path = Path(ROOT_DIR_PATH) / self.game_config["saves"]["path"]
+        self.saved_game_available = self.save_file_path.is_file()
+        # why the last save could not be written, shown by the main menu (None: the last save was written)
+        # (copied from the save worker by update_save_status)
+        self.save_error: Optional[str] = None
+        # why the last load of the saved game failed, shown by the main menu (None: the last load succeeded)
+        self.load_error: Optional[str] = None
+        # the saves are written on a background thread
+        self.save_worker = SaveWorker(self.save_file_path, compress=self.game_config["saves"]["compress"],
+            yaml_export=self.game_config["saves"]["yaml_export"], snapshot_interval=self.game_config["saves"]["snapshot_interval"])
+        self.autosave_interval: float = self.game_config["saves"]["autosave_interval"]
+        # real time since the last save, only counted while the game is running
+        self.time_since_save = 0.
         self.exit_game = False
-        self.game_paused = True
 
         # game data
 
@@ -54,249 +68,136 @@ class GameData:
         #     "titan": Colony(self.game_config),
         #     # "enceladus": Colony(self.game_config)
         # }
-        self.colonies: dict[str, Colony] = {name: Colony(self.game_config, name) for name in self.game_config["colonies"].keys()}
+        # the simulation owns the colonies and the spaceships, it can run without pyglet
+        self.simulation = Simulation(self.game_config)
+        self.game_paused = True
+        self.colonies: dict[str, Colony] = self.simulation.colonies
         self.active_colony = "moon"
 
         # spaceships in transit
-        self.flying_spaceships = []
+        self.flying_spaceships = self.simulation.flying_spaceships
 
         # research (currently researching + acquired)
 
         # earth goal (resources sent + required)
 
 
+    @property
+    def game_paused(self) -> bool:
+        # the pause flag gates the simulation clock
+        return self.simulation.paused
+
+    @game_paused.setter
+    def game_paused(self, paused: bool):
+        self.simulation.paused = paused
+
     def launch_ship(self):
         pass
 
+    def to_state(self) -> dict[str]:
+        # plain data describing the game, used by the saves
+        return {
+            "active_colony": self.active_colony,
+            "simulation": self.simulation.to_state()
+        }
+
+    def load_state(self, game_state: dict[str]):
+        # restore the game from the plain data returned by to_state
+        self.simulation.load_state(game_state["simulation"])
+        self.active_colony = game_state["active_colony"]
+
+    def save_game(self):
+        # snapshot the current game (the snapshot shares no mutable object with the game) and let the save worker write it
+        start_time = perf_counter()
+        game_state = self.to_state()
+        self.save_worker.submit(game_state, snapshot_time=perf_counter() - start_time)
+        self.time_since_save = 0.
+
+    def update_save_status(self, wait: bool = False) -> bool:
+        # copy the results of the save worker (it writes on its own thread), returns whether they changed
+        # a saved game is only available once a save was written, wait: first wait for the saves being written
+        if wait:
+            self.save_worker.wait()
+        saved_game_available = self.saved_game_available or (self.save_worker.saves_written > 0)
+        save_error = self.save_worker.last_error
+        changed = (saved_game_available != self.saved_game_available) or (save_error != self.save_error)
+        self.saved_game_available, self.save_error = saved_game_available, save_error
+        return changed
+
+    def load_game(self) -> bool:
+        # replace the current game with the one in the save file, returns whether it succeeded
+        # a save still being written is completed first
+        self.save_worker.wait()
+        # the saved game is checked and built in a separate simulation first, a save that cannot be loaded leaves the current game untouched
+        try:
+            game_state = read_saved_game(self.save_file_path)
+            validate_game_state(game_state, self.game_config)
+            try:
+                Simulation(self.game_config).load_state(game_state["simulation"])
+            except (KeyError, IndexError, TypeError, ValueError, AttributeError) as error:
+                raise SaveFormatError(f"invalid game state ({error!r})") from error
+        except (OSError, SaveFormatError) as error:
+            self.load_error = str(error)
+            return False
+        self.load_state(game_state)
+        self.load_error = None
+        return True
+
 
     def update(self, dt):
-        # update every colony
-        # update every flying spaceships
-        for colony_name in self.colonies.keys():
-            self.colonies[colony_name].update(dt)
+        # advance the simulation clock by dt seconds of real time
+        self.simulation.advance(dt)
+        # autosave
+        if self.autosave_interval > 0 and self.simulation.running:
+            self.time_since_save += dt
+            if self.time_since_save >= self.autosave_interval:
+                self.save_game()
 
 
     def load_resources(self):
 
         # tell pyglet where the resources are
-        resource.path = ["assets"]
+        # (absolute path: pyglet resolves the relative ones from the directory of the script that was run)
+        resource.path = [str(Path(ROOT_DIR_PATH) / "assets")]
         resource.reindex()
 
         # fonts
         # blaster
         # https://fr.fonts2u.com/blaster-italic.police
-        resource.add_font("blasteri.ttf")
-        self.title_font_name = "Blaster"
-        font.load(self.title_font_name, italic=True)
+        with startup_profiler.span("font blasteri.ttf", "font"):
+            resource.add_font("blasteri.ttf")
+            self.title_font_name = "Blaster"
+            font.load(self.title_font_name, italic=True)
         # orbitron
         # https://fr.fonts2u.com/orbitron-black.police
-        resource.add_font("orbitron-black.ttf")
-        self.subtitle_font_name = "Orbitron"
-        font.load(self.subtitle_font_name)
+        with startup_profiler.span("font orbitron-black.ttf", "font"):
+            resource.add_font("orbitron-black.ttf")
+            self.subtitle_font_name = "Orbitron"
+            font.load(self.subtitle_font_name)
         # default
         self.default_font_name = "Arial"
 
-        # main menu background image
-        # https://getwallpapers.com/image/eyJpdiI6IjdQXC8rZkRRbUNRSml4QlllXC8xb253dz09IiwidmFsdWUiOiJ3UDZRS3RqeUxVVGhZQnBQYWhcL1IzZz09IiwibWFjIjoiNjAxYTI2NGI0MDAwZDA2NGIyZDk5MTdmNGE3OWVhMGNkODc1YjIwYTgxMDY5MDVmNTE2MGZjYmU4ZjhiZmMyZCJ9
-        self.main_menu_background_img = resource.image("milky_way_cropped.jpg")
-        self.main_menu_background_img_region = self.main_menu_background_img.get_region(
+        # images: decoded in the background and uploaded on first use or between frames (see lib/assets.yml)
+        # (the game manager requests them, the images of the first scene first)
+        assets_cache_path = self.game_config["assets"]["cache_path"]
+        self.assets = AssetManager(load_assets_manifest(),
+                                   cache_dir=None if assets_cache_path is None else Path(ROOT_DIR_PATH) / assets_cache_path)
+
+
+    def __getattr__(self, name: str):
+        # images of the assets manifest, loaded on first use (only called if the attribute does not exist yet)
+        if (name != "assets") and ("assets" in self.__dict__) and (name in self.assets.images_manifest):
+            image = self.assets.get(name)
+            # later accesses are plain attribute lookups
+            setattr(self, name, image)
+            return image
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    @cached_property
+    def main_menu_background_img_region(self) -> AbstractImage:
+        return self.main_menu_background_img.get_region(
             x = self.main_menu_background_img.width - self.window_width,
             y = int((self.main_menu_background_img.height - self.window_height) / 2),
             width = self.window_width,
             height = self.window_height
         )
-
-        # mute/unmute image
-        # https://www.svgrepo.com/svg/486849/sound-loud
-        self.sound_on_img = resource.image("sound_on.png")
-        # https://www.svgrepo.com/svg/486852/sound-mute
-        self.sound_off_img = resource.image("sound_off.png")
-
-        # window with title bar
-        self.side_window = resource.image("Example_Window.png")
-        self.side_window.anchor_y = self.side_window.height // 2
-
-        # moon background
-        # https://www.space.com/734-moon-smart-1-returns-close-ups.html
-        self.moon_background_img = resource.image("moon_surface_pixelated.png")
-        # self.moon_background_img = resource.image("moon_surface.jpg")
-
-        # game icon
-        # https://www.pngegg.com/en/png-nocyw
-        # self.game_logo = resource.image("game-logo-32.png")
-        self.game_logo = resource.image("game-logo-32.ico")
-
-        # icons
-
-        # workers
-        # https://www.svgrepo.com/svg/334853/plane-alt
-        self.icon_plane_light_gray = resource.image("icon-plane-c0c0c0.png")
-        center_image(self.icon_plane_light_gray)
-        self.icon_plane_white = resource.image("icon-plane-ffffff.png")
-        center_image(self.icon_plane_white)
-        # https://www.svgrepo.com/svg/385283/wrench-tool-options
-        self.icon_wrench_light_gray = resource.image("icon-wrench-c0c0c0.png")
-        center_image(self.icon_wrench_light_gray)
-        self.icon_wrench_white = resource.image("icon-wrench-ffffff.png")
-        center_image(self.icon_wrench_white)
-        # https://www.svgrepo.com/svg/152182/chemistry-lab-instrument
-        self.icon_vial_light_gray = resource.image("icon-vial-c0c0c0.png")
-        center_image(self.icon_vial_light_gray)
-        self.icon_vial_white = resource.image("icon-vial-ffffff.png")
-        center_image(self.icon_vial_white)
-
-        # resources
-        # https://www.svgrepo.com/svg/390846/lightning-bolt-weather-storm-energy-electricity
-        self.icon_bolt_light_gray = resource.image("icon-lightning-bolt-c0c0c0.png")
-        center_image(self.icon_bolt_light_gray)
-        # https://www.svgrepo.com/svg/499449/water-drop
-        self.icon_water_light_gray = resource.image("icon-water-c0c0c0.png")
-        center_image(self.icon_water_light_gray)
-        self.icon_water_green = resource.image("icon-water-68B842.png")
-        center_image(self.icon_water_green)
-        # https://www.svgrepo.com/svg/244783/apple
-        self.icon_apple_light_gray = resource.image("icon-apple-c0c0c0.png")
-        center_image(self.icon_apple_light_gray)
-        # https://thenounproject.com/icon/iron-ingot-52023/
-        self.icon_ingot_light_gray = resource.image("icon-ingot-c0c0c0.png")
-        center_image(self.icon_ingot_light_gray)
-        # https://www.svgrepo.com/svg/321290/rock
-        self.icon_ore_light_gray = resource.image("icon-ore-c0c0c0.png")
-        center_image(self.icon_ore_light_gray)
-
-        # items
-        # https://www.svgrepo.com/svg/161941/spaceship
-        self.icon_spaceship_slanted_light_gray = resource.image("icon-spaceship-slanted-c0c0c0.png")
-        center_image(self.icon_spaceship_slanted_light_gray)
-        self.icon_spaceship_slanted_white = resource.image("icon-spaceship-slanted-ffffff.png")
-        center_image(self.icon_spaceship_slanted_white)
-        # https://www.svgrepo.com/svg/445050/container-optimize-solid
-        self.icon_crate_light_gray = resource.image("icon-crate-c0c0c0.png")
-        center_image(self.icon_crate_light_gray)
-        # https://www.svgrepo.com/svg/244184/barrel
-        self.icon_barrel_light_gray = resource.image("icon-barrel-c0c0c0.png")
-        center_image(self.icon_barrel_light_gray)
-        # https://www.svgrepo.com/svg/122440/car-seat
-        self.icon_seat_light_gray = resource.image("icon-seat-c0c0c0.png")
-        center_image(self.icon_seat_light_gray)
-        self.icon_seat_white = resource.image("icon-seat-ffffff.png")
-        center_image(self.icon_seat_white)
-        # https://www.svgrepo.com/svg/436792/house-fill
-        self.icon_house_light_gray = resource.image("icon-house-c0c0c0.png")
-        center_image(self.icon_house_light_gray)
-        self.icon_house_white = resource.image("icon-house-ffffff.png")
-        center_image(self.icon_house_white)
-
-        # misc
-        # https://www.svgrepo.com/svg/521755/minus
-        self.icon_minus_white = resource.image("icon-minus-FFFFFF.png")
-        center_image(self.icon_minus_white)
-        # https://bdragon1727.itch.io/basic-pixel-health-bar-and-scroll-bar
-        self.icon_selector = resource.image("icon-selector.png")
-        center_image(self.icon_selector)
-        # https://www.svgrepo.com/svg/353023/chevron-thin-left
-        self.icon_left_chevron_white = resource.image("icon-chevron-left-ffffff.png")
-        center_image(self.icon_left_chevron_white)
-        self.icon_left_chevron_green = resource.image("icon-chevron-left-68B842.png")
-        center_image(self.icon_left_chevron_green)
-        # https://www.svgrepo.com/svg/353030/chevron-thin-right
-        self.icon_right_chevron_white = resource.image("icon-chevron-right-ffffff.png")
-        center_image(self.icon_right_chevron_white)
-        self.icon_right_chevron_green = resource.image("icon-chevron-right-68B842.png")
-        center_image(self.icon_right_chevron_green)
-        # https://www.svgrepo.com/svg/532098/clock
-        self.icon_clock_light_gray = resource.image("icon-clock-c0c0c0.png")
-        center_image(self.icon_clock_light_gray)
-        # self.icon_clock_white = resource.image("icon-clock-ffffff.png")
-        # center_image(self.icon_clock_white)
-
-        # buildings
-        self.icon_house_black = resource.image("icon-house-000000.png")
-        center_image(self.icon_house_black)
-        # https://www.svgrepo.com/svg/158880/solar-panels
-        self.icon_solar_panels_black = resource.image("icon-solar-panels-000000.png")
-        center_image(self.icon_solar_panels_black)
-        self.icon_solar_panels_white = resource.image("icon-solar-panels-ffffff.png")
-        center_image(self.icon_solar_panels_white)
-        self.icon_solar_panels_green = resource.image("icon-solar-panels-68B842.png")
-        center_image(self.icon_solar_panels_green)
-        self.icon_solar_panels_dark_gray = resource.image("icon-solar-panels-808080.png")
-        center_image(self.icon_solar_panels_dark_gray)
-        # https://www.svgrepo.com/svg/412370/drill
-        self.icon_drill_black = resource.image("icon-drill-000000.png")
-        center_image(self.icon_drill_black)
-        self.icon_drill_white = resource.image("icon-drill-ffffff.png")
-        center_image(self.icon_drill_white)
-        self.icon_drill_green = resource.image("icon-drill-68B842.png")
-        center_image(self.icon_drill_green)
-        self.icon_drill_dark_gray = resource.image("icon-drill-808080.png")
-        center_image(self.icon_drill_dark_gray)
-        self.icon_crate_black = resource.image("icon-crate-000000.png")
-        center_image(self.icon_crate_black)
-        self.icon_crate_white = resource.image("icon-crate-ffffff.png")
-        center_image(self.icon_crate_white)
-        self.icon_crate_green = resource.image("icon-crate-68B842.png")
-        center_image(self.icon_crate_green)
-        self.icon_crate_dark_gray = resource.image("icon-crate-808080.png")
-        center_image(self.icon_crate_dark_gray)
-        self.icon_barrel_black = resource.image("icon-barrel-000000.png")
-        center_image(self.icon_barrel_black)
-        self.icon_barrel_white = resource.image("icon-barrel-ffffff.png")
-        center_image(self.icon_barrel_white)
-        self.icon_barrel_green = resource.image("icon-barrel-68B842.png")
-        center_image(self.icon_barrel_green)
-        self.icon_barrel_dark_gray = resource.image("icon-barrel-808080.png")
-        center_image(self.icon_barrel_dark_gray)
-        # https://www.svgrepo.com/svg/385034/bubble-bubbles-washing-cleaning-soap
-        self.icon_bubbles_black = resource.image("icon-bubbles-000000.png")
-        center_image(self.icon_bubbles_black)
-        self.icon_bubbles_white = resource.image("icon-bubbles-ffffff.png")
-        center_image(self.icon_bubbles_white)
-        self.icon_bubbles_green = resource.image("icon-bubbles-68B842.png")
-        center_image(self.icon_bubbles_green)
-        self.icon_bubbles_dark_gray = resource.image("icon-bubbles-808080.png")
-        center_image(self.icon_bubbles_dark_gray)
-        # https://www.svgrepo.com/svg/112303/flame
-        self.icon_flame_black = resource.image("icon-flame-000000.png")
-        center_image(self.icon_flame_black)
-        self.icon_flame_white = resource.image("icon-flame-ffffff.png")
-        center_image(self.icon_flame_white)
-        self.icon_flame_green = resource.image("icon-flame-68B842.png")
-        center_image(self.icon_flame_green)
-        self.icon_flame_dark_gray = resource.image("icon-flame-808080.png")
-        center_image(self.icon_flame_dark_gray)
-        self.icon_spaceship_black = resource.image("icon-spaceship-000000.png")
-        center_image(self.icon_spaceship_black)
-        self.icon_spaceship_white = resource.image("icon-spaceship-ffffff.png")
-        center_image(self.icon_spaceship_white)
-        self.icon_spaceship_green = resource.image("icon-spaceship-68B842.png")
-        center_image(self.icon_spaceship_green)
-        self.icon_spaceship_dark_gray = resource.image("icon-spaceship-808080.png")
-        center_image(self.icon_spaceship_dark_gray)
-        # https://www.svgrepo.com/svg/513255/tree-decidious
-        self.icon_tree_black = resource.image("icon-tree-000000.png")
-        center_image(self.icon_tree_black)
-        self.icon_tree_white = resource.image("icon-tree-ffffff.png")
-        center_image(self.icon_tree_white)
-        self.icon_tree_green = resource.image("icon-tree-68B842.png")
-        center_image(self.icon_tree_green)
-        self.icon_tree_dark_gray = resource.image("icon-tree-808080.png")
-        center_image(self.icon_tree_dark_gray)
-        # https://www.svgrepo.com/svg/485635/book
-        self.icon_book_black = resource.image("icon-book-000000.png")
-        center_image(self.icon_book_black)
-        self.icon_book_white = resource.image("icon-book-ffffff.png")
-        center_image(self.icon_book_white)
-        self.icon_book_green = resource.image("icon-book-68B842.png")
-        center_image(self.icon_book_green)
-        self.icon_book_dark_gray = resource.image("icon-book-808080.png")
-        center_image(self.icon_book_dark_gray)
-        # https://www.svgrepo.com/svg/220523/factory
-        self.icon_factory_black = resource.image("icon-factory-000000.png")
-        center_image(self.icon_factory_black)
-        self.icon_factory_white = resource.image("icon-factory-ffffff.png")
-        center_image(self.icon_factory_white)
-        self.icon_factory_green = resource.image("icon-factory-68B842.png")
-        center_image(self.icon_factory_green)
-        self.icon_factory_dark_gray = resource.image("icon-factory-808080.png")
-        center_image(self.icon_factory_dark_gray)
@@ -1,4 +1,17 @@
-from typing import Any
+from typing import Any, Callable, Mapping, Optional
+import math
+import sys
+from pathlib import Path
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[2])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from lib.game_config import GameRules, LevelParameters
+
+
+# progress closer than this to a threshold counts as reaching it (Colony.advance jumps exactly to the thresholds)
+PROGRESS_EPSILON = 1e-9
 
 
 class Building:
@@ -16,7 +29,9 @@ class Building:
             raise TypeError("The Building class should not be instanciated directly")
         self.colony_data = colony_data
         self.game_config = game_config
-        self.parameters_per_level = game_config["buildings"][self.name]["parameters_per_level"]
+        # compiled economy parameters (see lib/game_config.py)
+        self.game_rules: GameRules = game_config["rules"]
+        self.parameters_per_level: Mapping[int, LevelParameters] = self.game_rules.buildings[self.name].parameters_per_level
         # building level
         # 0: not built
         # 1, 2, 3: current building level
@@ -35,14 +50,30 @@ class Building:
         # construction/upgrade timer
         self.is_constructing = True
         self.construction_workload_completed = 0
+        # called with the building whenever its level or its construction status changes
+        # (set by the colony to keep its power and storage aggregates up to date)
+        self.on_state_changed: Optional[Callable[["Building"], None]] = None
+        # called with the building whenever its production workers or its produced resource change
+        # (set by the colony to recompile its production registry)
+        self.on_production_changed: Optional[Callable[["Building"], None]] = None
         # flags
         # self.enabled = True
         # self.can_disable = True
 
     @property
-    def parameters(self) -> dict[str, Any]:
+    def parameters(self) -> LevelParameters:
         return self.parameters_per_level[self.level]
 
+    def state_changed(self):
+        # notify the owner that the level or the construction status of the building changed
+        if self.on_state_changed is not None:
+            self.on_state_changed(self)
+
+    def production_changed(self):
+        # notify the owner that the production workers or the produced resource of the building changed
+        if self.on_production_changed is not None:
+            self.on_production_changed(self)
+
     # @property
     # def can_construct(self):
     #     return False
@@ -54,8 +85,8 @@ class Building:
             can_upgrade = False
         else:
             can_upgrade = True
-            for resource_name in self.parameters["construction_costs"].keys():
-                if self.colony_data["resources"][resource_name] < self.parameters["construction_costs"][resource_name]:
+            for resource_name in self.parameters.construction_costs.keys():
+                if self.colony_data["resources"][resource_name] < self.parameters.construction_costs[resource_name]:
                     can_upgrade = False
                     break
         return can_upgrade
@@ -66,19 +97,21 @@ class Building:
         self.is_constructing = True
         self.construction_workload_completed = 0
         # remove every required construction resources from the colony resources
-        for resource_name in self.parameters["construction_costs"].keys():
-            self.colony_data["resources"][resource_name] -= self.parameters["construction_costs"][resource_name]
+        for resource_name in self.parameters.construction_costs.keys():
+            self.colony_data["resources"][resource_name] -= self.parameters.construction_costs[resource_name]
+        self.state_changed()
 
     def cancel_upgrade(self):
         # cancel the current upgrade
         # remove all workers at the construction jobs
         self.assign_worker(add=False, job_type="construction", worker_type="engineers", all=True)
         # refund the resources to the colony
-        for resource_name in self.parameters["construction_costs"].keys():
-            self.colony_data["resources_buffer"][resource_name] += self.parameters["construction_costs"][resource_name]
+        for resource_name in self.parameters.construction_costs.keys():
+            self.colony_data["resources_buffer"][resource_name] += self.parameters.construction_costs[resource_name]
         # reset the construction status
         self.is_constructing = False
         self.construction_workload_completed = 0
+        self.state_changed()
 
     def can_assign_worker(self, add: bool, job_type: str, worker_type: str) -> bool:
         assignment_possible = False
@@ -88,7 +121,7 @@ class Building:
         if add:
             if job_type == "construction" and (not self.is_constructing):
                 assignment_possible = False
-            elif (self.assigned_workers[job_type][worker_type] < self.parameters["jobs"][job_type][worker_type]) and \
+            elif (self.assigned_workers[job_type][worker_type] < self.parameters.jobs[job_type][worker_type]) and \
                 (self.colony_data["workers"][worker_type]["available"] > 0):
                 assignment_possible = True
         else:
@@ -106,7 +139,7 @@ class Building:
             if add:
                 if all:
                     # fill as many vacant jobs as possible
-                    available_jobs = self.parameters["jobs"][job_type][worker_type] - self.assigned_workers[job_type][worker_type]
+                    available_jobs = self.parameters.jobs[job_type][worker_type] - self.assigned_workers[job_type][worker_type]
                     workers_to_assign = min(available_jobs, self.colony_data["workers"][worker_type]["available"])
                     self.colony_data["workers"][worker_type]["available"] -= workers_to_assign
                     self.assigned_workers[job_type][worker_type] += workers_to_assign
@@ -126,6 +159,8 @@ class Building:
                     self.colony_data["workers"][worker_type]["available"] += 1
                     # remove a worker from the job
                     self.assigned_workers[job_type][worker_type] -= 1
+            if job_type == "production":
+                self.production_changed()
 
     def remove_all_workers(self):
         self.assign_worker(add=False, job_type="production", worker_type="engineers", all=True)
@@ -152,13 +187,51 @@ class Building:
         if self.is_constructing:
             self.cancel_upgrade()
 
+    @property
+    def production_workers(self) -> int:
+        return self.assigned_workers["production"]["engineers"] + self.assigned_workers["production"]["scientists"]
+
+    def progress_horizon(self) -> float:
+        # game time (seconds) until the next discrete event of the building, math.inf if nothing is in progress
+        # the events themselves are resolved by update(0)
+        construction_speed = self.assigned_workers["construction"]["engineers"]
+        if self.is_constructing and construction_speed > 0:
+            return max(0., (self.parameters.construction_workload - self.construction_workload_completed) / construction_speed)
+        return math.inf
+
+    def advance_progress(self, dt):
+        # advance the construction by dt seconds without resolving the events (see Colony.advance)
+        if self.is_constructing:
+            self.construction_workload_completed += self.assigned_workers["construction"]["engineers"] * dt
+            if self.parameters.construction_workload - self.construction_workload_completed < PROGRESS_EPSILON:
+                self.construction_workload_completed = self.parameters.construction_workload
+
+    def to_state(self) -> dict[str]:
+        # plain data describing the building, used by the saves
+        return {
+            "name": self.name,
+            "level": self.level,
+            "is_constructing": self.is_constructing,
+            "construction_workload_completed": self.construction_workload_completed,
+            "assigned_workers": {job_type: dict(workers) for job_type, workers in self.assigned_workers.items()}
+        }
+
+    def load_state(self, state: dict[str]):
+        # restore the building from the plain data returned by to_state
+        # (the colony workers are restored separately, the assigned workers are not taken from them)
+        self.level = state["level"]
+        self.is_constructing = state["is_constructing"]
+        self.construction_workload_completed = state["construction_workload_completed"]
+        for job_type, workers in state["assigned_workers"].items():
+            self.assigned_workers[job_type].update(workers)
+
     def update(self, dt):
         # update construction status
         if self.is_constructing:
             # every assigned worker at the "construction" job makes 1 construction workload per second
             self.construction_workload_completed += self.assigned_workers["construction"]["engineers"] * dt
             # check if construction is finished
-            if self.construction_workload_completed >= self.parameters["construction_workload"]:
+            if self.construction_workload_completed >= self.parameters.construction_workload:
                 # stop the construction
                 self.is_constructing = False
                 self.construction_workload_completed = 0
@@ -166,6 +239,7 @@ class Building:
                 self.level += 1
                 # free every worker at the construction jobs
                 self.assign_worker(add=False, job_type="construction", worker_type="engineers", all=True)
+                self.state_changed()
 
 
 class BuildingHeadQuarters(Building):
@@ -464,6 +538,22 @@ class BuildingDrillingStation(Building):
 
     def produce(self, resource_type: str):
         self.resource_produced = resource_type
+        self.production_changed()
+
+    def to_state(self) -> dict[str]:
+        state = super().to_state()
+        state["resource_produced"] = self.resource_produced
+        return state
+
+    def load_state(self, state: dict[str]):
+        super().load_state(state)
+        self.resource_produced = state["resource_produced"]
+
+    def production_rate(self) -> float:
+        # amount of resource_produced extracted per second
+        if (self.level > 0) and (self.resource_produced is not None):
+            return self.production_workers * self.parameters.production_speed * self.colony_data["production_factors"][self.resource_produced]
+        return 0.
 
     def update(self, dt):
         super().update(dt)
@@ -472,7 +562,7 @@ class BuildingDrillingStation(Building):
         if (self.level > 0) and (self.resource_produced is not None):
             self.colony_data["resources_buffer"][self.resource_produced] += dt \
                 * (self.assigned_workers["production"]["engineers"] + self.assigned_workers["production"]["scientists"]) \
-                * self.parameters["production_speed"] * self.colony_data["production_factors"][self.resource_produced]
+                * self.parameters.production_speed * self.colony_data["production_factors"][self.resource_produced]
 
 
 class BuildingWarehouse(Building):
@@ -734,6 +824,11 @@ class BuildingLiquidTank(Building):
 class BuildingElectrolysisStation(Building):
 
     name = "electrolysis_station"
+    # resources produced per unit of water consumed
+    water_products = {
+        "oxygen": 1/2,
+        "hydrogen": 1
+    }
     # parameters_per_level = {
     #     0: {
     #         "power": {
@@ -830,20 +925,25 @@ class BuildingElectrolysisStation(Building):
     #     }
     # }
 
+    def water_demand(self) -> float:
+        # water consumed per second when enough water is available
+        if self.level > 0:
+            return self.parameters.production_speed * self.production_workers
+        return 0.
+
     def update(self, dt):
         super().update(dt)
         # dump the produced resources into the colony resource buffer
         # only produce if at least level 1
         if self.level > 0:
             # consume water
-            water_required_from_storage = dt * self.parameters["production_speed"] \
+            water_required_from_storage = dt * self.parameters.production_speed \
                 * (self.assigned_workers["production"]["engineers"] + self.assigned_workers["production"]["scientists"])
             water_obtained = min(water_required_from_storage, self.colony_data["resources"]["water"])
             self.colony_data["resources"]["water"] -= water_obtained
-            # produce oxygen
-            self.colony_data["resources_buffer"]["oxygen"] += water_obtained * (1/2)
-            # produce hydrogen
-            self.colony_data["resources_buffer"]["hydrogen"] += water_obtained * 1
+            # produce oxygen and hydrogen
+            for resource, ratio in self.water_products.items():
+                self.colony_data["resources_buffer"][resource] += water_obtained * ratio
 
 
 class BuildingFurnace(Building):
@@ -965,6 +1065,19 @@ class BuildingFurnace(Building):
             self.ore_consumed = False
             self.resource_produced = resource_type
 
+    def to_state(self) -> dict[str]:
+        state = super().to_state()
+        state["resource_produced"] = self.resource_produced
+        state["smelting_completed_percent"] = self.smelting_completed_percent
+        state["ore_consumed"] = self.ore_consumed
+        return state
+
+    def load_state(self, state: dict[str]):
+        super().load_state(state)
+        self.resource_produced = state["resource_produced"]
+        self.smelting_completed_percent = state["smelting_completed_percent"]
+        self.ore_consumed = state["ore_consumed"]
+
     # def use_power_switch(self):
     #     # reset the smelting cycle if the building is turned off
     #     if self.enabled:
@@ -976,13 +1089,28 @@ class BuildingFurnace(Building):
         ore_to_consume = self.resource_produced + "_ore"
         # if the colony has enough ore to start a cycle ...
         # if self.colony_data["resources"][ore_to_consume] >= 2 * self.parameters["production_per_cycle"]:
-        ore_needed = self.game_config["ore_per_ingot"][self.resource_produced]
+        ore_needed = self.game_rules.ore_per_ingot[self.resource_produced]
         if self.colony_data["resources"][ore_to_consume] >= ore_needed:
             # consume the ore
             # self.colony_data["resources"][ore_to_consume] -= 2 * self.parameters["production_per_cycle"]
             self.colony_data["resources"][ore_to_consume] -= ore_needed
             self.ore_consumed = True
 
+    def progress_horizon(self) -> float:
+        # the end of the smelting cycle is also an event
+        horizon = super().progress_horizon()
+        smelting_speed = self.parameters.production_speed * self.production_workers
+        if (self.level > 0) and (self.resource_produced is not None) and self.ore_consumed and smelting_speed > 0:
+            horizon = min(horizon, max(0., (100 - self.smelting_completed_percent) / smelting_speed))
+        return horizon
+
+    def advance_progress(self, dt):
+        super().advance_progress(dt)
+        if (self.level > 0) and (self.resource_produced is not None) and self.ore_consumed:
+            self.smelting_completed_percent += dt * self.parameters.production_speed * self.production_workers
+            if 100 - self.smelting_completed_percent < PROGRESS_EPSILON:
+                self.smelting_completed_percent = 100
+
     def update(self, dt):
         super().update(dt)
         # dump the produced resources into the colony resource buffer
@@ -992,7 +1120,7 @@ class BuildingFurnace(Building):
                 # try to consume ore for the next production cycle
                 self._try_start_cycle()
             if self.ore_consumed:
-                self.smelting_completed_percent += dt * self.parameters["production_speed"] \
+                self.smelting_completed_percent += dt * self.parameters.production_speed \
                     * (self.assigned_workers["production"]["engineers"] + self.assigned_workers["production"]["scientists"])
                 # if the cycle is completed ...
                 if self.smelting_completed_percent >= 100:
@@ -1059,6 +1187,11 @@ class BuildingSpaceport(Building):
 class BuildingGreenhouse(Building):
 
     name = "greenhouse"
+    # resources produced per unit of water consumed
+    water_products = {
+        "food": 5,
+        "oxygen": 1
+    }
     # parameters_per_level = {
     #     0: {
     #         "power": {
@@ -1155,20 +1288,25 @@ class BuildingGreenhouse(Building):
     #     }
     # }
 
+    def water_demand(self) -> float:
+        # water consumed per second when enough water is available
+        if self.level > 0:
+            return self.parameters.production_speed * self.production_workers
+        return 0.
+
     def update(self, dt):
         super().update(dt)
         # dump the produced resources into the colony resource buffer
         # only produce if at least level 1
         if self.level > 0:
             # consume water
-            water_required_from_storage = dt * self.parameters["production_speed"] \
+            water_required_from_storage = dt * self.parameters.production_speed \
                 * (self.assigned_workers["production"]["engineers"] + self.assigned_workers["production"]["scientists"])
             water_obtained = min(water_required_from_storage, self.colony_data["resources"]["water"])
             self.colony_data["resources"]["water"] -= water_obtained
-            # produce food
-            self.colony_data["resources_buffer"]["food"] += water_obtained * 5
-            # produce oxygen
-            self.colony_data["resources_buffer"]["oxygen"] += water_obtained * 1
+            # produce food and oxygen
+            for resource, ratio in self.water_products.items():
+                self.colony_data["resources_buffer"][resource] += water_obtained * ratio
 
 
 class BuildingSchool(Building):
@@ -1312,6 +1450,17 @@ class BuildingSchool(Building):
             # clear the queue (everything but the current training worker)
             self.training_queue = [self.training_queue[0]]
 
+    def to_state(self) -> dict[str]:
+        state = super().to_state()
+        state["training_queue"] = list(self.training_queue)
+        state["training_workload_completed"] = self.training_workload_completed
+        return state
+
+    def load_state(self, state: dict[str]):
+        super().load_state(state)
+        self.training_queue = list(state["training_queue"])
+        self.training_workload_completed = state["training_workload_completed"]
+
     # def use_power_switch(self):
     #     # clear the queue and reset the training cycle if the building is turned off
     #     if self.enabled:
@@ -1321,15 +1470,32 @@ class BuildingSchool(Building):
     #             self.can_cancel_training()
     #     super().use_power_switch()
 
+    def progress_horizon(self) -> float:
+        # the end of the current training is also an event
+        horizon = super().progress_horizon()
+        training_speed = self.parameters.production_speed * self.production_workers
+        if (self.level > 0) and (len(self.training_queue) > 0) and training_speed > 0:
+            training_workload = self.game_rules.workers_training_workload[self.training_queue[0]]
+            horizon = min(horizon, max(0., (training_workload - self.training_workload_completed) / training_speed))
+        return horizon
+
+    def advance_progress(self, dt):
+        super().advance_progress(dt)
+        if (self.level > 0) and (len(self.training_queue) > 0):
+            self.training_workload_completed += dt * self.parameters.production_speed * self.production_workers
+            training_workload = self.game_rules.workers_training_workload[self.training_queue[0]]
+            if training_workload - self.training_workload_completed < PROGRESS_EPSILON:
+                self.training_workload_completed = training_workload
+
     def update(self, dt):
         super().update(dt)
         # only train if at least level 1 and the training queue is not empty
         if (self.level > 0) and (len(self.training_queue) > 0):
-            self.training_workload_completed += dt * self.parameters["production_speed"] \
+            self.training_workload_completed += dt * self.parameters.production_speed \
                 * (self.assigned_workers["production"]["engineers"] + self.assigned_workers["production"]["scientists"])
             # if the cycle is completed ...
             # if self.training_workload_completed >= self.items_workload[self.training_queue[0]]:
-            if self.training_workload_completed >= self.game_config["workers_training_workload"][self.training_queue[0]]:
+            if self.training_workload_completed >= self.game_rules.workers_training_workload[self.training_queue[0]]:
                 # add the worker to the colony
                 if self.training_queue[0] == "pilots":
                     self.colony_data["workers"]["pilots"] += 1
@@ -1520,7 +1686,7 @@ class BuildingFactory(Building):
             # check if the colony has enough resources to make the item
             can_make_item = True
             # item_resources_required = self.items_price[item_name]["resources"]
-            item_resources_required = self.game_config["items_price"][item_name]["resources"]
+            item_resources_required = self.game_rules.items_price[item_name].resources
             for resource_name in item_resources_required.keys():
                 if self.colony_data["resources"][resource_name] < item_resources_required[resource_name]:
                     can_make_item = False
@@ -1531,7 +1697,7 @@ class BuildingFactory(Building):
         if self.can_make_item(item_name):
             # pay the item price
             # item_resources_required = self.items_price[item_name]["resources"]
-            item_resources_required = self.game_config["items_price"][item_name]["resources"]
+            item_resources_required = self.game_rules.items_price[item_name].resources
             for resource_name in item_resources_required.keys():
                 self.colony_data["resources"][resource_name] -= item_resources_required[resource_name]
             # add the item to the list
@@ -1545,7 +1711,7 @@ class BuildingFactory(Building):
         if self.can_cancel_item():
             # give the resources back to the colony
             # item_resources_required = self.items_price[self.items_queue[0]]["resources"]
-            item_resources_required = self.game_config["items_price"][self.items_queue[0]]["resources"]
+            item_resources_required = self.game_rules.items_price[self.items_queue[0]].resources
             for resource_name in item_resources_required.keys():
                 self.colony_data["resources_buffer"][resource_name] += item_resources_required[resource_name]
             # cancel the current item
@@ -1563,7 +1729,7 @@ class BuildingFactory(Building):
             item_deleted = self.items_queue.pop(-1)
             # give the resources of the item deleted back to the colony
             # item_resources_required = self.items_price[item_deleted]["resources"]
-            item_resources_required = self.game_config["items_price"][item_deleted]["resources"]
+            item_resources_required = self.game_rules.items_price[item_deleted].resources
             for resource_name in item_resources_required.keys():
                 self.colony_data["resources_buffer"][resource_name] += item_resources_required[resource_name]
 
@@ -1576,21 +1742,49 @@ class BuildingFactory(Building):
     #             self.cancel_item()
     #     super().use_power_switch()
 
+    def to_state(self) -> dict[str]:
+        state = super().to_state()
+        state["items_queue"] = list(self.items_queue)
+        state["item_workload_completed"] = self.item_workload_completed
+        return state
+
+    def load_state(self, state: dict[str]):
+        super().load_state(state)
+        self.items_queue = list(state["items_queue"])
+        self.item_workload_completed = state["item_workload_completed"]
+
     def on_destruction(self):
         super().on_destruction()
         # cancel every queued item
         while self.can_cancel_item():
             self.cancel_item()
 
+    def progress_horizon(self) -> float:
+        # the end of the current item is also an event
+        horizon = super().progress_horizon()
+        manufacturing_speed = self.parameters.production_speed * self.production_workers
+        if (self.level > 0) and (len(self.items_queue) > 0) and manufacturing_speed > 0:
+            item_workload = self.game_rules.items_price[self.items_queue[0]].workload
+            horizon = min(horizon, max(0., (item_workload - self.item_workload_completed) / manufacturing_speed))
+        return horizon
+
+    def advance_progress(self, dt):
+        super().advance_progress(dt)
+        if (self.level > 0) and (len(self.items_queue) > 0):
+            self.item_workload_completed += dt * self.parameters.production_speed * self.production_workers
+            item_workload = self.game_rules.items_price[self.items_queue[0]].workload
+            if item_workload - self.item_workload_completed < PROGRESS_EPSILON:
+                self.item_workload_completed = item_workload
+
     def update(self, dt):
         super().update(dt)
         # only make item if at least level 1 and the training queue is not empty
         if (self.level > 0) and (len(self.items_queue) > 0):
-            self.item_workload_completed += dt * self.parameters["production_speed"] \
+            self.item_workload_completed += dt * self.parameters.production_speed \
                 * (self.assigned_workers["production"]["engineers"] + self.assigned_workers["production"]["scientists"])
             # if the cycle is completed ...
             # if self.item_workload_completed >= self.items_price[self.items_queue[0]]["workload"]:
-            if self.item_workload_completed >= self.game_config["items_price"][self.items_queue[0]]["workload"]:
+            if self.item_workload_completed >= self.game_rules.items_price[self.items_queue[0]].workload:
                 # add the item to the colony
                 self.colony_data["items"][self.items_queue[0]] += 1
                 # remove the first element from the queue and reset the cycle
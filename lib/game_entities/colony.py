@@ -1,7 +1,12 @@
-from typing import Optional
+from typing import Any, Callable, Optional, Mapping
+from types import MappingProxyType
+from time import perf_counter
+import math
 import sys
 from pathlib import Path
 
+import numpy as np
+
 ROOT_DIR_PATH = str(Path(__file__).resolve().parents[2])
 if ROOT_DIR_PATH not in sys.path:
     sys.path.insert(0, ROOT_DIR_PATH)
@@ -9,6 +14,29 @@ if ROOT_DIR_PATH not in sys.path:
 from lib.game_entities.building import (Building, BuildingHeadQuarters, BuildingSolarPanels, BuildingDrillingStation,
     BuildingWarehouse, BuildingLiquidTank, BuildingElectrolysisStation, BuildingFurnace, BuildingSpaceport,
     BuildingGreenhouse, BuildingSchool, BuildingFactory)
+from lib.game_config import GameRules
+from lib.game_entities.resource_ledger import ResourceLedger, RESOURCE_INDEX, resource_vector
+from lib.game_entities.production_registry import ProductionRegistry
+
+
+# shortest jump of Colony.advance, guarantees that the simulation always moves forward
+MIN_ADVANCE_STEP = 1e-6
+# below this amount, the water storage counts as empty
+WATER_EPSILON = 1e-9
+
+
+class ObservedDict(dict):
+    "dictionary that calls on_change whenever one of its values is modified"
+
+    def __init__(self, content: dict[str], on_change: Callable[[], None]):
+        super().__init__(content)
+        self.on_change = on_change
+
+    def __setitem__(self, key: str, value: Any):
+        # writing the same value again is not a change
+        if (key not in self) or (dict.__getitem__(self, key) != value):
+            super().__setitem__(key, value)
+            self.on_change()
 
 
 class Colony:
@@ -30,43 +58,53 @@ class Colony:
     # def __init__(self, production_factors = {}, starting_colony: bool = False):
     def __init__(self, game_config: dict[str], name: str):
         self.game_config = game_config
+        # compiled economy parameters (see lib/game_config.py)
+        self.game_rules: GameRules = game_config["rules"]
+        self.name = name
         # buildings (matrix of Building objects, 7x7)
         self.building_grid: list[list[Optional[Building]]] = [[None for column_index in range(7)] for line_index in range(7)]
         # self.selected_building_tile_coords = (x, y) = (column index, line index)
         self.selected_building_tile_coords: Optional[tuple[int, int]] = None
+        # power and storage aggregates, updated incrementally whenever a building is added, removed, upgraded,
+        # or starts / finishes / cancels a construction
+        self._power = {
+            "consumed": 0,
+            "produced": 0
+        }
+        self._max_storage = {
+            "food": 0,
+            "water": 0,
+            "oxygen": 0,
+            "hydrogen": 0,
+            "iron_ore": 0,
+            "iron": 0,
+            "aluminium_ore": 0,
+            "aluminium": 0,
+            "copper_ore": 0,
+            "copper": 0,
+            "titanium_ore": 0,
+            "titanium": 0
+        }
+        # read-only views given to the callers
+        self._power_view = MappingProxyType(self._power)
+        self._max_storage_view = MappingProxyType(self._max_storage)
+        # (power consumed, power produced, storage) of every building currently counted in the aggregates
+        self._buildings_contributions: dict[Building, tuple[int, int, Optional[dict[str, int]]]] = {}
+        # incremented every time a displayed value changes (resources, workers, items, power or storage),
+        # lets the UI skip its refresh when nothing changed since the last frame
+        self.data_version = 0
+        # time (seconds) spent in update per building type (and in the production registry), None when it is not measured
+        self.update_timings: Optional[dict[str, float]] = None
+        # debug mode: compare the aggregates with a full scan of the building grid on every read
+        self.check_aggregates: bool = self.game_config.get("debug", {}).get("check_colony_aggregates", False)
         # colony data
         self.data = {}
-        # resources
-        self.data["resources"] = {
-            # "power": 0,
-            "food": 0.,
-            "water": 0.,
-            "oxygen": 0.,
-            "hydrogen": 0.,
-            "iron_ore": 0.,
-            "iron": 0.,
-            "aluminium_ore": 0.,
-            "aluminium": 0.,
-            "copper_ore": 0.,
-            "copper": 0.,
-            "titanium_ore": 0.,
-            "titanium": 0.
-        }
+        # resources, stored in arrays with a fixed resource index (see resource_ledger.py)
+        self.resource_ledger = ResourceLedger(on_change=self._on_data_changed)
+        # dict-compatible views on the ledger, for the buildings and the UI
+        self.data["resources"] = self.resource_ledger.amounts_view
         # resource buffer for the buildings production
-        self.data["resources_buffer"] = {
-            "food": 0.,
-            "water": 0.,
-            "oxygen": 0.,
-            "hydrogen": 0.,
-            "iron_ore": 0.,
-            "iron": 0.,
-            "aluminium_ore": 0.,
-            "aluminium": 0.,
-            "copper_ore": 0.,
-            "copper": 0.,
-            "titanium_ore": 0.,
-            "titanium": 0.
-        }
+        self.data["resources_buffer"] = self.resource_ledger.buffer_view
         # production factors
         self.data["production_factors"] = {
             "water": 1.,
@@ -76,6 +114,10 @@ class Colony:
             "titanium_ore": 1.
         }
         self.data["production_factors"].update(self.game_config["colonies"][name]["production_factors"])
+        # optional compiled copy of the producers, updated in one vectorized pass per tick
+        self.production_registry: Optional[ProductionRegistry] = None
+        if self.game_config["simulation"]["batched_production"]:
+            self.production_registry = ProductionRegistry(self.resource_ledger, self.data["production_factors"])
         # workers
         self.data["workers"] = {
             "engineers": {
@@ -148,9 +190,10 @@ class Colony:
             # self.building_grid[1][2].level = 1
             # self.building_grid[1][2].is_constructing = False
             for building_dict in self.game_config["starting_assets"]["buildings"]:
-                self.building_grid[building_dict["coords"][1]][building_dict["coords"][0]] = self.building_types_dict[building_dict["name"]](self.data, self.game_config)
-                self.building_grid[building_dict["coords"][1]][building_dict["coords"][0]].level = 1
-                self.building_grid[building_dict["coords"][1]][building_dict["coords"][0]].is_constructing = False
+                building = self.building_types_dict[building_dict["name"]](self.data, self.game_config)
+                building.level = 1
+                building.is_constructing = False
+                self.set_building(tuple(building_dict["coords"]), building)
             # add people
             # self.data["workers"]["engineers"]["available"] = self.data["workers"]["engineers"]["total"] = 20
             # self.data["workers"]["scientists"]["available"] = self.data["workers"]["scientists"]["total"] = 20
@@ -161,9 +204,74 @@ class Colony:
             ...
             # add items
             ...
+        # watch the displayed colony data
+        self.data["workers"] = ObservedDict({
+            key: ObservedDict(value, self._on_data_changed) if isinstance(value, dict) else value
+            for key, value in self.data["workers"].items()
+        }, self._on_data_changed)
+        self.data["items"] = ObservedDict(self.data["items"], self._on_data_changed)
 
-    @property
-    def power(self) -> dict[str, int]:
+    def _on_data_changed(self):
+        self.data_version += 1
+
+    @staticmethod
+    def _building_contribution(building: Building) -> tuple[int, int, Optional[dict[str, int]]]:
+        # power consumed, power produced and storage space of a building
+        # if the building is in construction, it consumes the power of its next level
+        if building.is_constructing:
+            building_power_consumed = building.parameters_per_level[building.level + 1].power.consumed
+        else:
+            building_power_consumed = building.parameters.power.consumed
+        return building_power_consumed, building.parameters.power.produced, building.parameters.storage
+
+    def _add_building_contribution(self, building: Building):
+        self.data_version += 1
+        power_consumed, power_produced, storage = self._buildings_contributions[building] = self._building_contribution(building)
+        self._power["consumed"] += power_consumed
+        self._power["produced"] += power_produced
+        if storage is not None:
+            for resource in storage.keys():
+                self._max_storage[resource] += storage[resource]
+                self.resource_ledger.max_storage[RESOURCE_INDEX[resource]] += storage[resource]
+
+    def _remove_building_contribution(self, building: Building):
+        self.data_version += 1
+        power_consumed, power_produced, storage = self._buildings_contributions.pop(building)
+        self._power["consumed"] -= power_consumed
+        self._power["produced"] -= power_produced
+        if storage is not None:
+            for resource in storage.keys():
+                self._max_storage[resource] -= storage[resource]
+                self.resource_ledger.max_storage[RESOURCE_INDEX[resource]] -= storage[resource]
+
+    def _on_building_state_changed(self, building: Building):
+        # the level or the construction status of the building changed, recount it
+        self._remove_building_contribution(building)
+        self._add_building_contribution(building)
+        self._on_building_production_changed(building)
+
+    def _on_building_production_changed(self, building: Building):
+        if (self.production_registry is not None) and (building.name in ProductionRegistry.building_names):
+            self.production_registry.dirty = True
+
+    def set_building(self, coords: tuple[int, int], building: Optional[Building]):
+        # place a building on the tile at coords = (column index, line index), or clear the tile if building is None
+        column_index, line_index = coords
+        previous_building = self.building_grid[line_index][column_index]
+        if previous_building is not None:
+            self._remove_building_contribution(previous_building)
+            self._on_building_production_changed(previous_building)
+            previous_building.on_state_changed = None
+            previous_building.on_production_changed = None
+        self.building_grid[line_index][column_index] = building
+        if building is not None:
+            self._add_building_contribution(building)
+            self._on_building_production_changed(building)
+            building.on_state_changed = self._on_building_state_changed
+            building.on_production_changed = self._on_building_production_changed
+
+    def _scan_power(self) -> dict[str, int]:
+        # full scan of the building grid, only used to check the aggregates
         power = {
             "consumed": 0,
             "produced": 0
@@ -172,48 +280,56 @@ class Colony:
             for column_index in range(7):
                 building = self.building_grid[line_index][column_index]
                 if building is not None:
-                    # if the building is in construction, it consumes the power of its next level
-                    if building.is_constructing:
-                        building_power_consumed = building.parameters_per_level[building.level + 1]["power"]["consumed"]
-                    else:
-                        building_power_consumed = building.parameters["power"]["consumed"]
+                    building_power_consumed, building_power_produced, _ = self._building_contribution(building)
                     power["consumed"] += building_power_consumed
-                    power["produced"] += building.parameters["power"]["produced"]
+                    power["produced"] += building_power_produced
         return power
 
-    @property
-    def max_storage(self) -> dict[str, int]:
-        max_storage = {
-            "food": 0,
-            "water": 0,
-            "oxygen": 0,
-            "hydrogen": 0,
-            "iron_ore": 0,
-            "iron": 0,
-            "aluminium_ore": 0,
-            "aluminium": 0,
-            "copper_ore": 0,
-            "copper": 0,
-            "titanium_ore": 0,
-            "titanium": 0
-        }
+    def _scan_max_storage(self) -> dict[str, int]:
+        # full scan of the building grid, only used to check the aggregates
+        max_storage = dict.fromkeys(self._max_storage.keys(), 0)
         for line_index in range(7):
             for column_index in range(7):
                 building = self.building_grid[line_index][column_index]
                 if building is not None:
-                    building_storage = building.parameters["storage"]
+                    building_storage = building.parameters.storage
                     if building_storage is not None:
                         for resource in building_storage.keys():
                             max_storage[resource] += building_storage[resource]
         return max_storage
 
+    def check_aggregates_consistency(self):
+        # raise an error if the aggregates differ from a full scan of the building grid
+        scanned_power = self._scan_power()
+        if scanned_power != self._power:
+            raise RuntimeError(f"colony power aggregate is out of sync: cached {self._power}, scanned {scanned_power}")
+        scanned_max_storage = self._scan_max_storage()
+        if scanned_max_storage != self._max_storage:
+            raise RuntimeError(f"colony storage aggregate is out of sync: cached {self._max_storage}, scanned {scanned_max_storage}")
+        if not np.array_equal(self.resource_ledger.max_storage, resource_vector(scanned_max_storage)):
+            raise RuntimeError(f"colony resource ledger storage is out of sync: {self.resource_ledger.max_storage}, scanned {scanned_max_storage}")
+
+    @property
+    def power(self) -> Mapping[str, int]:
+        # read-only view on the power aggregate, always up to date
+        if self.check_aggregates:
+            self.check_aggregates_consistency()
+        return self._power_view
+
+    @property
+    def max_storage(self) -> Mapping[str, int]:
+        # read-only view on the storage aggregate, always up to date
+        if self.check_aggregates:
+            self.check_aggregates_consistency()
+        return self._max_storage_view
+
     @property
     def selected_building(self) -> Optional[Building]:
         return self.building_grid[self.selected_building_tile_coords[1]][self.selected_building_tile_coords[0]]
 
     @selected_building.setter
     def selected_building(self, building: Optional[Building]):
-        self.building_grid[self.selected_building_tile_coords[1]][self.selected_building_tile_coords[0]] = building
+        self.set_building(self.selected_building_tile_coords, building)
 
     def can_add_building(self, building_name: str) -> bool:
         # checks whether the colony has enough resources and power to add the building
@@ -221,17 +337,15 @@ class Colony:
         # check available power
         power = self.power
         available_power = power["produced"] - power["consumed"]
-        # if available_power < self.building_types_dict[building_name].parameters_per_level[1]["power"]["consumed"]:
-        if available_power < self.game_config["buildings"][building_name]["parameters_per_level"][1]["power"]["consumed"]:
+        # if available_power < self.building_types_dict[building_name].parameters_per_level[1].power.consumed:
+        if available_power < self.game_rules.buildings[building_name].parameters_per_level[1].power.consumed:
             can_add_building = False
         # check available resources
         else:
-            # construction_costs = self.building_types_dict[building_name].parameters_per_level[0]["construction_costs"]
-            construction_costs = self.game_config["buildings"][building_name]["parameters_per_level"][0]["construction_costs"]
-            for resource_name in construction_costs.keys():
-                if self.data["resources"][resource_name] < construction_costs[resource_name]:
-                    can_add_building = False
-                    break
+            # construction_costs = self.building_types_dict[building_name].parameters_per_level[0].construction_costs
+            construction_costs = self.game_rules.buildings[building_name].parameters_per_level[0].construction_costs
+            if not self.resource_ledger.can_afford(construction_costs):
+                can_add_building = False
         return can_add_building
 
     def add_building(self, building_name: str):
@@ -239,9 +353,7 @@ class Colony:
             # add the building to the colony
             self.selected_building = self.building_types_dict[building_name](self.data, self.game_config)
             # pay the resources for the building
-            construction_costs = self.selected_building.parameters["construction_costs"]
-            for resource_name in construction_costs.keys():
-                self.data["resources"][resource_name] -= construction_costs[resource_name]
+            self.resource_ledger.consume(self.selected_building.parameters.construction_costs)
 
     def can_upgrade_building(self) -> bool:
         # checks whether the colony has enough resources and power to upgrade the building
@@ -255,7 +367,7 @@ class Colony:
             # check available power
             power = self.power
             power_available = power["produced"] - power["consumed"]
-            power_required = building.parameters_per_level[building.level + 1]["power"]["consumed"] - building.parameters["power"]["consumed"]
+            power_required = building.parameters_per_level[building.level + 1].power.consumed - building.parameters.power.consumed
             if power_available < power_required:
                 can_upgrade_building = False
         return can_upgrade_building
@@ -276,9 +388,9 @@ class Colony:
         power_available = power["produced"] - power["consumed"]
         building = self.selected_building
         if building.is_constructing:
-            power_produced = building.parameters["power"]["produced"] - building.parameters_per_level[building.level + 1]["power"]["consumed"]
+            power_produced = building.parameters.power.produced - building.parameters_per_level[building.level + 1].power.consumed
         else:
-            power_produced = building.parameters["power"]["produced"] - building.parameters["power"]["consumed"]
+            power_produced = building.parameters.power.produced - building.parameters.power.consumed
         if power_available - power_produced < 0:
             can_destroy_building = False
         # it also cannot be destroyed if it is the headquarters
@@ -291,6 +403,51 @@ class Colony:
             # remove the building from the building grid
             self.selected_building = None
 
+    def to_state(self) -> dict[str]:
+        # plain data describing the colony, used by the saves
+        return {
+            "name": self.name,
+            "resources": self.resource_ledger.amounts.tolist(),
+            "resources_buffer": self.resource_ledger.buffer.tolist(),
+            "workers": {
+                "engineers": dict(self.data["workers"]["engineers"]),
+                "scientists": dict(self.data["workers"]["scientists"]),
+                "pilots": self.data["workers"]["pilots"]
+            },
+            "items": dict(self.data["items"]),
+            "selected_building_tile_coords": self.selected_building_tile_coords,
+            "buildings": [
+                {"coords": (column_index, line_index), **building.to_state()}
+                for line_index, line in enumerate(self.building_grid)
+                for column_index, building in enumerate(line)
+                if building is not None
+            ]
+        }
+
+    def load_state(self, state: dict[str]):
+        # restore the colony from the plain data returned by to_state
+        # buildings
+        for line_index in range(7):
+            for column_index in range(7):
+                if self.building_grid[line_index][column_index] is not None:
+                    self.set_building((column_index, line_index), None)
+        for building_state in state["buildings"]:
+            building = self.building_types_dict[building_state["name"]](self.data, self.game_config)
+            building.load_state(building_state)
+            self.set_building(tuple(building_state["coords"]), building)
+        self.selected_building_tile_coords = None if state["selected_building_tile_coords"] is None else tuple(state["selected_building_tile_coords"])
+        # resources
+        self.resource_ledger.amounts[:] = state["resources"]
+        self.resource_ledger.buffer[:] = state["resources_buffer"]
+        # workers and items
+        for worker_type in ("engineers", "scientists"):
+            self.data["workers"][worker_type]["available"] = state["workers"][worker_type]["available"]
+            self.data["workers"][worker_type]["total"] = state["workers"][worker_type]["total"]
+        self.data["workers"]["pilots"] = state["workers"]["pilots"]
+        for item_name, item_count in state["items"].items():
+            self.data["items"][item_name] = item_count
+        self._on_data_changed()
+
     def land_ship(self):
         # place the landing ship and its contents inside the colony
         pass
@@ -304,22 +461,86 @@ class Colony:
     # def train_worker(self):
     #     pass
 
+    def advance(self, seconds: float):
+        # fast-forward the colony by seconds of game time
+        # between two discrete events (end of a construction, a smelting cycle, a training or an item, a furnace
+        # starting a smelting cycle, the water storage running out) every production rate is constant,
+        # so the colony jumps from one event to the next instead of being updated at a fixed rate
+        remaining_time = seconds
+        while True:
+            # resolve the discrete events and empty the resources buffer
+            self.update(0)
+            if remaining_time <= 0:
+                break
+            buildings = [building for line in self.building_grid for building in line if building is not None]
+            resources = self.data["resources"]
+            max_storage = self.max_storage
+            # production rates (per second)
+            rates = dict.fromkeys(resources.keys(), 0.)
+            for building in buildings:
+                if building.name == "drilling_station" and building.resource_produced is not None:
+                    rates[building.resource_produced] += building.production_rate()
+            # water consumers get all the water they need while there is water in storage,
+            # otherwise they share the water extracted, in the order of the building grid
+            water_supply = math.inf if resources["water"] > WATER_EPSILON else rates["water"]
+            for building in buildings:
+                if building.name in ("electrolysis_station", "greenhouse"):
+                    water_obtained = min(building.water_demand(), water_supply)
+                    water_supply -= water_obtained
+                    rates["water"] -= water_obtained
+                    for resource, ratio in building.water_products.items():
+                        rates[resource] += water_obtained * ratio
+            # next event
+            horizon = remaining_time
+            for building in buildings:
+                horizon = min(horizon, building.progress_horizon())
+                # furnace waiting for enough ore to start a smelting cycle
+                if (building.name == "furnace") and (building.level > 0) and (building.resource_produced is not None) and (not building.ore_consumed):
+                    ore = building.resource_produced + "_ore"
+                    ore_needed = self.game_rules.ore_per_ingot[building.resource_produced]
+                    if (rates[ore] > 0) and (ore_needed <= max_storage[ore]):
+                        horizon = min(horizon, (ore_needed - resources[ore]) / rates[ore])
+            # water storage running out
+            if rates["water"] < 0:
+                horizon = min(horizon, resources["water"] / -rates["water"])
+            horizon = min(remaining_time, max(horizon, MIN_ADVANCE_STEP))
+            # move every continuous quantity to the horizon
+            for building in buildings:
+                building.advance_progress(horizon)
+            self.resource_ledger.integrate(resource_vector(rates), horizon)
+            remaining_time -= horizon
+
     def update(self, dt):
         # update the resources based on the workers and the buildings
         # update manufacture time (factories, schools, furnaces)
+        registry = self.production_registry
+        timings = self.update_timings
         for line_index in range(7):
             for column_index in range(7):
                 building = self.building_grid[line_index][column_index]
                 if building is not None:
-                    building.update(dt)
+                    if timings is not None:
+                        start_time = perf_counter()
+                    if (registry is not None) and (building.name in registry.building_names):
+                        # only the construction, the production is updated by the registry
+                        Building.update(building, dt)
+                    else:
+                        building.update(dt)
+                    if timings is not None:
+                        timings[building.name] = timings.get(building.name, 0.) + perf_counter() - start_time
+        if registry is not None:
+            if timings is not None:
+                start_time = perf_counter()
+            # recompile the producers if they changed (including the constructions completed during this tick)
+            if registry.dirty:
+                registry.compile([building for line in self.building_grid for building in line if building is not None])
+            registry.update(dt)
+            if timings is not None:
+                timings["production_registry"] = timings.get("production_registry", 0.) + perf_counter() - start_time
         # add the resources in the buffer to the colony, taking into account the maximum storage space of the colony
         # delete resources that overflow if a storage building is destroyed
-        max_storage = self.max_storage
-        for resource in self.data["resources_buffer"].keys():
-            # if self.data["resources_buffer"][resource] > 0:
-            self.data["resources"][resource] = min(max_storage[resource], self.data["resources"][resource] + self.data["resources_buffer"][resource])
-            # clear the resource buffer
-            self.data["resources_buffer"][resource] = 0.
+        # (the buffer is cleared afterwards)
+        self.resource_ledger.flush()
         # remove the resources (oxygen + food) consumed by the workers
         ...
         # update the flying ships
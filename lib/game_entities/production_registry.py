@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[2])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from lib.game_entities.building import Building
+from lib.game_entities.resource_ledger import ResourceLedger, RESOURCE_NAMES, RESOURCE_INDEX
+
+
+class ProductionRegistry:
+    "struct-of-arrays copy of the producers of a colony (drills, electrolysis stations, greenhouses), updated in one vectorized pass"
+
+    # buildings whose production is handled by the registry (their construction is still updated by the buildings)
+    building_names = ("drilling_station", "electrolysis_station", "greenhouse")
+
+    def __init__(self, resource_ledger: ResourceLedger, production_factors: dict[str, float]):
+        self.resource_ledger = resource_ledger
+        self.production_factors = production_factors
+        # set whenever a producer is added, removed, upgraded, or changes its workers or its produced resource
+        self.dirty = True
+        # drilling stations
+        self.drills_level = np.zeros(0, dtype=int)
+        self.drills_workers = np.zeros(0, dtype=int)
+        self.drills_production_speed = np.zeros(0)
+        self.drills_production_factor = np.zeros(0)
+        self.drills_resource_index = np.zeros(0, dtype=int)
+        # resources extracted per second by all the drills
+        self.drills_production = np.zeros(len(RESOURCE_NAMES))
+        # water consumers (electrolysis stations and greenhouses), in the order of the building grid
+        self.water_consumers_level = np.zeros(0, dtype=int)
+        self.water_consumers_workers = np.zeros(0, dtype=int)
+        self.water_consumers_production_speed = np.zeros(0)
+        # resources produced per unit of water, one line per water consumer
+        self.water_consumers_products = np.zeros((0, len(RESOURCE_NAMES)))
+        # water consumed per second by each water consumer, and by all of them
+        self.water_consumers_demand = np.zeros(0)
+        self.water_demand = 0.
+        # resources produced per second by all the water consumers when they get all the water they need
+        self.water_consumers_production = np.zeros(len(RESOURCE_NAMES))
+
+    def compile(self, buildings: list[Building]):
+        # copy the producers data into the arrays, buildings are given in the order of the building grid
+        drills = [building for building in buildings if building.name == "drilling_station" and building.resource_produced is not None]
+        self.drills_level = np.array([building.level for building in drills], dtype=int)
+        self.drills_workers = np.array([building.production_workers for building in drills], dtype=int)
+        self.drills_production_speed = np.array([building.parameters.production_speed for building in drills], dtype=float)
+        self.drills_production_factor = np.array([self.production_factors[building.resource_produced] for building in drills], dtype=float)
+        self.drills_resource_index = np.array([RESOURCE_INDEX[building.resource_produced] for building in drills], dtype=int)
+        drills_rate = (self.drills_level > 0) * self.drills_workers * self.drills_production_speed * self.drills_production_factor
+        self.drills_production = np.bincount(self.drills_resource_index, weights=drills_rate, minlength=len(RESOURCE_NAMES))
+        water_consumers = [building for building in buildings if building.name in ("electrolysis_station", "greenhouse")]
+        self.water_consumers_level = np.array([building.level for building in water_consumers], dtype=int)
+        self.water_consumers_workers = np.array([building.production_workers for building in water_consumers], dtype=int)
+        self.water_consumers_production_speed = np.array([building.parameters.production_speed for building in water_consumers], dtype=float)
+        self.water_consumers_products = np.zeros((len(water_consumers), len(RESOURCE_NAMES)))
+        for consumer_index, building in enumerate(water_consumers):
+            for resource, ratio in building.water_products.items():
+                self.water_consumers_products[consumer_index, RESOURCE_INDEX[resource]] = ratio
+        self.water_consumers_demand = (self.water_consumers_level > 0) * self.water_consumers_production_speed * self.water_consumers_workers
+        self.water_demand = float(self.water_consumers_demand.sum())
+        self.water_consumers_production = self.water_consumers_demand @ self.water_consumers_products
+        self.dirty = False
+
+    def update(self, dt):
+        # same production as the update methods of the buildings, for all the producers at once
+        # (the arrays of a colony are small: the idle cases are skipped, numpy calls cost more than they save there)
+        ledger = self.resource_ledger
+        # the drills dump their production into the buffer
+        if len(self.drills_resource_index):
+            ledger.buffer += self.drills_production * dt
+        if self.water_demand == 0:
+            return
+        water_available = ledger.amounts[RESOURCE_INDEX["water"]]
+        if water_available >= self.water_demand * dt:
+            # enough water for every consumer
+            ledger.amounts_view["water"] = water_available - self.water_demand * dt
+            ledger.buffer += self.water_consumers_production * dt
+        elif water_available > 0:
+            # the water consumers take the water in storage one after the other, in the order of the building grid
+            water_required = self.water_consumers_demand * dt
+            water_left_before = water_available - (np.cumsum(water_required) - water_required)
+            water_obtained = np.minimum(water_required, np.maximum(water_left_before, 0.))
+            ledger.amounts_view["water"] = max(0., water_available - water_obtained.sum())
+            ledger.buffer += water_obtained @ self.water_consumers_products
@@ -0,0 +1,110 @@
+from collections.abc import MutableMapping
+from typing import Callable, Iterator, Mapping, Optional
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[2])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+
+# fixed order of the resources in the ledger arrays
+RESOURCE_NAMES: tuple[str, ...] = (
+    "food",
+    "water",
+    "oxygen",
+    "hydrogen",
+    "iron_ore",
+    "iron",
+    "aluminium_ore",
+    "aluminium",
+    "copper_ore",
+    "copper",
+    "titanium_ore",
+    "titanium"
+)
+RESOURCE_INDEX: dict[str, int] = {resource: index for index, resource in enumerate(RESOURCE_NAMES)}
+
+
+def resource_vector(amounts: Mapping[str, float]) -> np.ndarray:
+    "converts a {resource: amount} dictionary into an array in the ledger order"
+    vector = np.zeros(len(RESOURCE_NAMES))
+    for resource, amount in amounts.items():
+        vector[RESOURCE_INDEX[resource]] = amount
+    return vector
+
+
+class ResourceArrayView(MutableMapping):
+    "dict-compatible view on one of the ledger arrays, keyed by resource name"
+
+    def __init__(self, array: np.ndarray, on_change: Optional[Callable[[], None]] = None):
+        self.array = array
+        self.on_change = on_change
+
+    def __getitem__(self, resource: str) -> float:
+        # plain floats, the callers format and compare them like the values of a dict
+        return float(self.array[RESOURCE_INDEX[resource]])
+
+    def __setitem__(self, resource: str, value: float):
+        index = RESOURCE_INDEX[resource]
+        # writing the same value again is not a change
+        if self.array[index] != value:
+            self.array[index] = value
+            if self.on_change is not None:
+                self.on_change()
+
+    def __delitem__(self, resource: str):
+        raise TypeError("resources cannot be removed from the ledger")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(RESOURCE_NAMES)
+
+    def __len__(self) -> int:
+        return len(RESOURCE_NAMES)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class ResourceLedger:
+    "array-backed colony resources: the stock, the production buffer and the storage capacity"
+
+    def __init__(self, on_change: Optional[Callable[[], None]] = None):
+        # called once per operation that changes the stock
+        self.on_change = on_change
+        self.amounts = np.zeros(len(RESOURCE_NAMES))
+        # production of the current tick, added to the stock by flush()
+        self.buffer = np.zeros(len(RESOURCE_NAMES))
+        # storage capacity, maintained by the colony
+        self.max_storage = np.zeros(len(RESOURCE_NAMES))
+        # dict-compatible views used by the buildings and the UI
+        self.amounts_view = ResourceArrayView(self.amounts, self._changed)
+        self.buffer_view = ResourceArrayView(self.buffer)
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def _set_amounts(self, new_amounts: np.ndarray):
+        # the arrays are updated in place, the views keep pointing to them
+        if not np.array_equal(new_amounts, self.amounts):
+            self.amounts[:] = new_amounts
+            self._changed()
+
+    def flush(self):
+        # add the buffer to the stock, clamped to the storage capacity, and clear the buffer
+        # (the resources that overflow after a storage building is destroyed are also deleted)
+        self._set_amounts(np.minimum(self.amounts + self.buffer, self.max_storage))
+        self.buffer.fill(0.)
+
+    def integrate(self, rates: np.ndarray, duration: float):
+        # apply constant production rates (per second) for duration seconds, within [0, storage capacity]
+        self._set_amounts(np.clip(self.amounts + rates * duration, 0., self.max_storage))
+
+    def can_afford(self, costs: Mapping[str, float]) -> bool:
+        return bool(np.all(self.amounts >= resource_vector(costs)))
+
+    def consume(self, costs: Mapping[str, float]):
+        self._set_amounts(self.amounts - resource_vector(costs))
@@ -1,3 +1,6 @@
+from collections import OrderedDict, deque
+from time import perf_counter
+from typing import Optional
 import sys
 from pathlib import Path
 
@@ -11,13 +14,15 @@ from lib.scenes.scene_colony import SceneColony
 from lib.scenes.scene_solar_system_map import SceneSolarSystemMap
 from lib.scenes.scene_pause_menu import ScenePauseMenu
 from lib.game_data import GameData
+from lib.replay import ReplayRecorder
+from lib.startup_profiler import startup_profiler
 
 
 class GameManager:
     "handles the communication between the window, the game state and the scenes"
 
     # def __init__(self, window_width: int, window_height: int):
-    def __init__(self, game_config: dict[str]):
+    def __init__(self, game_config: dict[str], replay_recorder: Optional[ReplayRecorder] = None):
         # self.game_config = game_config
         # init the game data
         # self.game_data = GameData(window_width=window_width, window_height=window_height)
@@ -35,36 +40,137 @@ class GameManager:
             "solar system map": SceneSolarSystemMap,
             "pause menu": ScenePauseMenu
         }
+        # scenes are built once and kept in memory, least recently used first
+        self.scenes: OrderedDict[str, Scene] = OrderedDict()
+        # maximum number of scenes kept in memory, the current scene is never evicted
+        self.scenes_cache_size: int = game_config["scenes"]["cache_size"]
+        # scene switch latencies in seconds (most recent last)
+        self.scene_switch_latencies: deque[float] = deque(maxlen=100)
+        self.current_scene_name: str = None
         # start the game with the main menu
         # self.current_scene = "main menu"
         # self.current_scene = "colony"
         # self.current_scene_name = "main menu"
-        self.current_scene_name = "colony"
-        self.current_scene: Scene = self.scenes_types_dict[self.current_scene_name](self.game_data)
+        start_scene_name = "colony"
+        # decode the images of the first scene in the background while the game starts
+        # (the images of the other scenes are only loaded when they are needed, see prewarm_next_scene)
+        self.game_data.assets.request(self.scenes_types_dict[start_scene_name].assets_group)
+        self.current_scene_name = start_scene_name
+        self.current_scene: Scene = self.get_scene(self.current_scene_name)
+        self.current_scene.on_enter()
+        # the scenes that should be ready early are built after the first frame, one per update once their images are loaded
+        self.scenes_to_prewarm: list[str] = [scene_name for scene_name in game_config["scenes"]["prewarm"] if scene_name not in self.scenes]
+        # records the inputs and the updates of the session once the game is ready, None if the session is not recorded
+        self.replay_recorder = replay_recorder
+        if self.replay_recorder is not None:
+            self.replay_recorder.start(self)
+
+    def get_scene(self, scene_name: str) -> Scene:
+        # return the scene from the cache, build it if needed
+        if scene_name in self.scenes:
+            self.scenes.move_to_end(scene_name)
+        else:
+            scene_type = self.scenes_types_dict[scene_name]
+            with startup_profiler.span(f"{scene_type.__name__}.__init__", "scene"):
+                self.scenes[scene_name] = scene_type(self.game_data)
+            # evict the least recently used scenes if the cache is full
+            for cached_scene_name in list(self.scenes.keys()):
+                if len(self.scenes) <= self.scenes_cache_size:
+                    break
+                if cached_scene_name not in (scene_name, self.current_scene_name):
+                    self.scenes.pop(cached_scene_name).on_delete()
+        return self.scenes[scene_name]
 
     def switch_scene(self, new_scene_name: str):
         # switch scene only if needed
         if new_scene_name != self.current_scene_name:
+            start_time = perf_counter()
+            self.current_scene.on_exit()
             self.current_scene_name = new_scene_name
-            self.current_scene: Scene = self.scenes_types_dict[new_scene_name](self.game_data)
+            self.current_scene: Scene = self.get_scene(new_scene_name)
+            self.current_scene.on_enter()
+            self.current_scene.invalidate()
+            self.scene_switch_latencies.append(perf_counter() - start_time)
 
     def on_mouse_press(self, x, y, button, modifiers):
+        if self.replay_recorder is not None:
+            self.replay_recorder.record_mouse_press(x, y, button, modifiers)
         # print("game manager mouse press")
         # self.current_scene = self.scenes[self.current_scene].on_mouse_press(x, y, button, modifiers)
         new_scene_name = self.current_scene.on_mouse_press(x, y, button, modifiers)
         self.switch_scene(new_scene_name)
+        # a click may change anything, the mouse motions only invalidate the scenes they change (see their on_mouse_motion)
+        self.invalidate()
+        self.update_mouse_clickable_area()
 
     def on_mouse_motion(self, x, y, dx, dy):
+        if self.replay_recorder is not None:
+            self.replay_recorder.record_mouse_motion(x, y)
         # print(f"mouse position: {x} {y}")
         # print("game manager on_mouse_motion call")
         # self.scenes[self.current_scene].on_mouse_motion(x, y)
         self.current_scene.on_mouse_motion(x, y)
 
     def on_key_press(self, symbol, modifiers):
+        if self.replay_recorder is not None:
+            self.replay_recorder.record_key_press(symbol, modifiers)
         # self.current_scene = self.scenes[self.current_scene].on_key_press(symbol, modifiers)
         new_scene_name = self.current_scene.on_key_press(symbol, modifiers)
         self.switch_scene(new_scene_name)
+        self.invalidate()
+        self.update_mouse_clickable_area()
+
+    def prewarm_next_scene(self):
+        # build the next scene to prewarm once its images are loaded in the background (never waits for them)
+        if self.scenes_to_prewarm:
+            scene_name = self.scenes_to_prewarm[0]
+            assets_group = self.scenes_types_dict[scene_name].assets_group
+            if assets_group is not None:
+                self.game_data.assets.request(assets_group)
+            if (assets_group is None) or (self.game_data.assets.progress(assets_group) == 1):
+                self.scenes_to_prewarm.pop(0)
+                if scene_name not in self.scenes:
+                    self.get_scene(scene_name)
+                    # keep the current scene the most recently used one
+                    self.scenes.move_to_end(self.current_scene_name)
+
+    def update_mouse_clickable_area(self):
+        # whether the cursor is over a clickable region of the current scene
+        # the region under a still mouse changes with the clicks, the key presses, the scene switches and the game state
+        # (the mouse motions update it in the scenes)
+        self.game_data.mouse_clickable_area = self.current_scene.hit_test_index.mouse_clickable_area
+
+    def invalidate(self):
+        # the current scene will be drawn again on the next frame
+        self.current_scene.invalidate()
+
+    @property
+    def needs_redraw(self) -> bool:
+        return self.current_scene.needs_redraw
+
+    def draw(self):
+        # upload the images decoded in the background since the last frame, then draw the current scene
+        if self.replay_recorder is not None:
+            self.replay_recorder.record_frame()
+        self.game_data.assets.upload_pending()
+        # cleared first: the scene can ask for another frame while it is drawn
+        self.current_scene.needs_redraw = False
+        self.current_scene.draw()
 
     def update(self, dt):
-        # update the game state
+        # update the game state, the scene displays the game state: it is drawn again once the simulation moved on
+        tick_count = self.game_data.simulation.tick_count
         self.game_data.update(dt)
+        if self.game_data.simulation.tick_count != tick_count:
+            self.invalidate()
+            self.update_mouse_clickable_area()
+        # the main menu shows whether the saves succeeded
+        if self.game_data.update_save_status():
+            self.invalidate()
+            self.update_mouse_clickable_area()
+        # the skipped frames do not upload the images decoded in the background, the scenes to prewarm wait for them
+        if not self.needs_redraw:
+            self.game_data.assets.upload_pending()
+        self.prewarm_next_scene()
+        if self.replay_recorder is not None:
+            self.replay_recorder.record_update(dt)
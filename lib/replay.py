@@ -0,0 +1,297 @@
+from struct import Struct
+from time import perf_counter
+from typing import Iterator, Optional
+import hashlib
+import json
+import zlib
+import sys
+from pathlib import Path
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[1])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from lib.save_game import encode_game_state, journal_file_path
+
+
+# replay format
+# every value is little-endian
+# header: magic, format version, length of the metadata, then the metadata (JSON)
+# then the saved game files present when the recording started (the player can load them): length (-1 if missing), content
+# then the records, zlib-compressed: one record type byte followed by the values of the record
+# the inputs are stored with the simulation tick they happened at, the replay runner checks it
+REPLAY_MAGIC = b"HBRP"
+# 2: the fast-forward jumps count the ticks they simulate (the ticks of the inputs and checkpoints of version 1 no longer match)
+# 3: 64-bit key symbols (pyglet reports the unmapped keys as key.user_key(scancode), above 32 bits)
+REPLAY_FORMAT_VERSION = 3
+HEADER = Struct("<4sHI")
+FILE_LENGTH = Struct("<i")
+RECORD_TYPE = Struct("<B")
+# GameManager.update: real time elapsed (seconds)
+RECORD_UPDATE = 1
+UPDATE = Struct("<d")
+# GameManager.draw: no value
+RECORD_FRAME = 2
+# inputs: tick, then the values of the event
+RECORD_MOUSE_MOTION = 3
+MOUSE_MOTION = Struct("<Ihh")
+RECORD_MOUSE_PRESS = 4
+MOUSE_PRESS = Struct("<IhhBH")
+RECORD_KEY_PRESS = 5
+KEY_PRESS = Struct("<IQH")
+# checksum of the game state: tick, digest (see state_digest)
+RECORD_CHECKPOINT = 6
+RECORD_END = 7
+CHECKPOINT = Struct("<I16s")
+RECORD_STRUCTS = {
+    RECORD_UPDATE: UPDATE,
+    RECORD_FRAME: None,
+    RECORD_MOUSE_MOTION: MOUSE_MOTION,
+    RECORD_MOUSE_PRESS: MOUSE_PRESS,
+    RECORD_KEY_PRESS: KEY_PRESS,
+    RECORD_CHECKPOINT: CHECKPOINT,
+    RECORD_END: CHECKPOINT
+}
+# compressed records are written to the file every RECORDS_PER_FLUSH records (a crashed session keeps its replay)
+RECORDS_PER_FLUSH = 256
+# sections of the configuration that do not change the game (a replay can be run with other values)
+CONFIG_HASH_IGNORED_SECTIONS = ("rules", "debug", "saves", "replays")
+# entries of the other sections that do not change the game either (the replays draw the recorded frames)
+CONFIG_HASH_IGNORED_ENTRIES = {"pyglet": ("redraw_rate", "redraw_on_change_only")}
+
+
+class ReplayError(Exception):
+    "raised when a replay file is malformed, or was recorded with another configuration"
+
+
+def config_hash(game_config: dict[str]) -> str:
+    # hash of the configuration sections that change the game
+    config_sections = {key: value for key, value in game_config.items() if key not in CONFIG_HASH_IGNORED_SECTIONS}
+    for section, ignored_entries in CONFIG_HASH_IGNORED_ENTRIES.items():
+        if section in config_sections:
+            config_sections[section] = {key: value for key, value in config_sections[section].items() if key not in ignored_entries}
+    return hashlib.blake2b(json.dumps(config_sections, sort_keys=True).encode("utf_8"), digest_size=16).hexdigest()
+
+
+def state_digest(game_data) -> bytes:
+    # checksum of the game state, computed from its binary save encoding (every float bit counts)
+    return hashlib.blake2b(encode_game_state(game_data.to_state()), digest_size=16).digest()
+
+
+def _read_file_or_none(file_path: Path) -> Optional[bytes]:
+    try:
+        return file_path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+class ReplayRecorder:
+    "writes the inputs and the simulation updates of a game session to a replay file"
+
+    def __init__(self, replay_file_path: Path, checkpoint_interval: int = 300, seed: Optional[int] = None):
+        self.replay_file_path = Path(replay_file_path)
+        # simulation ticks between two checksums of the game state
+        self.checkpoint_interval = checkpoint_interval
+        self.next_checkpoint_tick = checkpoint_interval
+        # seed of the random number generators (the game has no randomness yet)
+        self.seed = seed
+        self.replay_file = None
+        self.compressor = zlib.compressobj()
+        self.records_count = 0
+        self.game_data = None
+
+    def start(self, game_manager):
+        # write the header, called by the game manager once the game is ready (before any input)
+        self.game_data = game_manager.game_data
+        metadata = {
+            "config_hash": config_hash(self.game_data.game_config),
+            "seed": self.seed,
+            "start_scene": game_manager.current_scene_name,
+            "start_tick": self.game_data.simulation.tick_count,
+            "start_digest": state_digest(self.game_data).hex(),
+            "checkpoint_interval": self.checkpoint_interval
+        }
+        metadata_data = json.dumps(metadata).encode("utf_8")
+        self.replay_file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.replay_file = open(self.replay_file_path, "wb")
+        self.replay_file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_FORMAT_VERSION, len(metadata_data)))
+        self.replay_file.write(metadata_data)
+        save_file_path = self.game_data.save_file_path
+        for file_data in (_read_file_or_none(save_file_path), _read_file_or_none(journal_file_path(save_file_path))):
+            if file_data is None:
+                self.replay_file.write(FILE_LENGTH.pack(-1))
+            else:
+                self.replay_file.write(FILE_LENGTH.pack(len(file_data)))
+                self.replay_file.write(file_data)
+        self.next_checkpoint_tick = self.game_data.simulation.tick_count + self.checkpoint_interval
+
+    def _write_record(self, record_type: int, record_struct: Optional[Struct] = None, *values):
+        record = RECORD_TYPE.pack(record_type)
+        if record_struct is not None:
+            record += record_struct.pack(*values)
+        self.replay_file.write(self.compressor.compress(record))
+        self.records_count += 1
+        if self.records_count % RECORDS_PER_FLUSH == 0:
+            self.replay_file.write(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def record_update(self, dt: float):
+        # called after the update: the checkpoints hold the state at the end of a tick
+        self._write_record(RECORD_UPDATE, UPDATE, dt)
+        tick_count = self.game_data.simulation.tick_count
+        if tick_count >= self.next_checkpoint_tick:
+            self._write_record(RECORD_CHECKPOINT, CHECKPOINT, tick_count, state_digest(self.game_data))
+            self.next_checkpoint_tick = tick_count + self.checkpoint_interval
+
+    def record_frame(self):
+        self._write_record(RECORD_FRAME)
+
+    def record_mouse_motion(self, x: int, y: int):
+        self._write_record(RECORD_MOUSE_MOTION, MOUSE_MOTION, self.game_data.simulation.tick_count, int(x), int(y))
+
+    def record_mouse_press(self, x: int, y: int, button: int, modifiers: int):
+        self._write_record(RECORD_MOUSE_PRESS, MOUSE_PRESS, self.game_data.simulation.tick_count, int(x), int(y), button, modifiers)
+
+    def record_key_press(self, symbol: int, modifiers: int):
+        self._write_record(RECORD_KEY_PRESS, KEY_PRESS, self.game_data.simulation.tick_count, symbol, modifiers)
+
+    def close(self):
+        # write the final state checksum and finish the file
+        if self.replay_file is not None:
+            self._write_record(RECORD_END, CHECKPOINT, self.game_data.simulation.tick_count, state_digest(self.game_data))
+            self.replay_file.write(self.compressor.flush())
+            self.replay_file.close()
+            self.replay_file = None
+
+
+class Replay:
+    "replay file read back: metadata, saved game files and records"
+
+    def __init__(self, replay_file_path: Path):
+        data = Path(replay_file_path).read_bytes()
+        if len(data) < HEADER.size:
+            raise ReplayError("truncated replay header")
+        magic, version, metadata_length = HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ReplayError("not a Homebound replay file")
+        if version != REPLAY_FORMAT_VERSION:
+            raise ReplayError(f"unsupported replay format version {version}")
+        offset = HEADER.size
+        try:
+            self.metadata: dict[str] = json.loads(data[offset:offset + metadata_length].decode("utf_8"))
+        except ValueError as error:
+            raise ReplayError(f"malformed replay metadata: {error}") from error
+        offset += metadata_length
+        # content of the save file and of its journal when the recording started (None if missing)
+        saved_files = []
+        for _ in range(2):
+            if offset + FILE_LENGTH.size > len(data):
+                raise ReplayError("truncated replay saved game files")
+            file_length, = FILE_LENGTH.unpack_from(data, offset)
+            offset += FILE_LENGTH.size
+            if file_length < 0:
+                saved_files.append(None)
+            else:
+                saved_files.append(data[offset:offset + file_length])
+                offset += file_length
+        self.save_file_data, self.journal_file_data = saved_files
+        self.compressed_records = data[offset:]
+
+    def records(self) -> Iterator[tuple]:
+        # (record type, *values) for every record, a replay cut by a crash ends with its last complete record
+        decompressor = zlib.decompressobj()
+        try:
+            records_data = decompressor.decompress(self.compressed_records)
+        except zlib.error as error:
+            raise ReplayError(f"corrupted replay records: {error}") from error
+        offset = 0
+        while offset < len(records_data):
+            record_type, = RECORD_TYPE.unpack_from(records_data, offset)
+            offset += RECORD_TYPE.size
+            if record_type not in RECORD_STRUCTS:
+                raise ReplayError(f"unknown replay record type {record_type}")
+            record_struct = RECORD_STRUCTS[record_type]
+            if record_struct is None:
+                yield (record_type,)
+                continue
+            if offset + record_struct.size > len(records_data):
+                return
+            yield (record_type, *record_struct.unpack_from(records_data, offset))
+            offset += record_struct.size
+
+    def write_saved_files(self, save_file_path: Path):
+        # restore the saved game files of the recording session (for a player loading the game during the replay)
+        save_file_path = Path(save_file_path)
+        save_file_path.parent.mkdir(parents=True, exist_ok=True)
+        for file_path, file_data in ((save_file_path, self.save_file_data), (journal_file_path(save_file_path), self.journal_file_data)):
+            if file_data is None:
+                file_path.unlink(missing_ok=True)
+            else:
+                file_path.write_bytes(file_data)
+
+
+def replay_game_config(game_config: dict[str], replay: Replay, save_file_path: Path) -> dict[str]:
+    # copy of the configuration to run a replay: its saves go to save_file_path (the saved game of the player is never touched)
+    # raises ReplayError if the replay was recorded with another configuration
+    if config_hash(game_config) != replay.metadata["config_hash"]:
+        raise ReplayError("the replay was recorded with another configuration (lib/config.yml)")
+    replay.write_saved_files(save_file_path)
+    return {**game_config, "saves": {**game_config["saves"], "path": str(Path(save_file_path).resolve())}}
+
+
+def run_replay(replay: Replay, game_manager, draw: bool = True) -> dict[str]:
+    # feed the records of a replay to a game manager created with replay_game_config, as fast as possible
+    # the frames are drawn (the scenes update their widgets in draw, the clicks depend on them) unless draw is False
+    # returns the statistics of the run, "desync" describes the first difference with the recording (None if there is none)
+    game_data = game_manager.game_data
+    simulation = game_data.simulation
+    result = {
+        "seed": replay.metadata["seed"],
+        "ticks": 0,
+        "updates": 0,
+        "frames": 0,
+        "inputs": 0,
+        "checkpoints": 0,
+        "complete": False,
+        "desync": None,
+        "run_time": 0.
+    }
+    start_time = perf_counter()
+    start_tick = simulation.tick_count
+    if game_manager.current_scene_name != replay.metadata["start_scene"]:
+        game_manager.switch_scene(replay.metadata["start_scene"])
+    if (simulation.tick_count != replay.metadata["start_tick"]) or (state_digest(game_data).hex() != replay.metadata["start_digest"]):
+        result["desync"] = "the game does not start from the recorded state"
+    else:
+        for record_type, *values in replay.records():
+            if record_type == RECORD_UPDATE:
+                game_manager.update(values[0])
+                result["updates"] += 1
+            elif record_type == RECORD_FRAME:
+                if draw:
+                    game_manager.draw()
+                result["frames"] += 1
+            elif record_type in (RECORD_CHECKPOINT, RECORD_END):
+                tick, digest = values
+                if tick != simulation.tick_count:
+                    result["desync"] = f"game state of tick {tick} checked at tick {simulation.tick_count}"
+                    break
+                if digest != state_digest(game_data):
+                    result["desync"] = f"game state differs from the recording at tick {tick}"
+                    break
+                result["checkpoints"] += 1
+                result["complete"] = (record_type == RECORD_END)
+            else:
+                tick = values[0]
+                if tick != simulation.tick_count:
+                    result["desync"] = f"input recorded at tick {tick} happens at tick {simulation.tick_count}"
+                    break
+                if record_type == RECORD_MOUSE_MOTION:
+                    game_manager.on_mouse_motion(values[1], values[2], 0, 0)
+                elif record_type == RECORD_MOUSE_PRESS:
+                    game_manager.on_mouse_press(*values[1:])
+                else:
+                    game_manager.on_key_press(*values[1:])
+                result["inputs"] += 1
+    result["ticks"] = simulation.tick_count - start_tick
+    result["run_time"] = perf_counter() - start_time
+    return result
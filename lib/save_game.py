@@ -0,0 +1,583 @@
+from collections import deque
+from struct import Struct
+from time import perf_counter
+from typing import Optional
+import json
+import os
+import queue
+import threading
+import zlib
+import sys
+from pathlib import Path
+
+import yaml
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[1])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from lib.game_entities.resource_ledger import RESOURCE_NAMES, RESOURCE_INDEX
+from lib.game_config import GameRules, JOB_TYPES, JOB_WORKER_TYPES
+
+
+# binary save format
+# every value is little-endian, the names are stored as indices in the tables below
+# (the tables can only grow at the end, anything else requires a new format version)
+SAVE_MAGIC = b"HBSV"
+# 1: uncompressed body
+# 2: flags byte after the header, the body is zlib-compressed if the first flag is set
+SAVE_FORMAT_VERSION = 2
+SAVE_FLAG_COMPRESSED = 1
+
+BUILDING_NAMES = ("headquarters", "solar_panels", "warehouse", "liquid_tank", "drilling_station", "furnace",
+    "electrolysis_station", "greenhouse", "school", "factory", "spaceport")
+WORKER_TYPES = ("engineers", "scientists", "pilots")
+ITEM_NAMES = ("spaceship_small", "spaceship_medium", "spaceship_large", "module_cargo_hold", "module_liquid_tanks",
+    "module_passengers", "module_headquarters")
+
+# magic, format version
+HEADER = Struct("<4sH")
+# flags (format version 2 and above)
+FLAGS = Struct("<B")
+# tick count, elapsed time, accumulator, speed, speed before pause, number of colonies
+SIMULATION = Struct("<qddHHB")
+# string length
+STRING_LENGTH = Struct("<B")
+# resources and resources buffer
+RESOURCES = Struct(f"<{2 * len(RESOURCE_NAMES)}d")
+# engineers (available, total), scientists (available, total), pilots, then the items
+WORKERS_AND_ITEMS = Struct(f"<5I{len(ITEM_NAMES)}I")
+# selected tile (column, line, -1 if none), number of buildings
+COLONY_FOOTER = Struct("<bbB")
+# name, column, line, level, is constructing, construction workload completed,
+# construction engineers, construction scientists, production engineers, production scientists
+BUILDING = Struct("<BBBB?d4H")
+# resource produced (-1 if none)
+DRILL = Struct("<b")
+# resource produced (-1 if none), smelting completed percent, ore consumed
+FURNACE = Struct("<bd?")
+# workload completed, queue length (followed by one byte per queued worker / item)
+QUEUE = Struct("<dB")
+
+
+class SaveFormatError(Exception):
+    "raised when a save file cannot be decoded"
+
+
+def _pack_string(chunks: list[bytes], string: str):
+    encoded_string = string.encode("utf-8")
+    chunks.append(STRING_LENGTH.pack(len(encoded_string)))
+    chunks.append(encoded_string)
+
+
+def _pack_resource(resource: str) -> int:
+    return -1 if resource is None else RESOURCE_INDEX[resource]
+
+
+def encode_game_state(game_state: dict[str], compress: bool = False) -> bytes:
+    "converts the plain data returned by GameData.to_state into the binary save format"
+    simulation_state = game_state["simulation"]
+    chunks = []
+    _pack_string(chunks, game_state["active_colony"])
+    chunks.append(SIMULATION.pack(simulation_state["tick_count"], simulation_state["elapsed_time"], simulation_state["accumulator"],
+        simulation_state["speed"], simulation_state["speed_before_pause"], len(simulation_state["colonies"])))
+    for colony_state in simulation_state["colonies"]:
+        _pack_string(chunks, colony_state["name"])
+        chunks.append(RESOURCES.pack(*colony_state["resources"], *colony_state["resources_buffer"]))
+        workers = colony_state["workers"]
+        chunks.append(WORKERS_AND_ITEMS.pack(workers["engineers"]["available"], workers["engineers"]["total"],
+            workers["scientists"]["available"], workers["scientists"]["total"], workers["pilots"],
+            *(colony_state["items"][item_name] for item_name in ITEM_NAMES)))
+        selected_coords = colony_state["selected_building_tile_coords"] or (-1, -1)
+        chunks.append(COLONY_FOOTER.pack(*selected_coords, len(colony_state["buildings"])))
+        for building_state in colony_state["buildings"]:
+            assigned_workers = building_state["assigned_workers"]
+            chunks.append(BUILDING.pack(BUILDING_NAMES.index(building_state["name"]), *building_state["coords"], building_state["level"],
+                building_state["is_constructing"], building_state["construction_workload_completed"],
+                assigned_workers["construction"]["engineers"], assigned_workers["construction"]["scientists"],
+                assigned_workers["production"]["engineers"], assigned_workers["production"]["scientists"]))
+            if building_state["name"] == "drilling_station":
+                chunks.append(DRILL.pack(_pack_resource(building_state["resource_produced"])))
+            elif building_state["name"] == "furnace":
+                chunks.append(FURNACE.pack(_pack_resource(building_state["resource_produced"]),
+                    building_state["smelting_completed_percent"], building_state["ore_consumed"]))
+            elif building_state["name"] == "school":
+                chunks.append(QUEUE.pack(building_state["training_workload_completed"], len(building_state["training_queue"])))
+                chunks.append(bytes(WORKER_TYPES.index(worker_type) for worker_type in building_state["training_queue"]))
+            elif building_state["name"] == "factory":
+                chunks.append(QUEUE.pack(building_state["item_workload_completed"], len(building_state["items_queue"])))
+                chunks.append(bytes(ITEM_NAMES.index(item_name) for item_name in building_state["items_queue"]))
+    body = b"".join(chunks)
+    if compress:
+        body = zlib.compress(body)
+    return HEADER.pack(SAVE_MAGIC, SAVE_FORMAT_VERSION) + FLAGS.pack(SAVE_FLAG_COMPRESSED if compress else 0) + body
+
+
+class _Reader:
+    "reads the binary save format sequentially"
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, struct: Struct) -> tuple:
+        try:
+            values = struct.unpack_from(self.data, self.offset)
+        except Exception as error:
+            raise SaveFormatError(f"truncated save file (offset {self.offset})") from error
+        self.offset += struct.size
+        return values
+
+    def read_bytes(self, length: int) -> bytes:
+        if self.offset + length > len(self.data):
+            raise SaveFormatError(f"truncated save file (offset {self.offset})")
+        data = bytes(self.data[self.offset:self.offset + length])
+        self.offset += length
+        return data
+
+    def read_string(self) -> str:
+        length, = self.unpack(STRING_LENGTH)
+        offset = self.offset
+        try:
+            return self.read_bytes(length).decode("utf-8")
+        except UnicodeDecodeError as error:
+            raise SaveFormatError(f"invalid string (offset {offset})") from error
+
+
+def _table_entry(table: tuple[str, ...], index: int, table_name: str) -> str:
+    # a corrupted index is reported as a save format error instead of an IndexError (or a wrapped negative index)
+    if not 0 <= index < len(table):
+        raise SaveFormatError(f"invalid {table_name} index {index}")
+    return table[index]
+
+
+def _unpack_resource(resource_index: int):
+    return None if resource_index == -1 else _table_entry(RESOURCE_NAMES, resource_index, "resource")
+
+
+def decode_game_state(data: bytes) -> dict[str]:
+    "converts the binary save format into the plain data expected by GameData.load_state"
+    reader = _Reader(data)
+    magic, version = reader.unpack(HEADER)
+    if magic != SAVE_MAGIC:
+        raise SaveFormatError("not a Homebound save file")
+    if version not in (1, 2):
+        raise SaveFormatError(f"unsupported save format version {version} (expected {SAVE_FORMAT_VERSION} or below)")
+    if version >= 2:
+        flags, = reader.unpack(FLAGS)
+        if flags & SAVE_FLAG_COMPRESSED:
+            try:
+                body = zlib.decompress(reader.data[reader.offset:])
+            except zlib.error as error:
+                raise SaveFormatError("corrupted save file") from error
+            reader = _Reader(body)
+    active_colony = reader.read_string()
+    tick_count, elapsed_time, accumulator, speed, speed_before_pause, colonies_count = reader.unpack(SIMULATION)
+    colonies = []
+    for _ in range(colonies_count):
+        colony_name = reader.read_string()
+        resources = reader.unpack(RESOURCES)
+        workers_and_items = reader.unpack(WORKERS_AND_ITEMS)
+        selected_column, selected_line, buildings_count = reader.unpack(COLONY_FOOTER)
+        buildings = []
+        for _ in range(buildings_count):
+            (name_index, column_index, line_index, level, is_constructing, construction_workload_completed,
+                construction_engineers, construction_scientists, production_engineers, production_scientists) = reader.unpack(BUILDING)
+            building_state = {
+                "name": _table_entry(BUILDING_NAMES, name_index, "building"),
+                "coords": (column_index, line_index),
+                "level": level,
+                "is_constructing": is_constructing,
+                "construction_workload_completed": construction_workload_completed,
+                "assigned_workers": {
+                    "construction": {"engineers": construction_engineers, "scientists": construction_scientists},
+                    "production": {"engineers": production_engineers, "scientists": production_scientists}
+                }
+            }
+            if building_state["name"] == "drilling_station":
+                resource_index, = reader.unpack(DRILL)
+                building_state["resource_produced"] = _unpack_resource(resource_index)
+            elif building_state["name"] == "furnace":
+                resource_index, smelting_completed_percent, ore_consumed = reader.unpack(FURNACE)
+                building_state["resource_produced"] = _unpack_resource(resource_index)
+                building_state["smelting_completed_percent"] = smelting_completed_percent
+                building_state["ore_consumed"] = ore_consumed
+            elif building_state["name"] == "school":
+                building_state["training_workload_completed"], queue_length = reader.unpack(QUEUE)
+                building_state["training_queue"] = [_table_entry(WORKER_TYPES, index, "worker type") for index in reader.read_bytes(queue_length)]
+            elif building_state["name"] == "factory":
+                building_state["item_workload_completed"], queue_length = reader.unpack(QUEUE)
+                building_state["items_queue"] = [_table_entry(ITEM_NAMES, index, "item") for index in reader.read_bytes(queue_length)]
+            buildings.append(building_state)
+        colonies.append({
+            "name": colony_name,
+            "resources": list(resources[:len(RESOURCE_NAMES)]),
+            "resources_buffer": list(resources[len(RESOURCE_NAMES):]),
+            "workers": {
+                "engineers": {"available": workers_and_items[0], "total": workers_and_items[1]},
+                "scientists": {"available": workers_and_items[2], "total": workers_and_items[3]},
+                "pilots": workers_and_items[4]
+            },
+            "items": dict(zip(ITEM_NAMES, workers_and_items[5:])),
+            "selected_building_tile_coords": None if selected_column < 0 else (selected_column, selected_line),
+            "buildings": buildings
+        })
+    return {
+        "active_colony": active_colony,
+        "simulation": {
+            "tick_count": tick_count,
+            "elapsed_time": elapsed_time,
+            "accumulator": accumulator,
+            "speed": speed,
+            "speed_before_pause": speed_before_pause,
+            "colonies": colonies
+        }
+    }
+
+
+# size (tiles) of the building grid of a colony
+COLONY_GRID_SIZE = 7
+
+
+def _check_coords(coords, what: str):
+    if (coords is None) or (len(coords) != 2) or not all(isinstance(index, int) and 0 <= index < COLONY_GRID_SIZE for index in coords):
+        raise SaveFormatError(f"invalid {what} coordinates {coords}")
+
+
+def _check_building_state(building_state: dict[str], game_rules: GameRules) -> dict[str, int]:
+    # checks the values the building reads while it is updated, returns the workers assigned to it per worker type
+    name, level = building_state["name"], building_state["level"]
+    level_parameters = game_rules.buildings[name].parameters_per_level[level]
+    assigned_workers = dict.fromkeys(JOB_WORKER_TYPES, 0)
+    for job_type in JOB_TYPES:
+        for worker_type in assigned_workers:
+            workers_count = building_state["assigned_workers"][job_type][worker_type]
+            if not isinstance(workers_count, int) or not 0 <= workers_count <= level_parameters.jobs[job_type][worker_type]:
+                raise SaveFormatError(f"invalid number of {worker_type} at the {job_type} jobs of the building {name!r}: {workers_count!r}")
+            assigned_workers[worker_type] += workers_count
+    resource_produced = building_state.get("resource_produced")
+    if name == "drilling_station":
+        producible_resources = [resource for resource in RESOURCE_NAMES if resource == "water" or resource.endswith("_ore")]
+    elif name == "furnace":
+        producible_resources = list(game_rules.ore_per_ingot)
+    else:
+        producible_resources = []
+    if (resource_produced is not None) and (resource_produced not in producible_resources):
+        raise SaveFormatError(f"the building {name!r} cannot produce {resource_produced!r}")
+    for worker_type in building_state.get("training_queue", ()):
+        if worker_type not in game_rules.workers_training_workload:
+            raise SaveFormatError(f"the school cannot train {worker_type!r}")
+    for item_name in building_state.get("items_queue", ()):
+        if item_name not in game_rules.items_price:
+            raise SaveFormatError(f"the factory cannot manufacture {item_name!r}")
+    return assigned_workers
+
+
+def validate_game_state(game_state: dict[str], game_config: dict[str]):
+    "checks that a decoded game state fits the game configuration, raises SaveFormatError otherwise"
+    # the binary format only guarantees the types, the values can still be out of range in a corrupted file
+    try:
+        simulation_state = game_state["simulation"]
+        if game_state["active_colony"] not in game_config["colonies"]:
+            raise SaveFormatError(f"unknown active colony {game_state['active_colony']!r}")
+        speeds = game_config["simulation"]["speeds"]
+        if (simulation_state["speed"] not in speeds) or (simulation_state["speed_before_pause"] not in speeds):
+            raise SaveFormatError(f"invalid speed {simulation_state['speed']} (before pause: {simulation_state['speed_before_pause']})")
+        colonies_names = [colony_state["name"] for colony_state in simulation_state["colonies"]]
+        if len(set(colonies_names)) != len(colonies_names):
+            raise SaveFormatError("duplicated colony")
+        game_rules = game_config["rules"]
+        buildings_rules = game_rules.buildings
+        for colony_state in simulation_state["colonies"]:
+            if colony_state["name"] not in game_config["colonies"]:
+                raise SaveFormatError(f"unknown colony {colony_state['name']!r}")
+            if len(colony_state["resources"]) != len(RESOURCE_NAMES) or len(colony_state["resources_buffer"]) != len(RESOURCE_NAMES):
+                raise SaveFormatError(f"invalid resources in colony {colony_state['name']!r}")
+            if set(colony_state["items"]) - set(ITEM_NAMES):
+                raise SaveFormatError(f"unknown items in colony {colony_state['name']!r}")
+            if colony_state["selected_building_tile_coords"] is not None:
+                _check_coords(colony_state["selected_building_tile_coords"], "selected tile")
+            buildings_coords = set()
+            assigned_workers = dict.fromkeys(JOB_WORKER_TYPES, 0)
+            for building_state in colony_state["buildings"]:
+                if building_state["name"] not in buildings_rules:
+                    raise SaveFormatError(f"unknown building {building_state['name']!r}")
+                _check_coords(building_state["coords"], "building")
+                coords = tuple(building_state["coords"])
+                if coords in buildings_coords:
+                    raise SaveFormatError(f"two buildings on the tile {coords}")
+                buildings_coords.add(coords)
+                # the levels without parameters would fail in Building.parameters
+                if building_state["level"] not in buildings_rules[building_state["name"]].parameters_per_level:
+                    raise SaveFormatError(f"invalid level {building_state['level']} for the building {building_state['name']!r}")
+                for worker_type, workers_count in _check_building_state(building_state, game_rules).items():
+                    assigned_workers[worker_type] += workers_count
+            # the workers assigned to the buildings are the ones missing from the available workers
+            for worker_type, workers_count in assigned_workers.items():
+                workers = colony_state["workers"][worker_type]
+                if not 0 <= workers["available"] <= workers["total"] - workers_count:
+                    raise SaveFormatError(f"{workers_count} {worker_type} assigned in colony {colony_state['name']!r}, "
+                                          f"but {workers['available']} available out of {workers['total']}")
+    except (KeyError, TypeError) as error:
+        # missing or mistyped entries (journal records)
+        raise SaveFormatError(f"incomplete game state ({error!r})") from error
+
+
+def _write_file_atomically(file_path: Path, data: bytes):
+    # the previous file is only replaced once the new one is complete
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_file_path = file_path.with_name(file_path.name + ".tmp")
+    with open(temporary_file_path, "wb") as temporary_file:
+        temporary_file.write(data)
+        temporary_file.flush()
+        os.fsync(temporary_file.fileno())
+    os.replace(temporary_file_path, file_path)
+
+
+def write_save_file(game_state: dict[str], save_file_path: Path, compress: bool = False) -> int:
+    "writes the game state to a binary save file, returns the checksum of the file (it identifies the snapshot)"
+    data = encode_game_state(game_state, compress)
+    _write_file_atomically(Path(save_file_path), data)
+    return zlib.crc32(data)
+
+
+def read_save_file(save_file_path: Path) -> dict[str]:
+    "reads the game state from a binary save file (without its journal)"
+    return decode_game_state(Path(save_file_path).read_bytes())
+
+
+# save journal
+# the changes since the last full snapshot are appended to a journal file next to the save file
+# header: magic, format version, checksum of the snapshot the journal applies to
+# then one record per save: length, checksum, JSON delta (see diff_game_state)
+# a record cut by a crash fails its checksum, the replay stops there
+JOURNAL_MAGIC = b"HBJN"
+JOURNAL_FORMAT_VERSION = 1
+JOURNAL_HEADER = Struct("<4sHI")
+JOURNAL_RECORD_HEADER = Struct("<II")
+
+
+def journal_file_path(save_file_path: Path) -> Path:
+    save_file_path = Path(save_file_path)
+    return save_file_path.with_name(save_file_path.name + ".journal")
+
+
+def _buildings_by_coords(colony_state: dict[str]) -> dict[tuple[int, int], dict[str]]:
+    return {tuple(building_state["coords"]): building_state for building_state in colony_state["buildings"]}
+
+
+def diff_game_state(old_game_state: dict[str], new_game_state: dict[str]) -> dict[str]:
+    "changes between two game states: changed values only, and whole buildings for the buildings that changed (None if removed)"
+    delta = {}
+    if new_game_state["active_colony"] != old_game_state["active_colony"]:
+        delta["active_colony"] = new_game_state["active_colony"]
+    old_simulation_state, new_simulation_state = old_game_state["simulation"], new_game_state["simulation"]
+    simulation_delta = {key: value for key, value in new_simulation_state.items() if key != "colonies" and value != old_simulation_state[key]}
+    old_colonies_states = {colony_state["name"]: colony_state for colony_state in old_simulation_state["colonies"]}
+    colonies_deltas = {}
+    for new_colony_state in new_simulation_state["colonies"]:
+        old_colony_state = old_colonies_states[new_colony_state["name"]]
+        colony_delta = {key: value for key, value in new_colony_state.items() if key != "buildings" and value != old_colony_state[key]}
+        old_buildings, new_buildings = _buildings_by_coords(old_colony_state), _buildings_by_coords(new_colony_state)
+        buildings_delta = [
+            {"coords": coords, "state": new_buildings.get(coords)}
+            for coords in old_buildings.keys() | new_buildings.keys()
+            if old_buildings.get(coords) != new_buildings.get(coords)
+        ]
+        if buildings_delta:
+            colony_delta["buildings"] = buildings_delta
+        if colony_delta:
+            colonies_deltas[new_colony_state["name"]] = colony_delta
+    if colonies_deltas:
+        simulation_delta["colonies"] = colonies_deltas
+    if simulation_delta:
+        delta["simulation"] = simulation_delta
+    return delta
+
+
+def apply_game_state_delta(game_state: dict[str], delta: dict[str]):
+    "applies a delta returned by diff_game_state to a game state (in place)"
+    if "active_colony" in delta:
+        game_state["active_colony"] = delta["active_colony"]
+    simulation_delta = delta.get("simulation", {})
+    simulation_state = game_state["simulation"]
+    simulation_state.update({key: value for key, value in simulation_delta.items() if key != "colonies"})
+    colonies_states = {colony_state["name"]: colony_state for colony_state in simulation_state["colonies"]}
+    for colony_name, colony_delta in simulation_delta.get("colonies", {}).items():
+        colony_state = colonies_states[colony_name]
+        colony_state.update({key: value for key, value in colony_delta.items() if key != "buildings"})
+        if "buildings" in colony_delta:
+            buildings = _buildings_by_coords(colony_state)
+            for building_delta in colony_delta["buildings"]:
+                coords = tuple(building_delta["coords"])
+                if building_delta["state"] is None:
+                    buildings.pop(coords, None)
+                else:
+                    buildings[coords] = building_delta["state"]
+            colony_state["buildings"] = list(buildings.values())
+
+
+def start_journal(save_file_path: Path, snapshot_checksum: int):
+    "replaces the journal of the save file with an empty one, bound to the snapshot"
+    _write_file_atomically(journal_file_path(save_file_path), JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_FORMAT_VERSION, snapshot_checksum))
+
+
+def append_to_journal(save_file_path: Path, delta: dict[str]) -> int:
+    "appends a delta to the journal of the save file, returns the number of bytes written"
+    data = json.dumps(delta, separators=(",", ":")).encode("utf-8")
+    with open(journal_file_path(save_file_path), "ab") as journal_file:
+        journal_file.write(JOURNAL_RECORD_HEADER.pack(len(data), zlib.crc32(data)) + data)
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+    return JOURNAL_RECORD_HEADER.size + len(data)
+
+
+def read_saved_game(save_file_path: Path) -> dict[str]:
+    "reads the game state from a save file and replays its journal"
+    save_file_path = Path(save_file_path)
+    snapshot_data = save_file_path.read_bytes()
+    game_state = decode_game_state(snapshot_data)
+    try:
+        journal_data = journal_file_path(save_file_path).read_bytes()
+    except FileNotFoundError:
+        return game_state
+    # a journal written for another snapshot (crash between a snapshot and the new journal) is already included in the save file
+    if len(journal_data) < JOURNAL_HEADER.size:
+        return game_state
+    magic, version, snapshot_checksum = JOURNAL_HEADER.unpack_from(journal_data)
+    if (magic != JOURNAL_MAGIC) or (version != JOURNAL_FORMAT_VERSION) or (snapshot_checksum != zlib.crc32(snapshot_data)):
+        return game_state
+    offset = JOURNAL_HEADER.size
+    while offset + JOURNAL_RECORD_HEADER.size <= len(journal_data):
+        length, checksum = JOURNAL_RECORD_HEADER.unpack_from(journal_data, offset)
+        record = journal_data[offset + JOURNAL_RECORD_HEADER.size:offset + JOURNAL_RECORD_HEADER.size + length]
+        if (len(record) < length) or (zlib.crc32(record) != checksum):
+            break
+        try:
+            apply_game_state_delta(game_state, json.loads(record))
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            raise SaveFormatError(f"corrupted save journal (offset {offset})") from error
+        offset += JOURNAL_RECORD_HEADER.size + length
+    return game_state
+
+
+def export_game_state_yaml(game_state: dict[str], export_file_path: Path):
+    "writes the game state in a human-readable YAML file (for debugging, the game only loads binary saves)"
+    export_file_path = Path(export_file_path)
+    export_file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(export_file_path, "w", encoding="utf-8") as export_file:
+        yaml.safe_dump({"format_version": SAVE_FORMAT_VERSION, **game_state}, export_file, sort_keys=False, allow_unicode=True)
+
+
+class SaveWorker:
+    "writes the saves on a background thread, the main thread only takes the snapshot (GameData.to_state)"
+
+    def __init__(self, save_file_path: Path, compress: bool = True, yaml_export: bool = False, snapshot_interval: float = 0.):
+        self.save_file_path = Path(save_file_path)
+        self.compress = compress
+        self.yaml_export = yaml_export
+        # real time (seconds) between two full snapshots, the saves in between only append their changes to the journal
+        # (0: every save is a full snapshot)
+        self.snapshot_interval = snapshot_interval
+        # game state stored on disk (snapshot + journal) by this worker, None until the first full snapshot
+        self.saved_game_state: Optional[dict[str]] = None
+        self.last_snapshot_time = 0.
+        # at most one snapshot waits for the thread, a newer snapshot replaces it
+        self.pending_snapshots: queue.Queue[Optional[dict[str]]] = queue.Queue(maxsize=1)
+        # metrics, in seconds (most recent last)
+        # time spent on the main thread to take the snapshots, and on the worker thread to encode and write them
+        self.snapshot_times: deque[float] = deque(maxlen=100)
+        self.write_times: deque[float] = deque(maxlen=100)
+        self.saves_written = 0
+        self.saves_dropped = 0
+        self.journal_records_written = 0
+        # bytes written by the recent saves
+        self.bytes_written: deque[int] = deque(maxlen=100)
+        # why the last save could not be written (None: the last save was written)
+        self.last_error: Optional[str] = None
+        self.thread = threading.Thread(target=self._run, name="save worker", daemon=True)
+        self.thread.start()
+
+    def submit(self, game_state: dict[str], snapshot_time: float = 0.):
+        # queue a snapshot for writing, never blocks
+        self.snapshot_times.append(snapshot_time)
+        while True:
+            try:
+                self.pending_snapshots.put_nowait(game_state)
+                return
+            except queue.Full:
+                # the thread is late, only the latest snapshot is worth writing
+                try:
+                    self.pending_snapshots.get_nowait()
+                    self.pending_snapshots.task_done()
+                    self.saves_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        while True:
+            game_state = self.pending_snapshots.get()
+            if game_state is None:
+                self.pending_snapshots.task_done()
+                break
+            start_time = perf_counter()
+            try:
+                self._write(game_state)
+                if self.yaml_export:
+                    export_game_state_yaml(game_state, self.save_file_path.with_suffix(".yml"))
+            except Exception as error:
+                self.last_error = str(error)
+                # the journal may end with a torn record that hides every record appended after it:
+                # the next save is a full snapshot, it rewrites the file and starts a new journal
+                self.saved_game_state = None
+            else:
+                self.saves_written += 1
+                self.last_error = None
+            self.write_times.append(perf_counter() - start_time)
+            self.pending_snapshots.task_done()
+
+    def _write(self, game_state: dict[str]):
+        if (self.saved_game_state is None) or (self.snapshot_interval <= 0) \
+            or (perf_counter() - self.last_snapshot_time >= self.snapshot_interval):
+            # full snapshot, the journal is compacted into it
+            self.saved_game_state = None
+            snapshot_checksum = write_save_file(game_state, self.save_file_path, self.compress)
+            start_journal(self.save_file_path, snapshot_checksum)
+            self.bytes_written.append(self.save_file_path.stat().st_size)
+            self.last_snapshot_time = perf_counter()
+        else:
+            # only the changes since the previous save
+            delta = diff_game_state(self.saved_game_state, game_state)
+            self.bytes_written.append(append_to_journal(self.save_file_path, delta) if delta else 0)
+            self.journal_records_written += bool(delta)
+        self.saved_game_state = game_state
+
+    def wait(self):
+        # block until every submitted snapshot is written
+        self.pending_snapshots.join()
+
+    def close(self, timeout: Optional[float] = None):
+        # write the pending snapshot (if any) and stop the thread
+        self.pending_snapshots.put(None)
+        self.thread.join(timeout)
+
+    def metrics(self) -> dict[str, float]:
+        # average snapshot and write times (milliseconds) and size of the recent saves
+        return {
+            "snapshot_ms": 1000 * sum(self.snapshot_times) / len(self.snapshot_times) if self.snapshot_times else 0.,
+            "write_ms": 1000 * sum(self.write_times) / len(self.write_times) if self.write_times else 0.,
+            "bytes_per_save": sum(self.bytes_written) / len(self.bytes_written) if self.bytes_written else 0.,
+            "saves_written": self.saves_written,
+            "journal_records_written": self.journal_records_written,
+            "saves_dropped": self.saves_dropped
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="export a Homebound binary save file to YAML")
+    parser.add_argument("save_file", type=Path)
+    parser.add_argument("export_file", type=Path)
+    args = parser.parse_args()
+    export_game_state_yaml(read_saved_game(args.save_file), args.export_file)
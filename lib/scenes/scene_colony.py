@@ -1,18 +1,21 @@
 from pyglet.text import Label, decode_attributed
 from pyglet.text.layout import TextLayout
+from pyglet.text.document import AbstractDocument
 import pyglet.shapes as shapes
-from pyglet.sprite import Sprite
 from pyglet.window import key, mouse
 from pyglet.graphics import Group
 import sys
 from pathlib import Path
+from time import perf_counter
+from functools import partial
 
 ROOT_DIR_PATH = str(Path(__file__).resolve().parents[2])
 if ROOT_DIR_PATH not in sys.path:
     sys.path.insert(0, ROOT_DIR_PATH)
 
-from lib.scenes.scene_interface import Scene
+from lib.scenes.scene_interface import Scene, HitTestIndex
 from lib.game_data import GameData
+from lib.asset_manager import IconSprite
 
 
 class BuildingWidget:
@@ -22,12 +25,13 @@ class BuildingWidget:
     If the tile is selected, displays a selector over the tile.
     """
 
-    def __init__(self, game_data: GameData, line_index: int, column_index: int, batch, groups):
+    def __init__(self, game_data: GameData, line_index: int, column_index: int, batch, groups, hit_test_index: HitTestIndex):
         self.game_data = game_data
         self.line_index = line_index
         self.colum_index = column_index
         self.batch = batch
         self.groups = groups
+        self.hit_test_index = hit_test_index
         # self.icon = None
         # the area covered by the widget
         self.tile_area = shapes.Rectangle(
@@ -40,7 +44,7 @@ class BuildingWidget:
             group=self.groups[2]
         )
         # selector sprite
-        self.selector_sprite = Sprite(
+        self.selector_sprite = IconSprite(
             img = self.game_data.icon_selector,
             x = self.game_data.window_width // 2 - 3 * 75 + self.colum_index * 75,
             y = self.game_data.window_height // 2 + 3 * 75 - self.line_index * 75,
@@ -49,6 +53,20 @@ class BuildingWidget:
         )
         self.selector_sprite.scale = 2.25
         self.selector_sprite.opacity = 0
+        # the tile can be clicked on while it is not selected
+        self.region_name = f"building_tile_{self.colum_index}_{self.line_index}"
+        self.hit_test_index.add(self.region_name, self.tile_area, self.select, lambda: not self.is_selected)
+        # building icon sprite, created once and re-imaged when the building on the tile changes
+        self.icon = IconSprite(
+            img = self.game_data.icon_house_black,
+            x = self.game_data.window_width // 2 - 3 * 75 + self.colum_index * 75,
+            y = self.game_data.window_height // 2 + 3 * 75 - self.line_index * 75,
+            batch = self.batch,
+            group = self.groups[3]
+        )
+        self.icon.visible = False
+        # name of the building currently displayed on the tile
+        self.displayed_building_name: str = None
         # building display parameters
         # each building is represented by a color and an icon
         self.building_display_parameters = {
@@ -132,44 +150,48 @@ class BuildingWidget:
         # update the widget -> display the associated building, and whether or not it is selected
         current_colony = self.game_data.colonies[self.game_data.active_colony]
         # draw the building if it exists
+        # the icon sprite is only touched when the building on the tile changes
         associated_building = current_colony.building_grid[self.line_index][self.colum_index]
-        if associated_building is None:
-            # hide the tile
-            self.tile_area.color = (0, 0, 0, 0)
-            self.icon = None
-        else:
-            # color the tile area with the color of the building
-            self.tile_area.color = self.building_display_parameters[associated_building.name]["color"]
-            self.icon = Sprite(
-                img = self.building_display_parameters[associated_building.name]["icon_img"],
-                x = self.game_data.window_width // 2 - 3 * 75 + self.colum_index * 75,
-                y = self.game_data.window_height // 2 + 3 * 75 - self.line_index * 75,
-                batch = self.batch,
-                group = self.groups[3]
-            )
-            self.icon.scale = self.building_display_parameters[associated_building.name]["icon_scale"]
+        building_name = None if associated_building is None else associated_building.name
+        if building_name != self.displayed_building_name:
+            if building_name is None:
+                # hide the tile
+                self.tile_area.color = (0, 0, 0, 0)
+                self.icon.visible = False
+            else:
+                # color the tile area with the color of the building
+                self.tile_area.color = self.building_display_parameters[building_name]["color"]
+                self.icon.image = self.building_display_parameters[building_name]["icon_img"]
+                self.icon.scale = self.building_display_parameters[building_name]["icon_scale"]
+                self.icon.visible = True
+            self.displayed_building_name = building_name
         # if (selected_building_tile_coords is not None):
         #     if current_colony.selected_building is not None:
         #         self.tile_area.color = self.building_display_parameters[current_colony.selected_building.name]["color"]
         #     # show the selector if the tile is selected
         #     if (selected_building_tile_coords[1] == self.line_index) and (selected_building_tile_coords[0] == self.colum_index):
         #         self.selector_sprite.opacity = 255
-        selected_building_tile_coords = current_colony.selected_building_tile_coords
         # if the current building tile is selected ...
-        if (selected_building_tile_coords is not None) and ((selected_building_tile_coords[1], selected_building_tile_coords[0]) == (self.line_index, self.colum_index)):
-            self.selector_sprite.opacity = 255
+        if self.is_selected:
+            selector_opacity = 255
         else:
             # if the mouse is over the tile ...
-            if (self.game_data.mouse_x, self.game_data.mouse_y) in self.tile_area:
-                self.selector_sprite.opacity = 127
-                self.game_data.mouse_clickable_area = True
+            if self.hit_test_index.hovered == self.region_name:
+                selector_opacity = 127
             else:
-                self.selector_sprite.opacity = 0
+                selector_opacity = 0
+        # only update the sprite vertices if the opacity changed
+        if selector_opacity != self.selector_sprite.opacity:
+            self.selector_sprite.opacity = selector_opacity
+
+    @property
+    def is_selected(self) -> bool:
+        selected_building_tile_coords = self.game_data.colonies[self.game_data.active_colony].selected_building_tile_coords
+        return (selected_building_tile_coords is not None) and ((selected_building_tile_coords[1], selected_building_tile_coords[0]) == (self.line_index, self.colum_index))
 
-    def on_mouse_press(self, x, y):
-        # if (x, y) in the building tile, select it
-        if (x, y) in self.tile_area:
-            self.game_data.colonies[self.game_data.active_colony].selected_building_tile_coords = (self.colum_index, self.line_index)
+    def select(self):
+        # called when the building tile is clicked on
+        self.game_data.colonies[self.game_data.active_colony].selected_building_tile_coords = (self.colum_index, self.line_index)
 
     # def on_mouse_motion(self):
     #     # if (mouse_x, mouse_y) in self.button_area, show a faded selector
@@ -196,19 +218,110 @@ class RigthWindowWidgetContent:
         "factory": "USINE"
     }
 
-    def __init__(self, game_data: GameData, building_icons_dict: dict[str, dict[str]], batch, groups):
+    # decoded building description documents, shared by every instance
+    # key = (building name, building level) or (building name, building level, smelting cycle percent) for the furnace
+    description_documents: dict[tuple, AbstractDocument] = {}
+
+    @staticmethod
+    def description_string(game_data: GameData, building_name: str, level: int, smelting_completed_percent: int = 0) -> str:
+        # attributed text describing a building at a given level
+        parameters = game_data.game_config["rules"].buildings[building_name].parameters_per_level[level]
+        # parameters of the next level, None if the building is at its maximum level
+        next_parameters = game_data.game_config["rules"].buildings[building_name].parameters_per_level.get(level + 1)
+        building_description_string = "{font_name '" + game_data.default_font_name + "'}{font_size 13}{color (255, 255, 255, 255)}"
+        if building_name == "headquarters":
+            building_description_string += "Le quartier général de la colonie. Offre un espace de stockage basique :\n\n\n"
+            building_description_string += "Nourriture : {bold True}" + str(parameters.storage["food"]) + "{bold False}\n\n"
+            building_description_string += "Solides (minerai et métaux) : {bold True}" + str(parameters.storage["iron"]) + "{bold False}\n\n"
+            building_description_string += "Liquides (eau, O2 et H2) : {bold True}" + str(parameters.storage["water"])
+        elif building_name == "warehouse":
+            building_description_string += "Les entrepôts permettent de stocker des matières solides : nourriture, minéraux et métaux raffinés.\n\n\n"
+            building_description_string += "Espace de stockage :\n\n"
+            if next_parameters is None:
+                building_description_string += "- Nourriture : {bold True}" + str(parameters.storage["food"]) + "{bold False}\n\n"
+                building_description_string += "- Minerai et métaux : {bold True}" + str(parameters.storage["iron"])
+            else:
+                building_description_string += "- Nourriture : {bold True}" + str(parameters.storage["food"]) + "{bold False}\n\n"
+                building_description_string += "- Minerai et métaux : {bold True}" + str(parameters.storage["iron"]) + "{bold False}\n\n"
+                building_description_string += "{italic True}Prochain niveau :{italic False}\n\n"
+                building_description_string += "- Nourriture : {bold True}" + str(next_parameters.storage["food"]) + "{bold False}\n\n"
+                building_description_string += "- Minerai et métaux : {bold True}" + str(next_parameters.storage["iron"])
+        elif building_name == "liquid_tank":
+            building_description_string += "Les réservoirs permettent de stocker des substances liquides : eau, oxygène et hydrogène.\n\n\n"
+            building_description_string += "Espace de stockage :\n\n"
+            building_description_string += "{bold True}" + str(parameters.storage["water"]) + "{bold False}\n\n"
+            if next_parameters is not None:
+                building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}"+ str(next_parameters.storage["water"])
+        elif building_name == "solar_panels":
+            building_description_string += "Les panneaux solaires permettent de produire de l'énergie électrique.\n\n\n"
+            building_description_string += "Energie produite :\n\n"
+            building_description_string += "{bold True}" + str(parameters.power.produced) + "{bold False}\n\n"
+            if next_parameters is not None:
+                building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}"+ str(next_parameters.power.produced)
+        elif building_name == "spaceport":
+            building_description_string += "Les ports spaciaux permettent de lancer des missions de transport."
+        else:
+            # production buildings
+            if building_name == "electrolysis_station":
+                building_description_string += "Les stations d'électrolyses transforment l'eau en oxygène et hydrogène liquide.\n\n\n"
+                building_description_string += "Ratio de transformation:\n\n{bold True}1 H2O -> 1/2 O2 + 1 H2{bold False}\n\n\n"
+            elif building_name == "greenhouse":
+                building_description_string += "Les Serres utilisent de l'eau pour produire de la nourriture et de l'oxygène.\n\n\n"
+                building_description_string += "Ratio de transformation:\n\n{bold True}1 H2O -> 5 nourriture + 1 02{bold False}\n\n\n"
+            elif building_name == "drilling_station":
+                building_description_string += "Les foreuses permettent d'extraire des matières premières du sol.\n\n\n"
+                building_description_string += "PRODUCTION :\n\n\n\n\n\n"
+            elif building_name == "furnace":
+                building_description_string += "Les fourneaux permettent de transformer les minerais en lingots de métal raffiné. {bold True}(5 minerais -> 1 lingot){bold False}\n\n\n"
+                building_description_string += "PRODUCTION :\t\t    CYCLE :\n\n\n"
+                building_description_string += "\t\t\t\t        " + str(smelting_completed_percent) + "%\n\n\n\n"
+            elif building_name == "school":
+                building_description_string += "Les écoles permettent d'entrainer de nouveaux colons.\n\n\n\n\n\n\n\n\n\n"
+            elif building_name == "factory":
+                building_description_string += "Les usines permettent de fabriquer des vaisseaux ou des modules.\n\n\n\n\n\n\n\n\n\n"
+            building_description_string += "Vitesse de production par poste :\n\n"
+            building_description_string += "{bold True}" + str(parameters.production_speed) + "x{bold False}\n\n"
+            if next_parameters is not None:
+                building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}" + \
+                    str(next_parameters.production_speed) + "x{bold False}\n\n"
+        return building_description_string
+
+    @classmethod
+    def description_document(cls, game_data: GameData, description_key: tuple) -> AbstractDocument:
+        # decode the description only the first time it is needed
+        document = cls.description_documents.get(description_key)
+        if document is None:
+            document = cls.description_documents[description_key] = decode_attributed(cls.description_string(game_data, *description_key))
+        return document
+
+    @classmethod
+    def precompile_description_documents(cls, game_data: GameData):
+        # decode the static descriptions of every building at every level
+        # (the furnace cycle percent is decoded on demand)
+        for building_name, building_config in game_data.game_config["rules"].buildings.items():
+            for level in building_config.parameters_per_level.keys():
+                if building_name == "furnace":
+                    cls.description_document(game_data, (building_name, level, 0))
+                else:
+                    cls.description_document(game_data, (building_name, level))
+
+    def __init__(self, game_data: GameData, building_icons_dict: dict[str, dict[str]], batch, groups, hit_test_index: HitTestIndex, is_displayed):
         # only called when the content of the right window has to be redrawn
         # contains the sprites and labels of the right window, according to the game state
         self.game_data = game_data
         self.building_icons_dict = building_icons_dict
         self.batch = batch
         self.groups = groups
+        # the buttons are registered in the hit-test index of the scene, is_displayed() tells if the content is still displayed
+        self.hit_test_index = hit_test_index
+        self.is_displayed = is_displayed
+        self.button_names: list[str] = []
         self.current_colony = self.game_data.colonies[self.game_data.active_colony]
         # the content of the right window
         self.content = {}
         if self.current_colony.selected_building_tile_coords is not None:
             # window sprite
-            self.content["window_sprite"] = Sprite(
+            self.content["window_sprite"] = IconSprite(
                 img = self.game_data.side_window,
                 x = self.game_data.window_width - self.game_data.side_window.width*2 - 15,
                 y=self.game_data.window_height // 2,
@@ -248,7 +361,7 @@ class RigthWindowWidgetContent:
                     )
                     # building_option["button_area"] = button_area
                     # building icons
-                    building_icon_impossible = Sprite(
+                    building_icon_impossible = IconSprite(
                         img = self.building_icons_dict[building_name]["icon_img_impossible"],
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 130,
                         y = self.game_data.window_height - 110 - int(building_index * 61.8),
@@ -258,7 +371,7 @@ class RigthWindowWidgetContent:
                     # building_icon_impossible.scale = self.building_icons_dict[building_name]["icon_scale"]
                     building_icon_impossible.scale = .15
                     building_option["building_icon_impossible"] = building_icon_impossible
-                    building_icon_possible = Sprite(
+                    building_icon_possible = IconSprite(
                         img = self.building_icons_dict[building_name]["icon_img_possible"],
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 130,
                         y = self.game_data.window_height - 110 - int(building_index * 61.8),
@@ -267,7 +380,7 @@ class RigthWindowWidgetContent:
                     )
                     building_icon_possible.scale = .15
                     building_option["building_icon_possible"] = building_icon_possible
-                    building_icon_hovered = Sprite(
+                    building_icon_hovered = IconSprite(
                         img = self.building_icons_dict[building_name]["icon_img_hovered"],
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 130,
                         y = self.game_data.window_height - 110 - int(building_index * 61.8),
@@ -277,7 +390,7 @@ class RigthWindowWidgetContent:
                     building_icon_hovered.scale = .15
                     building_option["building_icon_hovered"] = building_icon_hovered
                     # power icon
-                    power_icon = Sprite(
+                    power_icon = IconSprite(
                         img = self.game_data.icon_bolt_light_gray,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 60,
                         y = self.game_data.window_height - 110 - int(building_index * 61.8) + 13,
@@ -287,10 +400,10 @@ class RigthWindowWidgetContent:
                     power_icon.scale = .05
                     building_option["power_icon"] = power_icon
                     # building_parameters_per_level = self.current_colony.building_types_dict[building_name].parameters_per_level
-                    building_parameters_per_level = self.game_data.game_config["buildings"][building_name]["parameters_per_level"]
+                    building_parameters_per_level = self.game_data.game_config["rules"].buildings[building_name].parameters_per_level
                     # power label
-                    power_label_string = "{:+}".format(building_parameters_per_level[1]["power"]["produced"] -
-                                                       building_parameters_per_level[1]["power"]["consumed"])
+                    power_label_string = "{:+}".format(building_parameters_per_level[1].power.produced -
+                                                       building_parameters_per_level[1].power.consumed)
                     power_label = Label(power_label_string, font_name=self.game_data.default_font_name, font_size=14,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 60,
                         y = self.game_data.window_height - 110 - int(building_index * 61.8) - 20,
@@ -304,7 +417,7 @@ class RigthWindowWidgetContent:
                         anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[3])
                     building_option["iron_icon"] = iron_icon
                     # iron label
-                    iron_label_string = str(building_parameters_per_level[0]["construction_costs"]["iron"])
+                    iron_label_string = str(building_parameters_per_level[0].construction_costs["iron"])
                     iron_label = Label(iron_label_string, font_name=self.game_data.default_font_name, font_size=14,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 15,
                         y = self.game_data.window_height - 110 - int(building_index * 61.8) - 20,
@@ -318,7 +431,7 @@ class RigthWindowWidgetContent:
                         anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[3])
                     building_option["aluminium_icon"] = aluminium_icon
                     # aluminium label
-                    aluminium_label_string = str(building_parameters_per_level[0]["construction_costs"]["aluminium"])
+                    aluminium_label_string = str(building_parameters_per_level[0].construction_costs["aluminium"])
                     aluminium_label = Label(aluminium_label_string, font_name=self.game_data.default_font_name, font_size=14,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 + 30,
                         y = self.game_data.window_height - 110 - int(building_index * 61.8) - 20,
@@ -332,7 +445,7 @@ class RigthWindowWidgetContent:
                         anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[3])
                     building_option["copper_icon"] = copper_icon
                     # copper label
-                    copper_label_string = str(building_parameters_per_level[0]["construction_costs"]["copper"])
+                    copper_label_string = str(building_parameters_per_level[0].construction_costs["copper"])
                     copper_label = Label(copper_label_string, font_name=self.game_data.default_font_name, font_size=14,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 + 75,
                         y = self.game_data.window_height - 110 - int(building_index * 61.8) - 20,
@@ -346,7 +459,7 @@ class RigthWindowWidgetContent:
                         anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[3])
                     building_option["titanium_icon"] = titanium_icon
                     # titanium label
-                    titanium_label_string = str(building_parameters_per_level[0]["construction_costs"]["titanium"])
+                    titanium_label_string = str(building_parameters_per_level[0].construction_costs["titanium"])
                     titanium_label = Label(titanium_label_string, font_name=self.game_data.default_font_name, font_size=14,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 + 120,
                         y = self.game_data.window_height - 110 - int(building_index * 61.8) - 20,
@@ -356,7 +469,7 @@ class RigthWindowWidgetContent:
                 self.content["building_options_dict"] = building_options_dict
             else:
                 # window title
-                building_displayed_name = self.game_data.game_config["buildings"][self.selected_building.name]["displayed_name"]
+                building_displayed_name = self.game_data.game_config["rules"].buildings[self.selected_building.name].displayed_name
                 # self.content["title_label"] = Label(self.building_name_translation_en2fr[self.selected_building.name],
                 #     font_name=self.game_data.subtitle_font_name, font_size=15,
                 self.content["title_label"] = Label(building_displayed_name, font_name=self.game_data.subtitle_font_name, font_size=15,
@@ -387,7 +500,7 @@ class RigthWindowWidgetContent:
                     y = self.game_data.window_height - 110,
                     anchor_x="center", batch=self.batch, group=self.groups[2])
                 # building power
-                self.content["building_power_icon"] = Sprite(
+                self.content["building_power_icon"] = IconSprite(
                     img = self.game_data.icon_bolt_light_gray,
                     x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 + 60,
                     y = self.game_data.window_height - 105,
@@ -406,7 +519,7 @@ class RigthWindowWidgetContent:
                     y = self.game_data.window_height - 140,
                     anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
                 # engineers
-                self.content["production_jobs_engineers_icon"] = Sprite(
+                self.content["production_jobs_engineers_icon"] = IconSprite(
                     img = self.game_data.icon_wrench_light_gray,
                     x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 120,
                     y = self.game_data.window_height - 180,
@@ -476,7 +589,7 @@ class RigthWindowWidgetContent:
                     y = self.game_data.window_height - 200,
                     anchor_x="center", batch=self.batch, group=self.groups[3])
                 # scientists
-                self.content["production_jobs_scientists_icon"] = Sprite(
+                self.content["production_jobs_scientists_icon"] = IconSprite(
                     img = self.game_data.icon_vial_light_gray,
                     x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 120,
                     y = self.game_data.window_height - 230,
@@ -552,7 +665,7 @@ class RigthWindowWidgetContent:
                     y = self.game_data.window_height - 275,
                     anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
                 # engineers
-                self.content["construction_jobs_engineers_icon"] = Sprite(
+                self.content["construction_jobs_engineers_icon"] = IconSprite(
                     img = self.game_data.icon_wrench_light_gray,
                     x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 120,
                     y = self.game_data.window_height - 315,
@@ -642,7 +755,7 @@ class RigthWindowWidgetContent:
                     y = 70,
                     anchor_x="center", batch=self.batch, group=self.groups[2])
                 # upgrade cost
-                self.content["upgrade_power_icon"] = Sprite(
+                self.content["upgrade_power_icon"] = IconSprite(
                     img = self.game_data.icon_bolt_light_gray,
                     x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 140,
                     y = 85,
@@ -710,20 +823,13 @@ class RigthWindowWidgetContent:
                     y = 40,
                     anchor_x="center", batch=self.batch, group=self.groups[3])
                 # building specific stuff
-                self.style_description = "{font_name '" + self.game_data.default_font_name + "'}{font_size 13}{color (255, 255, 255, 255)}"
+                # key of the description document displayed in the description layout
+                self.description_key = None
                 if self.selected_building.name == "headquarters":
-                    # self.content["building_description_string"] = "{font_name '" + self.game_data.default_font_name + "'}{font_size 13}{color (255, 255, 255, 255)}"
-                    self.content["building_description_string"] = self.style_description
-                    self.content["building_description_string"] += "Le quartier général de la colonie. Offre un espace de stockage basique :\n\n\n"
-                    self.content["building_description_string"] += "Nourriture : {bold True}" + str(self.selected_building.parameters["storage"]["food"]) + "{bold False}\n\n"
-                    self.content["building_description_string"] += "Solides (minerai et métaux) : {bold True}" + str(self.selected_building.parameters["storage"]["iron"]) + "{bold False}\n\n"
-                    self.content["building_description_string"] += "Liquides (eau, O2 et H2) : {bold True}" + str(self.selected_building.parameters["storage"]["water"])
-                    # self.content["building_description_string"] = "TEST"
-                    # self.content["building_description_document"] = decode_attributed(self.content["building_description_string"])
-                    # print(self.content["building_description_document"].text)
-                    # the text layout object needs to be manually deleted
+                    # the description of the headquarters never changes
+                    self.description_key = (self.selected_building.name, self.selected_building.level)
                     self.content["building_description_layout"] = TextLayout(
-                        document = decode_attributed(self.content["building_description_string"]),
+                        document = self.description_document(self.game_data, self.description_key),
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 150,
                         y = self.game_data.window_height - 370,
                         width = 300,
@@ -767,7 +873,7 @@ class RigthWindowWidgetContent:
                         batch=self.batch,
                         group=self.groups[2]
                     )
-                    self.content["building_water_button_icon_light_gray"] = Sprite(
+                    self.content["building_water_button_icon_light_gray"] = IconSprite(
                         img = self.game_data.icon_water_light_gray,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 120,
                         y = self.game_data.window_height - 470,
@@ -775,7 +881,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_water_button_icon_light_gray"].scale = .15
-                    self.content["building_water_button_icon_green"] = Sprite(
+                    self.content["building_water_button_icon_green"] = IconSprite(
                         img = self.game_data.icon_water_green,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 120,
                         y = self.game_data.window_height - 470,
@@ -852,7 +958,7 @@ class RigthWindowWidgetContent:
                     # 1: scientists
                     # 2: pilots
                     # self.workers_options_list = list(self.selected_building.items_workload.keys())
-                    self.workers_options_list = list(self.game_data.game_config["workers_training_workload"].keys())
+                    self.workers_options_list = list(self.game_data.game_config["rules"].workers_training_workload.keys())
                     self.current_option_index = 0
                     self.content["building_description_layout"] = TextLayout(
                         document = decode_attributed(""),
@@ -875,7 +981,7 @@ class RigthWindowWidgetContent:
                         batch=self.batch,
                         group=self.groups[2]
                     )
-                    self.content["building_left_arrow_button_icon_white"] = Sprite(
+                    self.content["building_left_arrow_button_icon_white"] = IconSprite(
                         img = self.game_data.icon_left_chevron_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 130,
                         y = self.game_data.window_height - 440,
@@ -883,7 +989,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_left_arrow_button_icon_white"].scale = .2
-                    self.content["building_left_arrow_button_icon_green"] = Sprite(
+                    self.content["building_left_arrow_button_icon_green"] = IconSprite(
                         img = self.game_data.icon_left_chevron_green,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 130,
                         y = self.game_data.window_height - 440,
@@ -900,7 +1006,7 @@ class RigthWindowWidgetContent:
                         batch=self.batch,
                         group=self.groups[2]
                     )
-                    self.content["building_right_arrow_button_icon_white"] = Sprite(
+                    self.content["building_right_arrow_button_icon_white"] = IconSprite(
                         img = self.game_data.icon_right_chevron_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 + 130,
                         y = self.game_data.window_height - 440,
@@ -908,7 +1014,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_right_arrow_button_icon_white"].scale = .2
-                    self.content["building_right_arrow_button_icon_green"] = Sprite(
+                    self.content["building_right_arrow_button_icon_green"] = IconSprite(
                         img = self.game_data.icon_right_chevron_green,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 + 130,
                         y = self.game_data.window_height - 440,
@@ -927,7 +1033,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[2]
                     )
                     # workers icons
-                    self.content["building_engineers_icon_white"] = Sprite(
+                    self.content["building_engineers_icon_white"] = IconSprite(
                         img = self.game_data.icon_wrench_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 70,
                         y = self.game_data.window_height - 440,
@@ -935,7 +1041,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_engineers_icon_white"].scale = .18
-                    self.content["building_scientists_icon_white"] = Sprite(
+                    self.content["building_scientists_icon_white"] = IconSprite(
                         img = self.game_data.icon_vial_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 70,
                         y = self.game_data.window_height - 440,
@@ -943,7 +1049,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_scientists_icon_white"].scale = .15
-                    self.content["building_pilots_icon_white"] = Sprite(
+                    self.content["building_pilots_icon_white"] = IconSprite(
                         img = self.game_data.icon_plane_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 70,
                         y = self.game_data.window_height - 440,
@@ -952,7 +1058,7 @@ class RigthWindowWidgetContent:
                     )
                     self.content["building_pilots_icon_white"].scale = .15
                     # clock icon
-                    self.content["building_clock_icon_light_gray"] = Sprite(
+                    self.content["building_clock_icon_light_gray"] = IconSprite(
                         img = self.game_data.icon_clock_light_gray,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 + 40,
                         y = self.game_data.window_height - 430,
@@ -1036,7 +1142,7 @@ class RigthWindowWidgetContent:
                     self.content["building_training_queue_icons"] = []
                     for queue_index in range(5):
                         queue_icons = {}
-                        queue_icons["engineers"] = Sprite(
+                        queue_icons["engineers"] = IconSprite(
                             img = self.game_data.icon_wrench_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1044,7 +1150,7 @@ class RigthWindowWidgetContent:
                             group=self.groups[3]
                         )
                         queue_icons["engineers"].scale = .15
-                        queue_icons["scientists"] = Sprite(
+                        queue_icons["scientists"] = IconSprite(
                             img = self.game_data.icon_vial_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1052,7 +1158,7 @@ class RigthWindowWidgetContent:
                             group=self.groups[3]
                         )
                         queue_icons["scientists"].scale = .13
-                        queue_icons["pilots"] = Sprite(
+                        queue_icons["pilots"] = IconSprite(
                             img = self.game_data.icon_plane_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1076,7 +1182,7 @@ class RigthWindowWidgetContent:
                     # 5: passengers module
                     # 6: base module
                     # self.items_options_list = list(self.selected_building.items_price.keys())
-                    self.items_options_list = list(self.game_data.game_config["items_price"].keys())
+                    self.items_options_list = list(self.game_data.game_config["rules"].items_price.keys())
                     self.current_option_index = 0
                     self.content["building_description_layout"] = TextLayout(
                         document = decode_attributed(""),
@@ -1099,7 +1205,7 @@ class RigthWindowWidgetContent:
                         batch=self.batch,
                         group=self.groups[2]
                     )
-                    self.content["building_left_arrow_button_icon_white"] = Sprite(
+                    self.content["building_left_arrow_button_icon_white"] = IconSprite(
                         img = self.game_data.icon_left_chevron_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 130,
                         y = self.game_data.window_height - 440,
@@ -1107,7 +1213,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_left_arrow_button_icon_white"].scale = .2
-                    self.content["building_left_arrow_button_icon_green"] = Sprite(
+                    self.content["building_left_arrow_button_icon_green"] = IconSprite(
                         img = self.game_data.icon_left_chevron_green,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 130,
                         y = self.game_data.window_height - 440,
@@ -1124,7 +1230,7 @@ class RigthWindowWidgetContent:
                         batch=self.batch,
                         group=self.groups[2]
                     )
-                    self.content["building_right_arrow_button_icon_white"] = Sprite(
+                    self.content["building_right_arrow_button_icon_white"] = IconSprite(
                         img = self.game_data.icon_right_chevron_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 + 130,
                         y = self.game_data.window_height - 440,
@@ -1132,7 +1238,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_right_arrow_button_icon_white"].scale = .2
-                    self.content["building_right_arrow_button_icon_green"] = Sprite(
+                    self.content["building_right_arrow_button_icon_green"] = IconSprite(
                         img = self.game_data.icon_right_chevron_green,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 + 130,
                         y = self.game_data.window_height - 440,
@@ -1151,14 +1257,14 @@ class RigthWindowWidgetContent:
                         group=self.groups[2]
                     )
                     # items icons
-                    self.content["building_item_icon_spaceship_white"] = Sprite(
+                    self.content["building_item_icon_spaceship_white"] = IconSprite(
                         img = self.game_data.icon_spaceship_slanted_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 80,
                         y = self.game_data.window_height - 440,
                         batch=self.batch,
                         group=self.groups[3]
                     )
-                    self.content["building_item_icon_cargo_module_white"] = Sprite(
+                    self.content["building_item_icon_cargo_module_white"] = IconSprite(
                         img = self.game_data.icon_crate_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 80,
                         y = self.game_data.window_height - 440,
@@ -1166,7 +1272,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_item_icon_cargo_module_white"].scale = .15
-                    self.content["building_item_icon_tank_module_white"] = Sprite(
+                    self.content["building_item_icon_tank_module_white"] = IconSprite(
                         img = self.game_data.icon_barrel_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 80,
                         y = self.game_data.window_height - 440,
@@ -1174,7 +1280,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_item_icon_tank_module_white"].scale = .15
-                    self.content["building_item_icon_passengers_module_white"] = Sprite(
+                    self.content["building_item_icon_passengers_module_white"] = IconSprite(
                         img = self.game_data.icon_seat_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 80,
                         y = self.game_data.window_height - 440,
@@ -1182,7 +1288,7 @@ class RigthWindowWidgetContent:
                         group=self.groups[3]
                     )
                     self.content["building_item_icon_passengers_module_white"].scale = .15
-                    self.content["building_item_icon_base_module_white"] = Sprite(
+                    self.content["building_item_icon_base_module_white"] = IconSprite(
                         img = self.game_data.icon_house_white,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 80,
                         y = self.game_data.window_height - 440,
@@ -1191,7 +1297,7 @@ class RigthWindowWidgetContent:
                     )
                     self.content["building_item_icon_base_module_white"].scale = .15
                     # clock icon
-                    self.content["building_item_icon_clock_light_gray"] = Sprite(
+                    self.content["building_item_icon_clock_light_gray"] = IconSprite(
                         img = self.game_data.icon_clock_light_gray,
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 40,
                         y = self.game_data.window_height - 420,
@@ -1324,7 +1430,7 @@ class RigthWindowWidgetContent:
                     self.content["building_items_queue_icons"] = []
                     for queue_index in range(5):
                         queue_icons = {}
-                        queue_icons["spaceship_small"] = Sprite(
+                        queue_icons["spaceship_small"] = IconSprite(
                             img = self.game_data.icon_spaceship_slanted_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1332,7 +1438,7 @@ class RigthWindowWidgetContent:
                             group=self.groups[3]
                         )
                         queue_icons["spaceship_small"].scale = .07
-                        queue_icons["spaceship_medium"] = Sprite(
+                        queue_icons["spaceship_medium"] = IconSprite(
                             img = self.game_data.icon_spaceship_slanted_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1340,7 +1446,7 @@ class RigthWindowWidgetContent:
                             group=self.groups[3]
                         )
                         queue_icons["spaceship_medium"].scale = .11
-                        queue_icons["spaceship_large"] = Sprite(
+                        queue_icons["spaceship_large"] = IconSprite(
                             img = self.game_data.icon_spaceship_slanted_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1348,7 +1454,7 @@ class RigthWindowWidgetContent:
                             group=self.groups[3]
                         )
                         queue_icons["spaceship_large"].scale = .15
-                        queue_icons["module_cargo_hold"] = Sprite(
+                        queue_icons["module_cargo_hold"] = IconSprite(
                             img = self.game_data.icon_crate_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1356,7 +1462,7 @@ class RigthWindowWidgetContent:
                             group=self.groups[3]
                         )
                         queue_icons["module_cargo_hold"].scale = .13
-                        queue_icons["module_liquid_tanks"] = Sprite(
+                        queue_icons["module_liquid_tanks"] = IconSprite(
                             img = self.game_data.icon_barrel_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1364,7 +1470,7 @@ class RigthWindowWidgetContent:
                             group=self.groups[3]
                         )
                         queue_icons["module_liquid_tanks"].scale = .13
-                        queue_icons["module_passengers"] = Sprite(
+                        queue_icons["module_passengers"] = IconSprite(
                             img = self.game_data.icon_seat_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1372,7 +1478,7 @@ class RigthWindowWidgetContent:
                             group=self.groups[3]
                         )
                         queue_icons["module_passengers"].scale = .13
-                        queue_icons["module_headquarters"] = Sprite(
+                        queue_icons["module_headquarters"] = IconSprite(
                             img = self.game_data.icon_house_white,
                             x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112 + queue_index * 56,
                             y = self.game_data.window_height - 525,
@@ -1387,9 +1493,13 @@ class RigthWindowWidgetContent:
                         x = self.game_data.window_width - self.content["window_sprite"].width // 2 - 15 - 112,
                         y = self.game_data.window_height - 495,
                         anchor_x="center", batch=self.batch, group=self.groups[2])
+        # clickable buttons of the window
+        self.register_buttons()
 
     def on_draw(self):
         # redraw the colors and opacity of items in the window according to the game state
+        # button under the mouse, found by the hit-test index of the scene when the mouse moved
+        hovered_button = self.hit_test_index.hovered
         if self.current_colony.selected_building_tile_coords is not None:
             # selected_building = self.current_colony.selected_building
             if self.selected_building is None:
@@ -1400,10 +1510,9 @@ class RigthWindowWidgetContent:
                     building_option["building_icon_possible"].opacity = 0
                     building_option["building_icon_hovered"].opacity = 0
                     if self.current_colony.can_add_building(building_name):
-                        if (self.game_data.mouse_x, self.game_data.mouse_y) in building_option["button_area"]:
+                        if hovered_button == f"building_option_{building_name}":
                             building_option["button_area"].color = (192, 192, 192, 63)
                             building_option["building_icon_hovered"].opacity = 255
-                            self.game_data.mouse_clickable_area = True
                         else:
                             building_option["button_area"].color = (0, 0, 0, 0)
                             building_option["building_icon_possible"].opacity = 255
@@ -1413,36 +1522,32 @@ class RigthWindowWidgetContent:
                         building_option["building_icon_impossible"].opacity = 255
             else:
                 self.content["building_level_value"].text = str(self.selected_building.level)
-                self.content["building_power_value"].text = "{:+}".format(self.selected_building.parameters["power"]["produced"] -
-                                                                          self.selected_building.parameters["power"]["consumed"])
-                self.content["production_jobs_engineers_value"].text = f"{self.selected_building.assigned_workers["production"]["engineers"]}/{self.selected_building.parameters["jobs"]["production"]["engineers"]}"
-                self.content["production_jobs_scientists_value"].text = f"{self.selected_building.assigned_workers["production"]["scientists"]}/{self.selected_building.parameters["jobs"]["production"]["scientists"]}"
+                self.content["building_power_value"].text = "{:+}".format(self.selected_building.parameters.power.produced -
+                                                                          self.selected_building.parameters.power.consumed)
+                self.content["production_jobs_engineers_value"].text = f"{self.selected_building.assigned_workers["production"]["engineers"]}/{self.selected_building.parameters.jobs["production"]["engineers"]}"
+                self.content["production_jobs_scientists_value"].text = f"{self.selected_building.assigned_workers["production"]["scientists"]}/{self.selected_building.parameters.jobs["production"]["scientists"]}"
                 if self.selected_building.is_constructing:
-                    self.content["construction_jobs_value"].text = f"{self.selected_building.assigned_workers["construction"]["engineers"]}/{self.selected_building.parameters["jobs"]["construction"]["engineers"]}"
+                    self.content["construction_jobs_value"].text = f"{self.selected_building.assigned_workers["construction"]["engineers"]}/{self.selected_building.parameters.jobs["construction"]["engineers"]}"
                 else:
                     self.content["construction_jobs_value"].text = f"{self.selected_building.assigned_workers["construction"]["engineers"]}/0"
                 # production job engineers buttons
                 if self.selected_building.can_assign_worker(True, "production", "engineers"):
                     self.content["production_jobs_engineers_add_button_label"].color = (255, 255, 255, 255)
                     self.content["production_jobs_engineers_fill_button_label"].color = (255, 255, 255, 255)
-                    if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["production_jobs_engineers_add_button_area"]:
+                    if hovered_button == "production_jobs_engineers_add_button":
                         self.content["production_jobs_engineers_add_button_label"].color = (0, 255, 0, 255)
-                        self.game_data.mouse_clickable_area = True
-                    elif (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["production_jobs_engineers_fill_button_area"]:
+                    elif hovered_button == "production_jobs_engineers_fill_button":
                         self.content["production_jobs_engineers_fill_button_label"].color = (0, 255, 0, 255)
-                        self.game_data.mouse_clickable_area = True
                 else:
                     self.content["production_jobs_engineers_add_button_label"].color = (255, 255, 255, 100)
                     self.content["production_jobs_engineers_fill_button_label"].color = (255, 255, 255, 100)
                 if self.selected_building.can_assign_worker(False, "production", "engineers"):
                     self.content["production_jobs_engineers_remove_button_label"].color = (255, 255, 255, 255)
                     self.content["production_jobs_engineers_empty_button_label"].color = (255, 255, 255, 255)
-                    if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["production_jobs_engineers_remove_button_area"]:
+                    if hovered_button == "production_jobs_engineers_remove_button":
                         self.content["production_jobs_engineers_remove_button_label"].color = (255, 0, 0, 255)
-                        self.game_data.mouse_clickable_area = True
-                    elif (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["production_jobs_engineers_empty_button_area"]:
+                    elif hovered_button == "production_jobs_engineers_empty_button":
                         self.content["production_jobs_engineers_empty_button_label"].color = (255, 0, 0, 255)
-                        self.game_data.mouse_clickable_area = True
                 else:
                     self.content["production_jobs_engineers_remove_button_label"].color = (255, 255, 255, 100)
                     self.content["production_jobs_engineers_empty_button_label"].color = (255, 255, 255, 100)
@@ -1450,24 +1555,20 @@ class RigthWindowWidgetContent:
                 if self.selected_building.can_assign_worker(True, "production", "scientists"):
                     self.content["production_jobs_scientists_add_button_label"].color = (255, 255, 255, 255)
                     self.content["production_jobs_scientists_fill_button_label"].color = (255, 255, 255, 255)
-                    if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["production_jobs_scientists_add_button_area"]:
+                    if hovered_button == "production_jobs_scientists_add_button":
                         self.content["production_jobs_scientists_add_button_label"].color = (0, 255, 0, 255)
-                        self.game_data.mouse_clickable_area = True
-                    elif (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["production_jobs_scientists_fill_button_area"]:
+                    elif hovered_button == "production_jobs_scientists_fill_button":
                         self.content["production_jobs_scientists_fill_button_label"].color = (0, 255, 0, 255)
-                        self.game_data.mouse_clickable_area = True
                 else:
                     self.content["production_jobs_scientists_add_button_label"].color = (255, 255, 255, 100)
                     self.content["production_jobs_scientists_fill_button_label"].color = (255, 255, 255, 100)
                 if self.selected_building.can_assign_worker(False, "production", "scientists"):
                     self.content["production_jobs_scientists_remove_button_label"].color = (255, 255, 255, 255)
                     self.content["production_jobs_scientists_empty_button_label"].color = (255, 255, 255, 255)
-                    if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["production_jobs_scientists_remove_button_area"]:
+                    if hovered_button == "production_jobs_scientists_remove_button":
                         self.content["production_jobs_scientists_remove_button_label"].color = (255, 0, 0, 255)
-                        self.game_data.mouse_clickable_area = True
-                    elif (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["production_jobs_scientists_empty_button_area"]:
+                    elif hovered_button == "production_jobs_scientists_empty_button":
                         self.content["production_jobs_scientists_empty_button_label"].color = (255, 0, 0, 255)
-                        self.game_data.mouse_clickable_area = True
                 else:
                     self.content["production_jobs_scientists_remove_button_label"].color = (255, 255, 255, 100)
                     self.content["production_jobs_scientists_empty_button_label"].color = (255, 255, 255, 100)
@@ -1475,24 +1576,20 @@ class RigthWindowWidgetContent:
                 if self.selected_building.can_assign_worker(True, "construction", "engineers"):
                     self.content["construction_jobs_add_button_label"].color = (255, 255, 255, 255)
                     self.content["construction_jobs_fill_button_label"].color = (255, 255, 255, 255)
-                    if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["construction_jobs_add_button_area"]:
+                    if hovered_button == "construction_jobs_add_button":
                         self.content["construction_jobs_add_button_label"].color = (0, 255, 0, 255)
-                        self.game_data.mouse_clickable_area = True
-                    elif (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["construction_jobs_fill_button_area"]:
+                    elif hovered_button == "construction_jobs_fill_button":
                         self.content["construction_jobs_fill_button_label"].color = (0, 255, 0, 255)
-                        self.game_data.mouse_clickable_area = True
                 else:
                     self.content["construction_jobs_add_button_label"].color = (255, 255, 255, 100)
                     self.content["construction_jobs_fill_button_label"].color = (255, 255, 255, 100)
                 if self.selected_building.can_assign_worker(False, "construction", "engineers"):
                     self.content["construction_jobs_remove_button_label"].color = (255, 255, 255, 255)
                     self.content["construction_jobs_empty_button_label"].color = (255, 255, 255, 255)
-                    if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["construction_jobs_remove_button_area"]:
+                    if hovered_button == "construction_jobs_remove_button":
                         self.content["construction_jobs_remove_button_label"].color = (255, 0, 0, 255)
-                        self.game_data.mouse_clickable_area = True
-                    elif (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["construction_jobs_empty_button_area"]:
+                    elif hovered_button == "construction_jobs_empty_button":
                         self.content["construction_jobs_empty_button_label"].color = (255, 0, 0, 255)
-                        self.game_data.mouse_clickable_area = True
                 else:
                     self.content["construction_jobs_remove_button_label"].color = (255, 255, 255, 100)
                     self.content["construction_jobs_empty_button_label"].color = (255, 255, 255, 100)
@@ -1512,10 +1609,9 @@ class RigthWindowWidgetContent:
                     self.content["upgrade_titanium_label"].color = (192, 192, 192, 0)
                     # upgrade percent
                     self.content["upgrade_percent_label"].color = (192, 192, 192, 255)
-                    self.content["upgrade_percent_label"].text = f"{round(self.selected_building.construction_workload_completed * 100 / self.selected_building.parameters["construction_workload"])} %"
-                    if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["upgrade_button_area"]:
+                    self.content["upgrade_percent_label"].text = f"{round(self.selected_building.construction_workload_completed * 100 / self.selected_building.parameters.construction_workload)} %"
+                    if hovered_button == "upgrade_button":
                         self.content["upgrade_button_label"].color = (255, 127, 0, 255)
-                        self.game_data.mouse_clickable_area = True
                     else:
                         self.content["upgrade_button_label"].color = (255, 255, 255, 255)
                 else:
@@ -1538,111 +1634,49 @@ class RigthWindowWidgetContent:
                         self.content["upgrade_power_label"].color = (192, 192, 192, 255)
                         # self.content["upgrade_power_label"].text = "{:+}".format(
                         self.content["upgrade_power_label"].text = "-{}".format(
-                            # self.selected_building.parameters_per_level[self.selected_building.level + 1]["power"]["produced"] -
-                            # self.selected_building.parameters_per_level[self.selected_building.level + 1]["power"]["consumed"]
-                            - self.selected_building.parameters_per_level[self.selected_building.level + 1]["power"]["consumed"]
+                            # self.selected_building.parameters_per_level[self.selected_building.level + 1].power.produced -
+                            # self.selected_building.parameters_per_level[self.selected_building.level + 1].power.consumed
+                            - self.selected_building.parameters_per_level[self.selected_building.level + 1].power.consumed
                         )
                         self.content["upgrade_iron_icon"].color = (192, 192, 192, 255)
                         self.content["upgrade_iron_label"].color = (192, 192, 192, 255)
-                        self.content["upgrade_iron_label"].text = str(self.selected_building.parameters["construction_costs"]["iron"])
+                        self.content["upgrade_iron_label"].text = str(self.selected_building.parameters.construction_costs["iron"])
                         self.content["upgrade_aluminium_icon"].color = (192, 192, 192, 255)
                         self.content["upgrade_aluminium_label"].color = (192, 192, 192, 255)
-                        self.content["upgrade_aluminium_label"].text = str(self.selected_building.parameters["construction_costs"]["aluminium"])
+                        self.content["upgrade_aluminium_label"].text = str(self.selected_building.parameters.construction_costs["aluminium"])
                         self.content["upgrade_copper_icon"].color = (192, 192, 192, 255)
                         self.content["upgrade_copper_label"].color = (192, 192, 192, 255)
-                        self.content["upgrade_copper_label"].text = str(self.selected_building.parameters["construction_costs"]["copper"])
+                        self.content["upgrade_copper_label"].text = str(self.selected_building.parameters.construction_costs["copper"])
                         self.content["upgrade_titanium_icon"].color = (192, 192, 192, 255)
                         self.content["upgrade_titanium_label"].color = (192, 192, 192, 255)
-                        self.content["upgrade_titanium_label"].text = str(self.selected_building.parameters["construction_costs"]["titanium"])
+                        self.content["upgrade_titanium_label"].text = str(self.selected_building.parameters.construction_costs["titanium"])
                     # upgrade percent
                     self.content["upgrade_percent_label"].color = (192, 192, 192, 0)
                     if self.current_colony.can_upgrade_building():
-                        if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["upgrade_button_area"]:
+                        if hovered_button == "upgrade_button":
                             self.content["upgrade_button_label"].color = (0, 255, 0, 255)
-                            self.game_data.mouse_clickable_area = True
                         else:
                             self.content["upgrade_button_label"].color = (255, 255, 255, 255)
                     else:
                         self.content["upgrade_button_label"].color = (255, 255, 255, 100)
                 # destroy button
                 if self.current_colony.can_destroy_building():
-                    if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["destroy_button_area"]:
+                    if hovered_button == "destroy_button":
                         self.content["destroy_button_label"].color = (255, 0, 0, 255)
-                        self.game_data.mouse_clickable_area = True
                     else:
                         self.content["destroy_button_label"].color = (255, 255, 255, 255)
                 else:
                     self.content["destroy_button_label"].color = (255, 255, 255, 100)
+                # building description, the layout document is only swapped when the description changes
+                if self.selected_building.name == "furnace":
+                    description_key = (self.selected_building.name, self.selected_building.level, round(self.selected_building.smelting_completed_percent))
+                else:
+                    description_key = (self.selected_building.name, self.selected_building.level)
+                if description_key != self.description_key:
+                    self.content["building_description_layout"].document = self.description_document(self.game_data, description_key)
+                    self.description_key = description_key
                 # building specific stuff
-                building_description_string = self.style_description
-                if self.selected_building.name == "warehouse":
-                    # building_description_string = self.style_description
-                    building_description_string += "Les entrepôts permettent de stocker des matières solides : nourriture, minéraux et métaux raffinés.\n\n\n"
-                    building_description_string += "Espace de stockage :\n\n"
-                    if self.selected_building.level == self.selected_building.level_max:
-                        building_description_string += "- Nourriture : {bold True}" + str(self.selected_building.parameters["storage"]["food"]) + "{bold False}\n\n"
-                        building_description_string += "- Minerai et métaux : {bold True}" + str(self.selected_building.parameters["storage"]["iron"])
-                    else:
-                        # building_description_string += "{italic True}Niveau actuel :{italic False}\n\n"
-                        building_description_string += "- Nourriture : {bold True}" + str(self.selected_building.parameters["storage"]["food"]) + "{bold False}\n\n"
-                        building_description_string += "- Minerai et métaux : {bold True}" + str(self.selected_building.parameters["storage"]["iron"]) + "{bold False}\n\n"
-                        building_description_string += "{italic True}Prochain niveau :{italic False}\n\n"
-                        building_description_string += "- Nourriture : {bold True}" + str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["storage"]["food"]) + "{bold False}\n\n"
-                        building_description_string += "- Minerai et métaux : {bold True}" + str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["storage"]["iron"])
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
-                elif self.selected_building.name == "liquid_tank":
-                    # building_description_string = self.style_description
-                    building_description_string += "Les réservoirs permettent de stocker des substances liquides : eau, oxygène et hydrogène.\n\n\n"
-                    building_description_string += "Espace de stockage :\n\n"
-                    # if self.selected_building.level == self.selected_building.level_max:
-                    building_description_string += "{bold True}" + str(self.selected_building.parameters["storage"]["water"]) + "{bold False}\n\n"
-                    if self.selected_building.level != self.selected_building.level_max:
-                        # building_description_string += "{italic True}Niveau actuel :{italic False} {bold True}" + str(self.selected_building.parameters["storage"]["water"]) + "{bold False}\n\n"
-                        # building_description_string += "{bold True}" + str(self.selected_building.parameters["storage"]["water"]) + "{bold False}\n\n"
-                        building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}"+ str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["storage"]["water"])
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
-                elif self.selected_building.name == "solar_panels":
-                    # building_description_string = self.style_description
-                    building_description_string += "Les panneaux solaires permettent de produire de l'énergie électrique.\n\n\n"
-                    building_description_string += "Energie produite :\n\n"
-                    building_description_string += "{bold True}" + str(self.selected_building.parameters["power"]["produced"]) + "{bold False}\n\n"
-                    if self.selected_building.level != self.selected_building.level_max:
-                        building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}"+ str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["power"]["produced"])
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
-                elif self.selected_building.name == "electrolysis_station":
-                    # building_description_string = self.style_description
-                    building_description_string += "Les stations d'électrolyses transforment l'eau en oxygène et hydrogène liquide.\n\n\n"
-                    building_description_string += "Ratio de transformation:\n\n{bold True}1 H2O -> 1/2 O2 + 1 H2{bold False}\n\n\n"
-                    building_description_string += "Vitesse de production par poste :\n\n"
-                    building_description_string += "{bold True}" + str(self.selected_building.parameters["production_speed"]) + "x{bold False}\n\n"
-                    if self.selected_building.level != self.selected_building.level_max:
-                        building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}" + \
-                            str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["production_speed"]) + "x{bold False}\n\n"
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
-                elif self.selected_building.name == "greenhouse":
-                    # building_description_string = self.style_description
-                    building_description_string += "Les Serres utilisent de l'eau pour produire de la nourriture et de l'oxygène.\n\n\n"
-                    building_description_string += "Ratio de transformation:\n\n{bold True}1 H2O -> 5 nourriture + 1 02{bold False}\n\n\n"
-                    building_description_string += "Vitesse de production par poste :\n\n"
-                    building_description_string += "{bold True}" + str(self.selected_building.parameters["production_speed"]) + "x{bold False}\n\n"
-                    if self.selected_building.level != self.selected_building.level_max:
-                        building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}" + \
-                            str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["production_speed"]) + "x{bold False}\n\n"
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
-                elif self.selected_building.name == "spaceport":
-                    # building_description_string = self.style_description
-                    building_description_string += "Les ports spaciaux permettent de lancer des missions de transport."
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
-                elif self.selected_building.name == "drilling_station":
-                    # building_description_string = self.style_description
-                    building_description_string += "Les foreuses permettent d'extraire des matières premières du sol.\n\n\n"
-                    building_description_string += "PRODUCTION :\n\n\n\n\n\n"
-                    building_description_string += "Vitesse de production par poste :\n\n"
-                    building_description_string += "{bold True}" + str(self.selected_building.parameters["production_speed"]) + "x{bold False}\n\n"
-                    if self.selected_building.level != self.selected_building.level_max:
-                        building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}" + \
-                            str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["production_speed"]) + "x{bold False}\n\n"
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
+                if self.selected_building.name == "drilling_station":
                     # water button
                     if self.selected_building.resource_produced == "water":
                         # cannot select water, draw icon green
@@ -1653,9 +1687,8 @@ class RigthWindowWidgetContent:
                         # can select water, draw icon gray
                         self.content["building_water_button_icon_light_gray"].opacity = 255
                         self.content["building_water_button_icon_green"].opacity = 0
-                        if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_water_button_area"]:
+                        if hovered_button == "building_water_button":
                             self.content["building_water_button_area"].color = (192, 192, 192, 63)
-                            self.game_data.mouse_clickable_area = True
                         else:
                             self.content["building_water_button_area"].color = (192, 192, 192, 0)
                     # ore buttons
@@ -1667,22 +1700,11 @@ class RigthWindowWidgetContent:
                         else:
                             # can select resource, draw icon gray
                             self.content["building_ore_production_options"][resource]["icon"].color = (192, 192, 192, 255)
-                            if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_ore_production_options"][resource]["button_area"]:
+                            if hovered_button == f"building_ore_production_option_{resource}":
                                 self.content["building_ore_production_options"][resource]["button_area"].color = (192, 192, 192, 63)
-                                self.game_data.mouse_clickable_area = True
                             else:
                                 self.content["building_ore_production_options"][resource]["button_area"].color = (192, 192, 192, 0)
                 elif self.selected_building.name == "furnace":
-                    # building_description_string = self.style_description
-                    building_description_string += "Les fourneaux permettent de transformer les minerais en lingots de métal raffiné. {bold True}(5 minerais -> 1 lingot){bold False}\n\n\n"
-                    building_description_string += "PRODUCTION :\t\t    CYCLE :\n\n\n"
-                    building_description_string += "\t\t\t\t        " + str(round(self.selected_building.smelting_completed_percent)) + "%\n\n\n\n"
-                    building_description_string += "Vitesse de production par poste :\n\n"
-                    building_description_string += "{bold True}" + str(self.selected_building.parameters["production_speed"]) + "x{bold False}\n\n"
-                    if self.selected_building.level != self.selected_building.level_max:
-                        building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}" + \
-                            str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["production_speed"]) + "x{bold False}\n\n"
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
                     # production buttons
                     for resource in self.content["building_metal_production_options"].keys():
                         if self.selected_building.resource_produced == resource:
@@ -1692,31 +1714,21 @@ class RigthWindowWidgetContent:
                         else:
                             # can select resource, draw icon gray
                             self.content["building_metal_production_options"][resource]["icon"].color = (192, 192, 192, 255)
-                            if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_metal_production_options"][resource]["button_area"]:
+                            if hovered_button == f"building_metal_production_option_{resource}":
                                 self.content["building_metal_production_options"][resource]["button_area"].color = (192, 192, 192, 63)
-                                self.game_data.mouse_clickable_area = True
                             else:
                                 self.content["building_metal_production_options"][resource]["button_area"].color = (192, 192, 192, 0)
                 elif self.selected_building.name == "school":
-                    # building_description_string = self.style_description
-                    building_description_string += "Les écoles permettent d'entrainer de nouveaux colons.\n\n\n\n\n\n\n\n\n\n"
-                    building_description_string += "Vitesse de production par poste :\n\n"
-                    building_description_string += "{bold True}" + str(self.selected_building.parameters["production_speed"]) + "x{bold False}\n\n"
-                    if self.selected_building.level != self.selected_building.level_max:
-                        building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}" + \
-                            str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["production_speed"]) + "x{bold False}\n\n"
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
                     # left arrow
                     if self.current_option_index == 0:
                         # show grayed out icon
                         self.content["building_left_arrow_button_icon_white"].opacity = 100
                         self.content["building_left_arrow_button_icon_green"].opacity = 0
                     else:
-                        if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_left_arrow_button_area"]:
+                        if hovered_button == "building_left_arrow_button":
                             # show green icon
                             self.content["building_left_arrow_button_icon_white"].opacity = 0
                             self.content["building_left_arrow_button_icon_green"].opacity = 255
-                            self.game_data.mouse_clickable_area = True
                         else:
                             # show white icon
                             self.content["building_left_arrow_button_icon_white"].opacity = 255
@@ -1727,11 +1739,10 @@ class RigthWindowWidgetContent:
                         self.content["building_right_arrow_button_icon_white"].opacity = 100
                         self.content["building_right_arrow_button_icon_green"].opacity = 0
                     else:
-                        if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_right_arrow_button_area"]:
+                        if hovered_button == "building_right_arrow_button":
                             # show green icon
                             self.content["building_right_arrow_button_icon_white"].opacity = 0
                             self.content["building_right_arrow_button_icon_green"].opacity = 255
-                            self.game_data.mouse_clickable_area = True
                         else:
                             # show white icon
                             self.content["building_right_arrow_button_icon_white"].opacity = 255
@@ -1748,11 +1759,10 @@ class RigthWindowWidgetContent:
                         self.content["building_pilots_icon_white"].opacity = 255
                     # worker training workload label
                     # self.content["building_item_workload_label"].text = str(self.selected_building.items_workload[self.workers_options_list[self.current_option_index]])
-                    self.content["building_item_workload_label"].text = str(self.game_data.game_config["workers_training_workload"][self.workers_options_list[self.current_option_index]])
+                    self.content["building_item_workload_label"].text = str(self.game_data.game_config["rules"].workers_training_workload[self.workers_options_list[self.current_option_index]])
                     # add worker button
-                    if ((self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_add_item_button_area"]) and self.selected_building.can_add_worker():
+                    if (hovered_button == "building_add_item_button") and self.selected_building.can_add_worker():
                         self.content["building_add_item_button_area"].color = (192, 192, 192, 63)
-                        self.game_data.mouse_clickable_area = True
                     else:
                         self.content["building_add_item_button_area"].color = (192, 192, 192, 0)
                     # queue items
@@ -1769,39 +1779,29 @@ class RigthWindowWidgetContent:
                         self.content["building_item_percent_label"].text = "0%"
                     else:
                         # self.content["building_item_percent_label"].text = str(round(self.selected_building.training_workload_completed * 100 / self.selected_building.items_workload[self.selected_building.training_queue[0]])) + "%"
-                        self.content["building_item_percent_label"].text = str(round(self.selected_building.training_workload_completed * 100 / self.game_data.game_config["workers_training_workload"][self.selected_building.training_queue[0]])) + "%"
+                        self.content["building_item_percent_label"].text = str(round(self.selected_building.training_workload_completed * 100 / self.game_data.game_config["rules"].workers_training_workload[self.selected_building.training_queue[0]])) + "%"
 
                     # cancel first item button
-                    if self.selected_building.can_cancel_training() and ((self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_cancel_first_item_button_area"]):
+                    if self.selected_building.can_cancel_training() and (hovered_button == "building_cancel_first_item_button"):
                         self.content["building_cancel_first_item_button_area"].color = (192, 192, 192, 63)
-                        self.game_data.mouse_clickable_area = True
                     else:
                         self.content["building_cancel_first_item_button_area"].color = (192, 192, 192, 0)
                     # empty queue button
-                    if self.selected_building.can_clear_queue() and (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_empty_queue_button_area"]:
+                    if self.selected_building.can_clear_queue() and hovered_button == "building_empty_queue_button":
                         self.content["building_empty_queue_button_area"].color = (192, 192, 192, 63)
-                        self.game_data.mouse_clickable_area = True
                     else:
                         self.content["building_empty_queue_button_area"].color = (192, 192, 192, 0)
                 elif self.selected_building.name == "factory":
-                    building_description_string += "Les usines permettent de fabriquer des vaisseaux ou des modules.\n\n\n\n\n\n\n\n\n\n"
-                    building_description_string += "Vitesse de production par poste :\n\n"
-                    building_description_string += "{bold True}" + str(self.selected_building.parameters["production_speed"]) + "x{bold False}\n\n"
-                    if self.selected_building.level != self.selected_building.level_max:
-                        building_description_string += "{italic True}Prochain niveau :{italic False} {bold True}" + \
-                            str(self.selected_building.parameters_per_level[self.selected_building.level + 1]["production_speed"]) + "x{bold False}\n\n"
-                    self.content["building_description_layout"].document = decode_attributed(building_description_string)
                     # left arrow
                     if self.current_option_index == 0:
                         # show grayed out icon
                         self.content["building_left_arrow_button_icon_white"].opacity = 100
                         self.content["building_left_arrow_button_icon_green"].opacity = 0
                     else:
-                        if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_left_arrow_button_area"]:
+                        if hovered_button == "building_left_arrow_button":
                             # show green icon
                             self.content["building_left_arrow_button_icon_white"].opacity = 0
                             self.content["building_left_arrow_button_icon_green"].opacity = 255
-                            self.game_data.mouse_clickable_area = True
                         else:
                             # show white icon
                             self.content["building_left_arrow_button_icon_white"].opacity = 255
@@ -1812,19 +1812,17 @@ class RigthWindowWidgetContent:
                         self.content["building_right_arrow_button_icon_white"].opacity = 100
                         self.content["building_right_arrow_button_icon_green"].opacity = 0
                     else:
-                        if (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_right_arrow_button_area"]:
+                        if hovered_button == "building_right_arrow_button":
                             # show green icon
                             self.content["building_right_arrow_button_icon_white"].opacity = 0
                             self.content["building_right_arrow_button_icon_green"].opacity = 255
-                            self.game_data.mouse_clickable_area = True
                         else:
                             # show white icon
                             self.content["building_right_arrow_button_icon_white"].opacity = 255
                             self.content["building_right_arrow_button_icon_green"].opacity = 0
                     # add item button
-                    if ((self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_add_item_button_area"]) and self.selected_building.can_make_item(self.items_options_list[self.current_option_index]):
+                    if (hovered_button == "building_add_item_button") and self.selected_building.can_make_item(self.items_options_list[self.current_option_index]):
                         self.content["building_add_item_button_area"].color = (192, 192, 192, 63)
-                        self.game_data.mouse_clickable_area = True
                     else:
                         self.content["building_add_item_button_area"].color = (192, 192, 192, 0)
                     # items icon
@@ -1856,11 +1854,11 @@ class RigthWindowWidgetContent:
                     # self.content["building_item_aluminium_price_label"].text = str(self.selected_building.items_price[self.items_options_list[self.current_option_index]]["resources"]["aluminium"])
                     # self.content["building_item_copper_price_label"].text = str(self.selected_building.items_price[self.items_options_list[self.current_option_index]]["resources"]["copper"])
                     # self.content["building_item_titanium_price_label"].text = str(self.selected_building.items_price[self.items_options_list[self.current_option_index]]["resources"]["titanium"])
-                    self.content["building_item_workload_label"].text = str(self.game_data.game_config["items_price"][self.items_options_list[self.current_option_index]]["workload"])
-                    self.content["building_item_iron_price_label"].text = str(self.game_data.game_config["items_price"][self.items_options_list[self.current_option_index]]["resources"]["iron"])
-                    self.content["building_item_aluminium_price_label"].text = str(self.game_data.game_config["items_price"][self.items_options_list[self.current_option_index]]["resources"]["aluminium"])
-                    self.content["building_item_copper_price_label"].text = str(self.game_data.game_config["items_price"][self.items_options_list[self.current_option_index]]["resources"]["copper"])
-                    self.content["building_item_titanium_price_label"].text = str(self.game_data.game_config["items_price"][self.items_options_list[self.current_option_index]]["resources"]["titanium"])
+                    self.content["building_item_workload_label"].text = str(self.game_data.game_config["rules"].items_price[self.items_options_list[self.current_option_index]].workload)
+                    self.content["building_item_iron_price_label"].text = str(self.game_data.game_config["rules"].items_price[self.items_options_list[self.current_option_index]].resources["iron"])
+                    self.content["building_item_aluminium_price_label"].text = str(self.game_data.game_config["rules"].items_price[self.items_options_list[self.current_option_index]].resources["aluminium"])
+                    self.content["building_item_copper_price_label"].text = str(self.game_data.game_config["rules"].items_price[self.items_options_list[self.current_option_index]].resources["copper"])
+                    self.content["building_item_titanium_price_label"].text = str(self.game_data.game_config["rules"].items_price[self.items_options_list[self.current_option_index]].resources["titanium"])
                     # queue items
                     # hide all icons
                     for queue_index in range(5):
@@ -1879,140 +1877,120 @@ class RigthWindowWidgetContent:
                         self.content["building_item_percent_label"].text = "0%"
                     else:
                         # self.content["building_item_percent_label"].text = str(round(self.selected_building.item_workload_completed * 100 / self.selected_building.items_price[self.selected_building.items_queue[0]]["workload"])) + "%"
-                        self.content["building_item_percent_label"].text = str(round(self.selected_building.item_workload_completed * 100 / self.game_data.game_config["items_price"][self.selected_building.items_queue[0]]["workload"])) + "%"
+                        self.content["building_item_percent_label"].text = str(round(self.selected_building.item_workload_completed * 100 / self.game_data.game_config["rules"].items_price[self.selected_building.items_queue[0]].workload)) + "%"
                     # cancel first item button
-                    if self.selected_building.can_cancel_item() and ((self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_cancel_first_item_button_area"]):
+                    if self.selected_building.can_cancel_item() and (hovered_button == "building_cancel_first_item_button"):
                         self.content["building_cancel_first_item_button_area"].color = (192, 192, 192, 63)
-                        self.game_data.mouse_clickable_area = True
                     else:
                         self.content["building_cancel_first_item_button_area"].color = (192, 192, 192, 0)
                     # empty queue button
-                    if self.selected_building.can_clear_queue() and (self.game_data.mouse_x, self.game_data.mouse_y) in self.content["building_empty_queue_button_area"]:
+                    if self.selected_building.can_clear_queue() and hovered_button == "building_empty_queue_button":
                         self.content["building_empty_queue_button_area"].color = (192, 192, 192, 63)
-                        self.game_data.mouse_clickable_area = True
                     else:
                         self.content["building_empty_queue_button_area"].color = (192, 192, 192, 0)
 
-    def on_mouse_press(self, x, y):
-        # check if a building tile is selected
-        if self.current_colony.selected_building_tile_coords is not None:
-            # check which building is on the tile
-            if self.selected_building is None:
-                # check which option has been clicked on
-                for building_name in self.content["building_options_dict"].keys():
-                    if (x, y) in self.content["building_options_dict"][building_name]["button_area"]:
-                        # print(building_name)
-                        # add the building to the colony if possible
-                        self.current_colony.add_building(building_name)
+    def add_button(self, name: str, on_click, clickable=None):
+        # register the button area self.content[name + "_area"] in the hit-test index of the scene
+        self.add_button_area(name, self.content[f"{name}_area"], on_click, clickable)
+
+    def add_button_area(self, name: str, button_area: shapes.Rectangle, on_click, clickable=None):
+        # the clicks are ignored once the content is not the one displayed anymore (the state changed since the last frame)
+        def click():
+            if self.is_displayed():
+                on_click()
+        def is_clickable() -> bool:
+            return self.is_displayed() and ((clickable is None) or clickable())
+        self.hit_test_index.add(name, button_area, click, is_clickable)
+        self.button_names.append(name)
+
+    def register_buttons(self):
+        # register the buttons of the window: the action of a click on each of them,
+        # and whether the mouse cursor shows them as clickable
+        if self.current_colony.selected_building_tile_coords is None:
+            return
+        if self.selected_building is None:
+            # add the building to the colony if possible
+            for building_name, building_option in self.content["building_options_dict"].items():
+                self.add_button_area(f"building_option_{building_name}", building_option["button_area"],
+                    partial(self.current_colony.add_building, building_name), partial(self.current_colony.can_add_building, building_name))
+            return
+        building = self.selected_building
+        # jobs buttons: +1 / fill / -1 / empty
+        for jobs_name, job_type, worker_type in (("production_jobs_engineers", "production", "engineers"),
+                                                 ("production_jobs_scientists", "production", "scientists"),
+                                                 ("construction_jobs", "construction", "engineers")):
+            can_add_worker = partial(building.can_assign_worker, True, job_type, worker_type)
+            can_remove_worker = partial(building.can_assign_worker, False, job_type, worker_type)
+            self.add_button(f"{jobs_name}_add_button", partial(building.assign_worker, True, job_type, worker_type), can_add_worker)
+            self.add_button(f"{jobs_name}_fill_button", partial(building.assign_worker, True, job_type, worker_type, True), can_add_worker)
+            self.add_button(f"{jobs_name}_remove_button", partial(building.assign_worker, False, job_type, worker_type), can_remove_worker)
+            self.add_button(f"{jobs_name}_empty_button", partial(building.assign_worker, False, job_type, worker_type, True), can_remove_worker)
+        self.add_button("upgrade_button", self.on_upgrade_button_click,
+            lambda: building.is_constructing or self.current_colony.can_upgrade_building())
+        self.add_button("destroy_button", self.current_colony.destroy_building, self.current_colony.can_destroy_building)
+        # building specific stuff
+        if building.name == "drilling_station":
+            self.add_button("building_water_button", partial(building.produce, "water"), lambda: building.resource_produced != "water")
+            for resource, production_option in self.content["building_ore_production_options"].items():
+                self.add_button_area(f"building_ore_production_option_{resource}", production_option["button_area"],
+                    partial(building.produce, resource), lambda resource=resource: building.resource_produced != resource)
+        elif building.name == "furnace":
+            for resource, production_option in self.content["building_metal_production_options"].items():
+                self.add_button_area(f"building_metal_production_option_{resource}", production_option["button_area"],
+                    partial(building.switch_production, resource), lambda resource=resource: building.resource_produced != resource)
+        elif building.name in ("school", "factory"):
+            options_list = self.workers_options_list if building.name == "school" else self.items_options_list
+            self.add_button("building_left_arrow_button", self.on_left_arrow_button_click, lambda: self.current_option_index != 0)
+            self.add_button("building_right_arrow_button", self.on_right_arrow_button_click,
+                lambda: self.current_option_index != len(options_list) - 1)
+            if building.name == "school":
+                # try to add the worker to the queue, cancel the first worker of the queue, empty the queue
+                self.add_button("building_add_item_button", lambda: building.add_worker_to_queue(self.workers_options_list[self.current_option_index]),
+                    building.can_add_worker)
+                self.add_button("building_cancel_first_item_button", building.cancel_training, building.can_cancel_training)
             else:
-                if (x, y) in self.content["production_jobs_engineers_add_button_area"]:
-                    # print("+1 engineer production")
-                    self.selected_building.assign_worker(True, "production", "engineers")
-                elif (x, y) in self.content["production_jobs_engineers_fill_button_area"]:
-                    # print("fill engineer production")
-                    self.selected_building.assign_worker(True, "production", "engineers", True)
-                elif (x, y) in self.content["production_jobs_engineers_remove_button_area"]:
-                    # print("-1 engineer production")
-                    self.selected_building.assign_worker(False, "production", "engineers")
-                elif (x, y) in self.content["production_jobs_engineers_empty_button_area"]:
-                    # print("empty engineer production")
-                    self.selected_building.assign_worker(False, "production", "engineers", True)
-                elif (x, y) in self.content["production_jobs_scientists_add_button_area"]:
-                    # print("+1 scientist production")
-                    self.selected_building.assign_worker(True, "production", "scientists")
-                elif (x, y) in self.content["production_jobs_scientists_fill_button_area"]:
-                    # print("fill scientist production")
-                    self.selected_building.assign_worker(True, "production", "scientists", True)
-                elif (x, y) in self.content["production_jobs_scientists_remove_button_area"]:
-                    # print("-1 scientist production")
-                    self.selected_building.assign_worker(False, "production", "scientists")
-                elif (x, y) in self.content["production_jobs_scientists_empty_button_area"]:
-                    # print("empty scientist production")
-                    self.selected_building.assign_worker(False, "production", "scientists", True)
-                elif (x, y) in self.content["construction_jobs_add_button_area"]:
-                    # print("+1 construction")
-                    self.selected_building.assign_worker(True, "construction", "engineers")
-                elif (x, y) in self.content["construction_jobs_fill_button_area"]:
-                    # print("fill construction")
-                    self.selected_building.assign_worker(True, "construction", "engineers", True)
-                elif (x, y) in self.content["construction_jobs_remove_button_area"]:
-                    # print("-1 construction")
-                    self.selected_building.assign_worker(False, "construction", "engineers")
-                elif (x, y) in self.content["construction_jobs_empty_button_area"]:
-                    # print("empty construction")
-                    self.selected_building.assign_worker(False, "construction", "engineers", True)
-                elif (x, y) in self.content["upgrade_button_area"]:
-                    if self.selected_building.is_constructing:
-                        self.current_colony.cancel_building_construction()
-                    else:
-                        if self.current_colony.can_upgrade_building():
-                            self.selected_building.upgrade()
-                elif (x, y) in self.content["destroy_button_area"]:
-                    self.current_colony.destroy_building()
-                else:
-                    # building specific stuff
-                    if self.selected_building.name == "drilling_station":
-                        # click on water
-                        if (x, y) in self.content["building_water_button_area"]:
-                            self.selected_building.produce("water")
-                        # click on ore
-                        else:
-                            for resource in self.content["building_ore_production_options"].keys():
-                                if (x, y) in self.content["building_ore_production_options"][resource]["button_area"]:
-                                    self.selected_building.produce(resource)
-                    elif self.selected_building.name == "furnace":
-                        for resource in self.content["building_metal_production_options"].keys():
-                            if (x, y) in self.content["building_metal_production_options"][resource]["button_area"]:
-                                self.selected_building.switch_production(resource)
-                    elif self.selected_building.name == "school":
-                        # click on left arrow
-                        if (x, y) in self.content["building_left_arrow_button_area"]:
-                            self.current_option_index = max(0, self.current_option_index - 1)
-                        # click on right arrow
-                        elif (x, y) in self.content["building_right_arrow_button_area"]:
-                            self.current_option_index = min(len(self.workers_options_list) - 1, self.current_option_index + 1)
-                        # click on item
-                        elif (x, y) in self.content["building_add_item_button_area"]:
-                            # try to add the item to the queue
-                            self.selected_building.add_worker_to_queue(self.workers_options_list[self.current_option_index])
-                        elif (x, y) in self.content["building_cancel_first_item_button_area"]:
-                            # cancel the first item of the queue
-                            self.selected_building.cancel_training()
-                        elif (x, y) in self.content["building_empty_queue_button_area"]:
-                            # empty the queue
-                            self.selected_building.clear_queue()
-                    elif self.selected_building.name == "factory":
-                        # click on left arrow
-                        if (x, y) in self.content["building_left_arrow_button_area"]:
-                            self.current_option_index = max(0, self.current_option_index - 1)
-                        # click on right arrow
-                        elif (x, y) in self.content["building_right_arrow_button_area"]:
-                            self.current_option_index = min(len(self.items_options_list) - 1, self.current_option_index + 1)
-                        # click on item
-                        elif (x, y) in self.content["building_add_item_button_area"]:
-                            # try to add the item to the queue
-                            self.selected_building.add_item_to_queue(self.items_options_list[self.current_option_index])
-                        elif (x, y) in self.content["building_cancel_first_item_button_area"]:
-                            # cancel the first item of the queue
-                            self.selected_building.cancel_item()
-                        elif (x, y) in self.content["building_empty_queue_button_area"]:
-                            # empty the queue
-                            self.selected_building.clear_queue()
+                # try to add the item to the queue, cancel the first item of the queue, empty the queue
+                self.add_button("building_add_item_button", lambda: building.add_item_to_queue(self.items_options_list[self.current_option_index]),
+                    lambda: building.can_make_item(self.items_options_list[self.current_option_index]))
+                self.add_button("building_cancel_first_item_button", building.cancel_item, building.can_cancel_item)
+            self.add_button("building_empty_queue_button", building.clear_queue, building.can_clear_queue)
+
+    def on_upgrade_button_click(self):
+        if self.selected_building.is_constructing:
+            self.current_colony.cancel_building_construction()
+        else:
+            if self.current_colony.can_upgrade_building():
+                self.selected_building.upgrade()
+
+    def on_left_arrow_button_click(self):
+        self.current_option_index = max(0, self.current_option_index - 1)
+
+    def on_right_arrow_button_click(self):
+        options_list = self.workers_options_list if self.selected_building.name == "school" else self.items_options_list
+        self.current_option_index = min(len(options_list) - 1, self.current_option_index + 1)
 
     def on_delete(self):
+        # the buttons of the content leave the hit-test index
+        for name in self.button_names:
+            self.hit_test_index.remove(name)
         # manually delete text layout objects
         if "building_description_layout" in self.content.keys():
+            # the documents are cached and outlive the layout, detach it from its document
+            self.content["building_description_layout"].document.remove_handlers(self.content["building_description_layout"])
             self.content["building_description_layout"].delete()
 
 
 class RightWindowWidget:
 
-    def __init__(self, game_data: GameData, batch, groups):
+    def __init__(self, game_data: GameData, batch, groups, hit_test_index: HitTestIndex):
         self.game_data = game_data
         self.batch = batch
         self.groups = groups
+        self.hit_test_index = hit_test_index
         # right window state = (current_colony, current_building_coords, current_building)
         self.displayed_state = (self.game_data.active_colony, None, None)
+        # decode the building descriptions once, the cache is shared by every right window content
+        RigthWindowWidgetContent.precompile_description_documents(self.game_data)
         # building icons
         self.building_icons = {
             "solar_panels": {
@@ -2080,7 +2058,15 @@ class RightWindowWidget:
                 "icon_scale": .15
             }
         }
-        self.widget_content = RigthWindowWidgetContent(self.game_data, self.building_icons, self.batch, self.groups)
+        self.widget_content = self.create_widget_content()
+
+    def create_widget_content(self) -> RigthWindowWidgetContent:
+        return RigthWindowWidgetContent(self.game_data, self.building_icons, self.batch, self.groups, self.hit_test_index,
+                                        self.is_displayed)
+
+    def is_displayed(self) -> bool:
+        # whether the current state is the one displayed (the window content is only recreated when the frame is drawn)
+        return self.current_state == self.displayed_state
 
     @property
     def current_state(self):
@@ -2100,19 +2086,16 @@ class RightWindowWidget:
         if current_state != self.displayed_state:
             # print("right window state changed")
             self.widget_content.on_delete()
-            self.widget_content = RigthWindowWidgetContent(self.game_data, self.building_icons, self.batch, self.groups)
+            self.widget_content = self.create_widget_content()
             self.displayed_state = current_state
         # update the RightWindowWidgetContent object
         self.widget_content.on_draw()
 
-    def on_mouse_press(self, x, y):
-        # only send the left click if the current state is the one displayed
-        if self.current_state == self.displayed_state:
-            self.widget_content.on_mouse_press(x, y)
-
 
 class SceneColony(Scene):
 
+    assets_group = "colony"
+
     def __init__(self, game_data: GameData):
         super().__init__(game_data)
         # from background to foreground
@@ -2159,7 +2142,7 @@ class SceneColony(Scene):
         #     )
 
         # left window
-        self.left_window = Sprite(
+        self.left_window = IconSprite(
             img=self.game_data.side_window,
             x=15,
             y=self.game_data.window_height // 2,
@@ -2176,20 +2159,20 @@ class SceneColony(Scene):
             line_index,
             column_index,
             batch=self.batch,
-            groups=self.groups
+            groups=self.groups,
+            hit_test_index=self.hit_test_index
         ) for column_index in range(7)] for line_index in range(7)]
 
         # right window widget
-        self.right_window_widget = RightWindowWidget(self.game_data, self.batch, self.groups)
+        self.right_window_widget = RightWindowWidget(self.game_data, self.batch, self.groups, self.hit_test_index)
 
         # left window static content
         self.left_window_content = {}
 
-        # background sprite + colony name can be in the __init__ because the scene is recreated on each switch
+        # background sprite + colony name, updated in on_enter because the scene is kept between switches
         # background sprite
-        if self.game_data.active_colony == "moon":
-            self.background_sprite = Sprite(img=self.game_data.moon_background_img, y = -550, batch=self.batch, group=self.groups[0])
-            self.background_sprite.scale = self.game_data.window_width / self.game_data.moon_background_img.width
+        self.background_sprite = IconSprite(img=self.game_data.moon_background_img, y = -550, batch=self.batch, group=self.groups[0])
+        self.background_sprite.scale = self.game_data.window_width / self.game_data.moon_background_img.width
 
         # colony name
         self.colony_name_label = Label(self.game_data.game_config["colonies"][self.game_data.active_colony]["displayed_name"],
@@ -2201,7 +2184,7 @@ class SceneColony(Scene):
             x=25, y=self.game_data.window_height - 95, width=315,
             align="center", anchor_y="center", batch=self.batch, group=self.groups[2])
         # worker icons
-        self.left_window_content["engineers_icon"] = Sprite(
+        self.left_window_content["engineers_icon"] = IconSprite(
             img=self.game_data.icon_wrench_light_gray,
             x = self.left_window.width // 2 + 15 - 100,
             y = self.game_data.window_height - 135,
@@ -2209,7 +2192,7 @@ class SceneColony(Scene):
             group=self.groups[2]
         )
         self.left_window_content["engineers_icon"].scale = .15
-        self.left_window_content["scientists_icon"] = Sprite(
+        self.left_window_content["scientists_icon"] = IconSprite(
             img=self.game_data.icon_vial_light_gray,
             x = self.left_window.width // 2 + 15,
             y = self.game_data.window_height - 135,
@@ -2217,7 +2200,7 @@ class SceneColony(Scene):
             group=self.groups[2]
         )
         self.left_window_content["scientists_icon"].scale = .13
-        self.left_window_content["pilots_icon"] = Sprite(
+        self.left_window_content["pilots_icon"] = IconSprite(
             img=self.game_data.icon_plane_light_gray,
             x = self.left_window.width // 2 + 15 + 100,
             y = self.game_data.window_height - 135,
@@ -2245,7 +2228,7 @@ class SceneColony(Scene):
             align="center", anchor_y="center", batch=self.batch, group=self.groups[2])
 
         # power icon
-        self.left_window_content["power_icon"] = Sprite(
+        self.left_window_content["power_icon"] = IconSprite(
             img = self.game_data.icon_bolt_light_gray,
             x = self.left_window.width // 2 + 15 - 30,
             y = self.game_data.window_height - 250,
@@ -2260,7 +2243,7 @@ class SceneColony(Scene):
             anchor_x="center", batch=self.batch, group=self.groups[2])
 
         # water icon
-        self.left_window_content["water_icon"] = Sprite(
+        self.left_window_content["water_icon"] = IconSprite(
             img = self.game_data.icon_water_light_gray,
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 300,
@@ -2273,7 +2256,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 340,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["water_divide_bar"] = Sprite(
+        self.left_window_content["water_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 349,
@@ -2287,7 +2270,7 @@ class SceneColony(Scene):
             anchor_x="center", batch=self.batch, group=self.groups[2])
 
         # food icon
-        self.left_window_content["food_icon"] = Sprite(
+        self.left_window_content["food_icon"] = IconSprite(
             img = self.game_data.icon_apple_light_gray,
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 298,
@@ -2300,7 +2283,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 340,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["food_divide_bar"] = Sprite(
+        self.left_window_content["food_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 349,
@@ -2324,7 +2307,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 + 40,
             y = self.game_data.window_height - 340,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["O2_divide_bar"] = Sprite(
+        self.left_window_content["O2_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 + 40,
             y = self.game_data.window_height - 349,
@@ -2348,7 +2331,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 + 120,
             y = self.game_data.window_height - 340,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["H2_divide_bar"] = Sprite(
+        self.left_window_content["H2_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 + 120,
             y = self.game_data.window_height - 349,
@@ -2368,7 +2351,7 @@ class SceneColony(Scene):
             y=self.game_data.window_height - 390,
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
         # iron ore icon
-        self.left_window_content["iron_ore_icon"] = Sprite(
+        self.left_window_content["iron_ore_icon"] = IconSprite(
             img = self.game_data.icon_ore_light_gray,
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 400,
@@ -2377,7 +2360,7 @@ class SceneColony(Scene):
         )
         self.left_window_content["iron_ore_icon"].scale = .07
         # iron ingot icon
-        self.left_window_content["iron_ingot_icon"] = Sprite(
+        self.left_window_content["iron_ingot_icon"] = IconSprite(
             img = self.game_data.icon_ingot_light_gray,
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 400,
@@ -2390,7 +2373,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 430,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["iron_ore_divide_bar"] = Sprite(
+        self.left_window_content["iron_ore_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 439,
@@ -2406,7 +2389,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 430,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["iron_divide_bar"] = Sprite(
+        self.left_window_content["iron_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 439,
@@ -2426,7 +2409,7 @@ class SceneColony(Scene):
             y=self.game_data.window_height - 390,
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
         # aluminium ore icon
-        self.left_window_content["aluminium_ore_icon"] = Sprite(
+        self.left_window_content["aluminium_ore_icon"] = IconSprite(
             img = self.game_data.icon_ore_light_gray,
             x = self.left_window.width // 2 + 15 + 40,
             y = self.game_data.window_height - 400,
@@ -2435,7 +2418,7 @@ class SceneColony(Scene):
         )
         self.left_window_content["aluminium_ore_icon"].scale = .07
         # aluminium ingot icon
-        self.left_window_content["aluminium_ingot_icon"] = Sprite(
+        self.left_window_content["aluminium_ingot_icon"] = IconSprite(
             img = self.game_data.icon_ingot_light_gray,
             x = self.left_window.width // 2 + 15 + 120,
             y = self.game_data.window_height - 400,
@@ -2448,7 +2431,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 + 40,
             y = self.game_data.window_height - 430,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["aluminium_ore_divide_bar"] = Sprite(
+        self.left_window_content["aluminium_ore_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 + 40,
             y = self.game_data.window_height - 439,
@@ -2464,7 +2447,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 + 120,
             y = self.game_data.window_height - 430,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["aluminium_divide_bar"] = Sprite(
+        self.left_window_content["aluminium_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 + 120,
             y = self.game_data.window_height - 439,
@@ -2484,7 +2467,7 @@ class SceneColony(Scene):
             y=self.game_data.window_height - 480,
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
         # copper ore icon
-        self.left_window_content["copper_ore_icon"] = Sprite(
+        self.left_window_content["copper_ore_icon"] = IconSprite(
             img = self.game_data.icon_ore_light_gray,
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 490,
@@ -2493,7 +2476,7 @@ class SceneColony(Scene):
         )
         self.left_window_content["copper_ore_icon"].scale = .07
         # copper ingot icon
-        self.left_window_content["copper_ingot_icon"] = Sprite(
+        self.left_window_content["copper_ingot_icon"] = IconSprite(
             img = self.game_data.icon_ingot_light_gray,
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 490,
@@ -2506,7 +2489,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 520,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["copper_ore_divide_bar"] = Sprite(
+        self.left_window_content["copper_ore_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 529,
@@ -2522,7 +2505,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 520,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["copper_divide_bar"] = Sprite(
+        self.left_window_content["copper_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 529,
@@ -2542,7 +2525,7 @@ class SceneColony(Scene):
             y=self.game_data.window_height - 480,
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
         # titanium ore icon
-        self.left_window_content["titanium_ore_icon"] = Sprite(
+        self.left_window_content["titanium_ore_icon"] = IconSprite(
             img = self.game_data.icon_ore_light_gray,
             x = self.left_window.width // 2 + 15 + 40,
             y = self.game_data.window_height - 490,
@@ -2551,7 +2534,7 @@ class SceneColony(Scene):
         )
         self.left_window_content["titanium_ore_icon"].scale = .07
         # titanium ingot icon
-        self.left_window_content["titanium_ingot_icon"] = Sprite(
+        self.left_window_content["titanium_ingot_icon"] = IconSprite(
             img = self.game_data.icon_ingot_light_gray,
             x = self.left_window.width // 2 + 15 + 120,
             y = self.game_data.window_height - 490,
@@ -2564,7 +2547,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 + 40,
             y = self.game_data.window_height - 520,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["titanium_ore_divide_bar"] = Sprite(
+        self.left_window_content["titanium_ore_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 + 40,
             y = self.game_data.window_height - 529,
@@ -2580,7 +2563,7 @@ class SceneColony(Scene):
             x = self.left_window.width // 2 + 15 + 120,
             y = self.game_data.window_height - 520,
             anchor_x="center", batch=self.batch, group=self.groups[2])
-        self.left_window_content["titanium_divide_bar"] = Sprite(
+        self.left_window_content["titanium_divide_bar"] = IconSprite(
             img = self.game_data.icon_minus_white,
             x = self.left_window.width // 2 + 15 + 120,
             y = self.game_data.window_height - 529,
@@ -2599,7 +2582,7 @@ class SceneColony(Scene):
             align="center", anchor_y="center", batch=self.batch, group=self.groups[2])
 
         # solid cargo module
-        self.left_window_content["module_cargo_icon"] = Sprite(
+        self.left_window_content["module_cargo_icon"] = IconSprite(
             img = self.game_data.icon_crate_light_gray,
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 620,
@@ -2614,7 +2597,7 @@ class SceneColony(Scene):
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
 
         # liquid cargo module
-        self.left_window_content["module_tank_icon"] = Sprite(
+        self.left_window_content["module_tank_icon"] = IconSprite(
             img = self.game_data.icon_barrel_light_gray,
             x = self.left_window.width // 2 + 15 - 120,
             y = self.game_data.window_height - 660,
@@ -2629,7 +2612,7 @@ class SceneColony(Scene):
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
 
         # passengers module icon
-        self.left_window_content["module_passengers_icon"] = Sprite(
+        self.left_window_content["module_passengers_icon"] = IconSprite(
             img = self.game_data.icon_seat_light_gray,
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 620,
@@ -2644,7 +2627,7 @@ class SceneColony(Scene):
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
 
         # base module icon
-        self.left_window_content["module_base_icon"] = Sprite(
+        self.left_window_content["module_base_icon"] = IconSprite(
             img = self.game_data.icon_house_light_gray,
             x = self.left_window.width // 2 + 15 - 40,
             y = self.game_data.window_height - 660,
@@ -2659,7 +2642,7 @@ class SceneColony(Scene):
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
 
         # small spaceship icon
-        self.left_window_content["spaceship_small_icon"] = Sprite(
+        self.left_window_content["spaceship_small_icon"] = IconSprite(
             img = self.game_data.icon_spaceship_slanted_light_gray,
             x = self.left_window.width // 2 + 15 + 50,
             y = self.game_data.window_height - 620,
@@ -2674,7 +2657,7 @@ class SceneColony(Scene):
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
 
         # medium spaceship icon
-        self.left_window_content["spaceship_medium_icon"] = Sprite(
+        self.left_window_content["spaceship_medium_icon"] = IconSprite(
             img = self.game_data.icon_spaceship_slanted_light_gray,
             x = self.left_window.width // 2 + 15 + 95,
             y = self.game_data.window_height - 620,
@@ -2689,7 +2672,7 @@ class SceneColony(Scene):
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
 
         # large spaceship icon
-        self.left_window_content["spaceship_large_icon"] = Sprite(
+        self.left_window_content["spaceship_large_icon"] = IconSprite(
             img = self.game_data.icon_spaceship_slanted_light_gray,
             x = self.left_window.width // 2 + 15 + 140,
             y = self.game_data.window_height - 620,
@@ -2703,12 +2686,110 @@ class SceneColony(Scene):
             y = self.game_data.window_height - 650,
             anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
 
+        # time speed
+        self.speed_label = Label("", font_name=self.game_data.subtitle_font_name, font_size=18,
+            x=self.game_data.window_width // 2, y=self.game_data.window_height - 42,
+            anchor_x="center", anchor_y="center", batch=self.batch, group=self.groups[2])
+        # keys selecting the speeds, value = index in the speeds list of the simulation
+        self.speed_keys = {
+            key._1: 1, key.NUM_1: 1,
+            key._2: 2, key.NUM_2: 2,
+            key._3: 3, key.NUM_3: 3,
+            key._4: 4, key.NUM_4: 4
+        }
+
+        # state of the colony data displayed in the left window (active colony, colony data version)
+        self.left_window_displayed_state = None
+        # number of label relayouts in the left window, total and per second
+        self.label_relayouts = 0
+        self.label_relayouts_per_second = 0.
+        self.label_relayouts_window_start, self.label_relayouts_window_count = perf_counter(), 0
+
         # test garbage collection
         # self.test_circle = None
 
 
-    def draw(self):
+    def set_label_text(self, label: Label, text: str):
+        # only touch the label (and re-layout its glyphs) if its text changed
+        if label.text != text:
+            label.text = text
+            self.label_relayouts += 1
+
+
+    def update_left_window(self):
+        # rewrite the left window labels with the current colony data
+        # workers
+        colony_workers = self.game_data.colonies[self.game_data.active_colony].data["workers"]
+        self.set_label_text(self.left_window_content["engineers_counter_label"], f"{colony_workers["engineers"]["available"]}/{colony_workers["engineers"]["total"]}")
+        self.set_label_text(self.left_window_content["scientists_counter_label"], f"{colony_workers["scientists"]["available"]}/{colony_workers["scientists"]["total"]}")
+        self.set_label_text(self.left_window_content["pilots_counter_label"], f"{colony_workers["pilots"]}")
+        # power
+        colony_power = self.game_data.colonies[self.game_data.active_colony].power
+        self.set_label_text(self.left_window_content["power_counter_label"], f"{colony_power["consumed"]}/{colony_power["produced"]}")
+        # resources
+        colony_resources = self.game_data.colonies[self.game_data.active_colony].data["resources"]
+        colony_storage_space = self.game_data.colonies[self.game_data.active_colony].max_storage
+        # water
+        self.set_label_text(self.left_window_content["water_available"], str(round(colony_resources["water"], 1)))
+        self.set_label_text(self.left_window_content["water_total"], str(colony_storage_space["water"]))
+        # food
+        self.set_label_text(self.left_window_content["food_available"], str(round(colony_resources["food"], 1)))
+        self.set_label_text(self.left_window_content["food_total"], str(colony_storage_space["food"]))
+        # O2
+        self.set_label_text(self.left_window_content["O2_available"], str(round(colony_resources["oxygen"], 1)))
+        self.set_label_text(self.left_window_content["O2_total"], str(colony_storage_space["oxygen"]))
+        # H2
+        self.set_label_text(self.left_window_content["H2_available"], str(round(colony_resources["hydrogen"], 1)))
+        self.set_label_text(self.left_window_content["H2_total"], str(colony_storage_space["hydrogen"]))
+        # iron
+        self.set_label_text(self.left_window_content["iron_ore_available"], str(round(colony_resources["iron_ore"], 1)))
+        self.set_label_text(self.left_window_content["iron_ore_total"], str(colony_storage_space["iron_ore"]))
+        self.set_label_text(self.left_window_content["iron_available"], str(colony_resources["iron"]))
+        self.set_label_text(self.left_window_content["iron_total"], str(colony_storage_space["iron"]))
+        # aluminium
+        self.set_label_text(self.left_window_content["aluminium_ore_available"], str(round(colony_resources["aluminium_ore"], 1)))
+        self.set_label_text(self.left_window_content["aluminium_ore_total"], str(colony_storage_space["aluminium_ore"]))
+        self.set_label_text(self.left_window_content["aluminium_available"], str(colony_resources["aluminium"]))
+        self.set_label_text(self.left_window_content["aluminium_total"], str(colony_storage_space["aluminium"]))
+        # copper
+        self.set_label_text(self.left_window_content["copper_ore_available"], str(round(colony_resources["copper_ore"], 1)))
+        self.set_label_text(self.left_window_content["copper_ore_total"], str(colony_storage_space["copper_ore"]))
+        self.set_label_text(self.left_window_content["copper_available"], str(colony_resources["copper"]))
+        self.set_label_text(self.left_window_content["copper_total"], str(colony_storage_space["copper"]))
+        # titanium
+        self.set_label_text(self.left_window_content["titanium_ore_available"], str(round(colony_resources["titanium_ore"], 1)))
+        self.set_label_text(self.left_window_content["titanium_ore_total"], str(colony_storage_space["titanium_ore"]))
+        self.set_label_text(self.left_window_content["titanium_available"], str(colony_resources["titanium"]))
+        self.set_label_text(self.left_window_content["titanium_total"], str(colony_storage_space["titanium"]))
+        # items
+        colony_items = self.game_data.colonies[self.game_data.active_colony].data["items"]
+        self.set_label_text(self.left_window_content["module_cargo_counter"], str(colony_items["module_cargo_hold"]))
+        self.set_label_text(self.left_window_content["module_tank_counter"], str(colony_items["module_liquid_tanks"]))
+        self.set_label_text(self.left_window_content["module_passengers_counter"], str(colony_items["module_passengers"]))
+        self.set_label_text(self.left_window_content["module_base_counter"], str(colony_items["module_headquarters"]))
+        self.set_label_text(self.left_window_content["spaceship_small_counter"], str(colony_items["spaceship_small"]))
+        self.set_label_text(self.left_window_content["spaceship_medium_counter"], str(colony_items["spaceship_medium"]))
+        self.set_label_text(self.left_window_content["spaceship_large_counter"], str(colony_items["spaceship_large"]))
+
+
+    def on_enter(self):
         self.game_data.game_paused = False
+        # the active colony may have changed since the scene was last displayed
+        # only the moon has a background for now
+        self.background_sprite.visible = (self.game_data.active_colony == "moon")
+        self.set_label_text(self.colony_name_label, self.game_data.game_config["colonies"][self.game_data.active_colony]["displayed_name"])
+        # the hovered tile or button under the mouse, it may not have moved since the scene was last displayed
+        self.hit_test_index.on_mouse_motion(self.game_data.mouse_x, self.game_data.mouse_y)
+
+
+    def on_delete(self):
+        # text layouts need to be deleted manually
+        self.right_window_widget.widget_content.on_delete()
+
+
+    def draw(self):
+        vertex_lists_allocated = self.batch.vertex_lists_allocated
+        draw_start_time = perf_counter()
 
         # udpate the batch
 
@@ -2717,7 +2798,7 @@ class SceneColony(Scene):
         # # => since now the scene is recreated everytime it is switched, we can draw the background and the colony name in the __init__
         # if self.game_data.active_colony == "moon":
         #     colony_name = "LUNE"
-        #     self.background_sprite = Sprite(img=self.game_data.moon_background_img, y = -550, batch=self.batch, group=self.groups[0])
+        #     self.background_sprite = IconSprite(img=self.game_data.moon_background_img, y = -550, batch=self.batch, group=self.groups[0])
         #     self.background_sprite.scale = self.game_data.window_width / self.game_data.moon_background_img.width
 
         # # colony name
@@ -2739,69 +2820,41 @@ class SceneColony(Scene):
         #     - metal (available / maximum storage + produced every minute)
 
         # left window update
-        # workers
-        colony_workers = self.game_data.colonies[self.game_data.active_colony].data["workers"]
-        self.left_window_content["engineers_counter_label"].text = f"{colony_workers["engineers"]["available"]}/{colony_workers["engineers"]["total"]}"
-        self.left_window_content["scientists_counter_label"].text = f"{colony_workers["scientists"]["available"]}/{colony_workers["scientists"]["total"]}"
-        self.left_window_content["pilots_counter_label"].text = f"{colony_workers["pilots"]}"
-        # power
-        colony_power = self.game_data.colonies[self.game_data.active_colony].power
-        self.left_window_content["power_counter_label"].text = f"{colony_power["consumed"]}/{colony_power["produced"]}"
-        # resources
-        colony_resources = self.game_data.colonies[self.game_data.active_colony].data["resources"]
-        colony_storage_space = self.game_data.colonies[self.game_data.active_colony].max_storage
-        # water
-        self.left_window_content["water_available"].text = str(round(colony_resources["water"], 1))
-        self.left_window_content["water_total"].text = str(colony_storage_space["water"])
-        # food
-        self.left_window_content["food_available"].text = str(round(colony_resources["food"], 1))
-        self.left_window_content["food_total"].text = str(colony_storage_space["food"])
-        # O2
-        self.left_window_content["O2_available"].text = str(round(colony_resources["oxygen"], 1))
-        self.left_window_content["O2_total"].text = str(colony_storage_space["oxygen"])
-        # H2
-        self.left_window_content["H2_available"].text = str(round(colony_resources["hydrogen"], 1))
-        self.left_window_content["H2_total"].text = str(colony_storage_space["hydrogen"])
-        # iron
-        self.left_window_content["iron_ore_available"].text = str(round(colony_resources["iron_ore"], 1))
-        self.left_window_content["iron_ore_total"].text = str(colony_storage_space["iron_ore"])
-        self.left_window_content["iron_available"].text = str(colony_resources["iron"])
-        self.left_window_content["iron_total"].text = str(colony_storage_space["iron"])
-        # aluminium
-        self.left_window_content["aluminium_ore_available"].text = str(round(colony_resources["aluminium_ore"], 1))
-        self.left_window_content["aluminium_ore_total"].text = str(colony_storage_space["aluminium_ore"])
-        self.left_window_content["aluminium_available"].text = str(colony_resources["aluminium"])
-        self.left_window_content["aluminium_total"].text = str(colony_storage_space["aluminium"])
-        # copper
-        self.left_window_content["copper_ore_available"].text = str(round(colony_resources["copper_ore"], 1))
-        self.left_window_content["copper_ore_total"].text = str(colony_storage_space["copper_ore"])
-        self.left_window_content["copper_available"].text = str(colony_resources["copper"])
-        self.left_window_content["copper_total"].text = str(colony_storage_space["copper"])
-        # titanium
-        self.left_window_content["titanium_ore_available"].text = str(round(colony_resources["titanium_ore"], 1))
-        self.left_window_content["titanium_ore_total"].text = str(colony_storage_space["titanium_ore"])
-        self.left_window_content["titanium_available"].text = str(colony_resources["titanium"])
-        self.left_window_content["titanium_total"].text = str(colony_storage_space["titanium"])
-        # items
-        colony_items = self.game_data.colonies[self.game_data.active_colony].data["items"]
-        self.left_window_content["module_cargo_counter"].text = str(colony_items["module_cargo_hold"])
-        self.left_window_content["module_tank_counter"].text = str(colony_items["module_liquid_tanks"])
-        self.left_window_content["module_passengers_counter"].text = str(colony_items["module_passengers"])
-        self.left_window_content["module_base_counter"].text = str(colony_items["module_headquarters"])
-        self.left_window_content["spaceship_small_counter"].text = str(colony_items["spaceship_small"])
-        self.left_window_content["spaceship_medium_counter"].text = str(colony_items["spaceship_medium"])
-        self.left_window_content["spaceship_large_counter"].text = str(colony_items["spaceship_large"])
+        # only refresh the labels if the displayed colony data changed since the last frame
+        current_colony = self.game_data.colonies[self.game_data.active_colony]
+        left_window_state = (self.game_data.active_colony, current_colony.data_version)
+        if left_window_state != self.left_window_displayed_state:
+            self.update_left_window()
+            self.left_window_displayed_state = left_window_state
+        # label relayouts per second
+        current_time = perf_counter()
+        if current_time - self.label_relayouts_window_start >= 1:
+            self.label_relayouts_per_second = (self.label_relayouts - self.label_relayouts_window_count) / (current_time - self.label_relayouts_window_start)
+            self.label_relayouts_window_start, self.label_relayouts_window_count = current_time, self.label_relayouts
+
+        # time speed
+        if self.game_data.simulation.speed == 0:
+            self.set_label_text(self.speed_label, "PAUSE")
+        else:
+            self.set_label_text(self.speed_label, f"VITESSE x{self.game_data.simulation.speed}")
 
-        # reset the state of the mouse
-        self.game_data.mouse_clickable_area = False
+        left_panel_end_time = perf_counter()
 
         # update the building widgets
         for line_index in range(len(self.building_tiles_widgets)):
             for column_index in range(len(self.building_tiles_widgets[line_index])):
                 self.building_tiles_widgets[line_index][column_index].on_draw()
+        building_widgets_end_time = perf_counter()
 
         # update the right window widget
+        hovered = self.hit_test_index.hovered
         self.right_window_widget.on_draw()
+        # a new right window content registers other buttons, the region under a still mouse may have changed
+        self.game_data.mouse_clickable_area = self.hit_test_index.mouse_clickable_area
+        if self.hit_test_index.hovered != hovered:
+            # the widgets drawn before the right window still show the previous hovered region
+            self.invalidate()
+        right_window_end_time = perf_counter()
 
         # test garbage collection
         # if self.test_circle is None:
@@ -2815,18 +2868,21 @@ class SceneColony(Scene):
         # else:
         #     self.test_circle = None
 
+        # count the vertex lists allocated during this frame (0 at steady state)
+        self.frame_vertex_lists_allocated = self.batch.vertex_lists_allocated - vertex_lists_allocated
+
         # draw the batch
         self.batch.draw()
+        self.draw_times["left panel"] = left_panel_end_time - draw_start_time
+        self.draw_times["building widgets"] = building_widgets_end_time - left_panel_end_time
+        self.draw_times["right window"] = right_window_end_time - building_widgets_end_time
+        self.draw_times["batch"] = perf_counter() - right_window_end_time
 
 
     def on_mouse_press(self, x, y, button, modifiers) -> str:
         if button & mouse.LEFT:
-            # send the left click to every building widget to select a building
-            for line_index in range(len(self.building_tiles_widgets)):
-                for column_index in range(len(self.building_tiles_widgets[line_index])):
-                    self.building_tiles_widgets[line_index][column_index].on_mouse_press(x, y)
-            # send the left click to the right widget
-            self.right_window_widget.on_mouse_press(x, y)
+            # the left click selects a building tile or presses a button of the right window
+            self.hit_test_index.on_mouse_press(x, y)
         # unselect building on right click
         if button & mouse.RIGHT:
             self.game_data.colonies[self.game_data.active_colony].selected_building_tile_coords = None
@@ -2835,7 +2891,12 @@ class SceneColony(Scene):
 
     def on_mouse_motion(self, x, y):
         self.game_data.mouse_x, self.game_data.mouse_y = x, y
-        # self.game_data.mouse_clickable_area = False
+        # hovered tile or button, used by the widgets when they are drawn
+        hovered = self.hit_test_index.hovered
+        self.game_data.mouse_clickable_area = self.hit_test_index.on_mouse_motion(x, y)
+        # the widgets only look different when the mouse enters or leaves a tile or a button
+        if self.hit_test_index.hovered != hovered:
+            self.invalidate()
         # send the mouse motion to the building widgets
         # for line_index in range(len(self.building_tiles_widgets)):
         #     for column_index in range(len(self.building_tiles_widgets[line_index])):
@@ -2845,4 +2906,16 @@ class SceneColony(Scene):
 
 
     def on_key_press(self, symbol, modifiers) -> str:
+        # time speed control
+        # space: pause / resume, 1 to 4: x1, x2, x10, x100
+        # F5: quick save
+        simulation = self.game_data.simulation
+        if symbol == key.F5:
+            self.game_data.save_game()
+        elif symbol == key.SPACE:
+            simulation.toggle_pause()
+        elif symbol in self.speed_keys:
+            speed_index = self.speed_keys[symbol]
+            if speed_index < len(simulation.speeds):
+                simulation.set_speed(simulation.speeds[speed_index])
         return "colony"
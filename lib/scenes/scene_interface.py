@@ -1,4 +1,9 @@
 from pyglet.graphics import Batch
+from pyglet.graphics.allocation import Allocator
+from pyglet.text.layout import TextLayoutGroup, TextDecorationGroup
+import pyglet.shapes as shapes
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
 import abc
 import sys
 from pathlib import Path
@@ -10,8 +15,155 @@ if ROOT_DIR_PATH not in sys.path:
 from lib.game_data import GameData
 
 
+class CountingAllocator(Allocator):
+    "vertex allocator of a domain that counts the vertex lists currently allocated in it"
+
+    __slots__ = ("vertex_lists",)
+
+    def __init__(self, capacity: int):
+        super().__init__(capacity)
+        self.vertex_lists = 0
+
+    def alloc(self, size: int) -> int:
+        # counted once the allocation succeeded (the domain grows its buffers and retries when it is full)
+        start = super().alloc(size)
+        self.vertex_lists += 1
+        return start
+
+    def dealloc(self, start: int, size: int):
+        super().dealloc(start, size)
+        self.vertex_lists -= 1
+
+
+class CountingBatch(Batch):
+    "batch that counts the vertex lists allocated (or migrated) into it, and the vertex lists it currently holds"
+
+    def __init__(self):
+        super().__init__()
+        self.vertex_lists_allocated = 0
+
+    def get_domain(self, indexed, mode, group, program, attributes):
+        # called by pyglet every time a vertex list is created in (or moved to) the batch
+        self.vertex_lists_allocated += 1
+        domain = super().get_domain(indexed, mode, group, program, attributes)
+        # new domains are still empty, their allocator can be replaced
+        if type(domain.allocator) is Allocator:
+            domain.allocator = CountingAllocator(domain.allocator.capacity)
+        return domain
+
+    def counts(self) -> dict[str, int]:
+        # vertex lists and vertices currently in the batch (all of them, and those of the labels), and draw calls per frame
+        vertex_lists = text_vertex_lists = vertices = draw_calls = 0
+        for group, domains in self.group_map.items():
+            for domain in domains.values():
+                domain_vertex_lists = getattr(domain.allocator, "vertex_lists", 0)
+                vertex_lists += domain_vertex_lists
+                vertices += sum(domain.allocator.sizes)
+                if isinstance(group, (TextLayoutGroup, TextDecorationGroup)):
+                    text_vertex_lists += domain_vertex_lists
+                if not domain.is_empty:
+                    draw_calls += 1
+        return {"vertex_lists": vertex_lists, "text_vertex_lists": text_vertex_lists, "vertices": vertices, "draw_calls": draw_calls}
+
+
+# size (pixels) of the square cells of the hit-test grid
+HIT_TEST_CELL_SIZE = 64
+
+
+@dataclass(slots=True)
+class HitRegion:
+    "named clickable region of a scene"
+    name: str
+    # bounds of the region, the points strictly inside are in the region (like shapes.Rectangle)
+    x: float
+    y: float
+    x2: float
+    y2: float
+    # called when the region is clicked, its result is returned by HitTestIndex.on_mouse_press
+    on_click: Optional[Callable[[], Any]] = None
+    # whether the cursor shows the region as clickable (None: always)
+    clickable: Optional[Callable[[], bool]] = None
+
+
+class HitTestIndex:
+    "grid of buckets of the clickable regions of a scene, finds the region under a point without testing every region"
+
+    def __init__(self, cell_size: int = HIT_TEST_CELL_SIZE):
+        self.cell_size = cell_size
+        self.regions: dict[str, HitRegion] = {}
+        # cell coordinates: regions overlapping the cell, in the order they were added
+        self.cells: dict[tuple[int, int], list[HitRegion]] = {}
+        # last mouse position, and name of the region under it (None: no region)
+        self.mouse_position: Optional[tuple[float, float]] = None
+        self.hovered: Optional[str] = None
+
+    def _region_cells(self, region: HitRegion):
+        for cell_x in range(int(region.x // self.cell_size), int(region.x2 // self.cell_size) + 1):
+            for cell_y in range(int(region.y // self.cell_size), int(region.y2 // self.cell_size) + 1):
+                yield cell_x, cell_y
+
+    def add(self, name: str, area: shapes.Rectangle, on_click: Optional[Callable[[], Any]] = None,
+            clickable: Optional[Callable[[], bool]] = None):
+        # the bounds of the area are copied, the clickable areas of the scenes do not move (and are not rotated)
+        self.remove(name)
+        x, y = area.x - area.anchor_x, area.y - area.anchor_y
+        region = HitRegion(name, x, y, x + area.width, y + area.height, on_click, clickable)
+        self.regions[name] = region
+        for cell in self._region_cells(region):
+            self.cells.setdefault(cell, []).append(region)
+        self._update_hovered()
+
+    def remove(self, name: str):
+        region = self.regions.pop(name, None)
+        if region is None:
+            return
+        for cell in self._region_cells(region):
+            bucket = self.cells[cell]
+            bucket.remove(region)
+            if not bucket:
+                del self.cells[cell]
+        self._update_hovered()
+
+    def hit(self, x: float, y: float) -> Optional[HitRegion]:
+        # region under the point, the last one added if several regions overlap
+        bucket = self.cells.get((int(x // self.cell_size), int(y // self.cell_size)))
+        if bucket is not None:
+            for region in reversed(bucket):
+                if (region.x < x < region.x2) and (region.y < y < region.y2):
+                    return region
+        return None
+
+    def _update_hovered(self):
+        # the regions change under a still mouse when the scene adds or removes some
+        region = None if self.mouse_position is None else self.hit(*self.mouse_position)
+        self.hovered = None if region is None else region.name
+
+    @property
+    def mouse_clickable_area(self) -> bool:
+        if self.hovered is None:
+            return False
+        clickable = self.regions[self.hovered].clickable
+        return (clickable is None) or clickable()
+
+    def on_mouse_motion(self, x: float, y: float) -> bool:
+        # finds the hovered region once per mouse move, returns whether the cursor is over a clickable region
+        self.mouse_position = (x, y)
+        self._update_hovered()
+        return self.mouse_clickable_area
+
+    def on_mouse_press(self, x: float, y: float) -> Any:
+        # calls the callback of the region clicked on, returns its result (None if no region was clicked)
+        region = self.hit(x, y)
+        if (region is None) or (region.on_click is None):
+            return None
+        return region.on_click()
+
+
 class Scene(metaclass=abc.ABCMeta):
 
+    # group of the assets manifest used by the scene (see lib/assets.yml), loaded first when the scene is needed
+    assets_group: Optional[str] = None
+
     # @classmethod
     # def __subclasshook__(cls, subclass):
     #     return (hasattr(subclass, 'draw') and callable(subclass.draw) and
@@ -22,7 +174,31 @@ class Scene(metaclass=abc.ABCMeta):
         if type(self) is Scene:
             raise TypeError("The Scene class should not be instanciated directly")
         self.game_data = game_data
-        self.batch = Batch()
+        self.batch = CountingBatch()
+        # vertex lists allocated during the last call to draw()
+        self.frame_vertex_lists_allocated = 0
+        # duration (seconds) of the parts of the last call to draw(), filled by the scenes that measure them
+        self.draw_times: dict[str, float] = {}
+        # clickable regions of the scene, resolve the hovered and clicked regions
+        self.hit_test_index = HitTestIndex()
+        # whether what the scene displays changed since it was last drawn (the window skips the frames that would not change)
+        self.needs_redraw = True
+
+    def on_enter(self) -> None:
+        "Called when the scene becomes the current scene"
+        pass
+
+    def on_exit(self) -> None:
+        "Called when the scene stops being the current scene, it stays in memory"
+        pass
+
+    def on_delete(self) -> None:
+        "Called when the scene is evicted from the scenes cache"
+        pass
+
+    def invalidate(self) -> None:
+        "Marks the scene to be drawn again on the next frame"
+        self.needs_redraw = True
 
     @abc.abstractmethod
     def draw(self) -> None:
@@ -15,6 +15,8 @@ from lib.game_data import GameData
 
 class SceneMainMenu(Scene):
 
+    assets_group = "main menu"
+
     def __init__(self, game_data: GameData):
         super().__init__(game_data)
 
@@ -32,6 +34,14 @@ class SceneMainMenu(Scene):
         self.resume_button_label = Label("CONTINUER", font_name=self.game_data.subtitle_font_name, font_size=25,
             x=self.game_data.window_width/2, y=self.game_data.window_height/2,
             anchor_x="center", batch=self.batch)
+        # why the saved game could not be loaded, under the resume button
+        self.load_error_label = Label("", font_name=self.game_data.subtitle_font_name, font_size=12,
+            color=(200, 80, 80, 255), x=self.game_data.window_width/2, y=self.game_data.window_height/2 - 30,
+            anchor_x="center", batch=self.batch)
+        # why the game could not be saved, under the load error
+        self.save_error_label = Label("", font_name=self.game_data.subtitle_font_name, font_size=12,
+            color=(200, 80, 80, 255), x=self.game_data.window_width/2, y=self.game_data.window_height/2 - 50,
+            anchor_x="center", batch=self.batch)
 
         # new game button
         self.new_game_button = shapes.Rectangle(x=self.game_data.window_width/2 - 183, y=self.game_data.window_height / 2 - 75,
@@ -50,29 +60,69 @@ class SceneMainMenu(Scene):
         # mute toggle button
         self.sound_button = shapes.Rectangle(x=self.game_data.window_width*5/6, y=self.game_data.window_height/8 + 10,
             width=90, height=70, color=(0, 0, 0, 0), batch=self.batch)
-        self.sound_button_sprite = None
+        self.sound_button_sprite = Sprite(img=self.game_data.sound_on_img,
+            x=self.game_data.window_width*5/6, y=self.game_data.window_height/8, batch=self.batch)
+        self.sound_button_sprite.scale = .35
+        # sound state displayed by the sprite (None: not displayed yet)
+        self.displayed_sound_on = None
+
+        # clickable regions, a click returns the next scene (None: stay on the main menu)
+        self.hit_test_index.add("sound_button", self.sound_button, self.toggle_sound)
+        self.hit_test_index.add("exit_button", self.exit_button, self.exit_game)
+        self.hit_test_index.add("new_game_button", self.new_game_button, lambda: "colony")
+        self.hit_test_index.add("resume_button", self.resume_button, self.resume_game, lambda: self.game_data.saved_game_available)
+
+
+    def toggle_sound(self):
+        self.game_data.sound_on = not self.game_data.sound_on
+
+
+    def exit_game(self):
+        self.game_data.exit_game = True
+
+
+    def resume_game(self):
+        # a save still being written decides whether there is a game to resume
+        self.game_data.update_save_status(wait=True)
+        if self.game_data.saved_game_available and self.game_data.load_game():
+            return "colony"
+
+
+    def on_enter(self):
+        self.game_data.game_paused = True
+        # the hovered button under the mouse, it may not have moved since the scene was last displayed
+        self.hit_test_index.on_mouse_motion(self.game_data.mouse_x, self.game_data.mouse_y)
 
 
     def draw(self):
 
         # update the batch
 
-        # resume button label color
+        # resume button label color (only re-layout the label if the color changed)
         if self.game_data.saved_game_available:
-            self.resume_button_label.color = (200, 200, 200, 255)
+            resume_button_color = (200, 200, 200, 255)
         else:
-            self.resume_button_label.color = (100, 100, 100, 255)
-
-        # sound sprite
+            resume_button_color = (100, 100, 100, 255)
+        if self.resume_button_label.color != resume_button_color:
+            self.resume_button_label.color = resume_button_color
+
+        # load error message (only re-layout the label if the message changed)
+        load_error_text = "" if self.game_data.load_error is None else f"sauvegarde illisible : {self.game_data.load_error}"
+        if self.load_error_label.text != load_error_text:
+            self.load_error_label.text = load_error_text
+        save_error_text = "" if self.game_data.save_error is None else f"sauvegarde impossible : {self.game_data.save_error}"
+        if self.save_error_label.text != save_error_text:
+            self.save_error_label.text = save_error_text
+
+        # sound sprite, re-imaged when the sound is toggled
         # if self.sound_button_sprite is not None:
         #     self.sound_button_sprite.delete()
-        if self.game_data.sound_on:
-            self.sound_button_sprite = Sprite(img=self.game_data.sound_on_img,
-                x=self.game_data.window_width*5/6, y=self.game_data.window_height/8, batch=self.batch)
-        else:
-            self.sound_button_sprite = Sprite(img=self.game_data.sound_off_img,
-                x=self.game_data.window_width*5/6, y=self.game_data.window_height/8, batch=self.batch)
-        self.sound_button_sprite.scale = .35
+        if self.game_data.sound_on != self.displayed_sound_on:
+            if self.game_data.sound_on:
+                self.sound_button_sprite.image = self.game_data.sound_on_img
+            else:
+                self.sound_button_sprite.image = self.game_data.sound_off_img
+            self.displayed_sound_on = self.game_data.sound_on
 
         # draw the batch
         self.batch.draw()
@@ -81,15 +131,7 @@ class SceneMainMenu(Scene):
     def on_mouse_press(self, x, y, button, modifiers) -> str:
         next_scene = "main menu"
         if button & mouse.LEFT:
-            if (x, y) in self.sound_button:
-                self.game_data.sound_on = not self.game_data.sound_on
-            elif (x, y) in self.exit_button:
-                self.game_data.exit_game = True
-            elif (x, y) in self.new_game_button:
-                # print("clicked on new game")
-                next_scene = "colony"
-            elif self.game_data.saved_game_available and ((x, y) in self.resume_button):
-                print("clicked on resume")
+            next_scene = self.hit_test_index.on_mouse_press(x, y) or next_scene
         return next_scene
 
 
@@ -102,9 +144,7 @@ class SceneMainMenu(Scene):
         # elif (x, y) in
         # else:
         #     print("not hovering")
-        self.game_data.mouse_clickable_area = ((x, y) in self.new_game_button) or ((x, y) in self.exit_button) or ((x, y) in self.sound_button)
-        if self.game_data.saved_game_available:
-            self.game_data.mouse_clickable_area = self.game_data.mouse_clickable_area or ((x, y) in self.resume_button)
+        self.game_data.mouse_clickable_area = self.hit_test_index.on_mouse_motion(x, y)
 
 
     def on_key_press(self, symbol, modifiers) -> str:
@@ -19,9 +19,11 @@ class ScenePauseMenu(Scene):
         super().__init__(game_data)
 
 
-    def draw(self):
+    def on_enter(self):
         self.game_data.game_paused = True
 
+
+    def draw(self):
         # udpate the batch
 
         # draw the batch
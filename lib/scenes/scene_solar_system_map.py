@@ -19,9 +19,11 @@ class SceneSolarSystemMap(Scene):
         super().__init__(game_data)
 
 
-    def draw(self):
+    def on_enter(self):
         self.game_data.game_paused = False
 
+
+    def draw(self):
         # udpate the batch
 
         # draw the batch
@@ -0,0 +1,183 @@
+from typing import Optional
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[1])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+from lib.game_entities.colony import Colony
+
+
+class Simulation:
+    "headless simulation core: owns the colonies and the simulation clock, never touches pyglet"
+
+    def __init__(self, game_config: dict[str]):
+        self.game_config = game_config
+        # duration of a simulation tick, in seconds of game time
+        self.tick_duration = 1 / self.game_config["pyglet"]["update_rate"]
+        # colonies dictionary
+        self.colonies: dict[str, Colony] = {name: Colony(self.game_config, name) for name in self.game_config["colonies"].keys()}
+        # spaceships in transit
+        self.flying_spaceships = []
+        # clock
+        self.tick_count = 0
+        self.elapsed_time = 0.
+        # time speed control
+        # available speeds (game seconds per real second), 0 pauses the clock
+        self.speeds: list[int] = self.game_config["simulation"]["speeds"]
+        self.speed = 1
+        # speed restored when the player resumes the game
+        self.speed_before_pause = 1
+        # paused by the game itself (menus), independently of the selected speed
+        self.paused = False
+        # game time not simulated yet, always less than one tick when the budget allows it
+        self.accumulator = 0.
+        # maximum number of steps taken in one call to advance, above it the steps get longer
+        self.max_substeps: int = self.game_config["simulation"]["max_substeps"]
+        # longest real time accounted for in one call to advance (avoids a spiral after a stall)
+        self.max_frame_time: float = self.game_config["simulation"]["max_frame_time"]
+        # time (seconds) spent updating each colony, None when it is not measured (see enable_timings)
+        self.colony_update_timings: Optional[dict[str, float]] = None
+
+    def step(self, dt: float):
+        # advance the simulation by one tick of dt seconds
+        # update every colony
+        # update every flying spaceships
+        timings = self.colony_update_timings
+        if timings is None:
+            for colony in self.colonies.values():
+                colony.update(dt)
+        else:
+            for colony_name, colony in self.colonies.items():
+                start_time = time.perf_counter()
+                colony.update(dt)
+                timings[colony_name] += time.perf_counter() - start_time
+        self.tick_count += 1
+        self.elapsed_time += dt
+
+    def enable_timings(self, enabled: bool):
+        # measure (or stop measuring) the time spent updating each colony and each building type
+        self.colony_update_timings = dict.fromkeys(self.colonies, 0.) if enabled else None
+        for colony in self.colonies.values():
+            colony.update_timings = {} if enabled else None
+
+    def fast_forward(self, seconds: float):
+        # advance the simulation by seconds of game time in one step, every colony jumps from event to event
+        # the jump counts as the ticks it replaces: the tick count (and the time per tick of the frame statistics) follows the game time
+        timings = self.colony_update_timings
+        if timings is None:
+            for colony in self.colonies.values():
+                colony.advance(seconds)
+        else:
+            for colony_name, colony in self.colonies.items():
+                start_time = time.perf_counter()
+                colony.advance(seconds)
+                timings[colony_name] += time.perf_counter() - start_time
+        self.tick_count += round(seconds / self.tick_duration)
+        self.elapsed_time += seconds
+
+    def set_speed(self, speed: int):
+        # select one of the available speeds, 0 pauses the clock
+        if speed in self.speeds:
+            if speed == 0 and self.speed != 0:
+                self.speed_before_pause = self.speed
+            self.speed = speed
+
+    def toggle_pause(self):
+        # pause the clock, or resume it at the speed it had before the pause
+        if self.speed == 0:
+            self.set_speed(self.speed_before_pause)
+        else:
+            self.set_speed(0)
+
+    @property
+    def running(self) -> bool:
+        return (not self.paused) and (self.speed > 0)
+
+    def advance(self, real_dt: float) -> int:
+        # advance the simulation clock by real_dt seconds of real time, at the current speed
+        # the game time is simulated in fixed ticks, the remainder is kept in the accumulator
+        # if there are more ticks to simulate than max_substeps, the whole accumulated time is simulated in one exact jump
+        # returns the number of steps taken
+        if not self.running:
+            return 0
+        self.accumulator += min(real_dt, self.max_frame_time) * self.speed
+        ticks_count = int(self.accumulator / self.tick_duration)
+        if ticks_count == 0:
+            return 0
+        if ticks_count <= self.max_substeps:
+            self.accumulator -= ticks_count * self.tick_duration
+            for _ in range(ticks_count):
+                self.step(self.tick_duration)
+            return ticks_count
+        # over budget: jump straight to the end of the accumulated time
+        self.fast_forward(self.accumulator)
+        self.accumulator = 0.
+        return 1
+
+    def to_state(self) -> dict[str]:
+        # plain data describing the simulation, used by the saves
+        return {
+            "tick_count": self.tick_count,
+            "elapsed_time": self.elapsed_time,
+            "accumulator": self.accumulator,
+            "speed": self.speed,
+            "speed_before_pause": self.speed_before_pause,
+            "colonies": [colony.to_state() for colony in self.colonies.values()]
+        }
+
+    def load_state(self, state: dict[str]):
+        # restore the simulation from the plain data returned by to_state
+        self.tick_count = state["tick_count"]
+        self.elapsed_time = state["elapsed_time"]
+        self.accumulator = state["accumulator"]
+        self.speed = state["speed"]
+        self.speed_before_pause = state["speed_before_pause"]
+        for colony_state in state["colonies"]:
+            self.colonies[colony_state["name"]].load_state(colony_state)
+
+    def run(self, duration: float, dt: float = None) -> int:
+        # advance the simulation by duration seconds, in ticks of dt seconds (one tick duration by default)
+        # returns the number of ticks simulated
+        if dt is None:
+            dt = self.tick_duration
+        ticks_count = round(duration / dt)
+        for _ in range(ticks_count):
+            self.step(dt)
+        return ticks_count
+
+
+if __name__ == "__main__":
+    import argparse
+    from lib.game_config import load_game_config
+
+    parser = argparse.ArgumentParser(description="run the Homebound economy without opening a window")
+    parser.add_argument("--duration", type=float, default=3600., help="simulated game time, in seconds")
+    parser.add_argument("--dt", type=float, default=None, help="tick duration, in seconds (default: 1 / update_rate)")
+    parser.add_argument("--staff", action="store_true", help="fill every production job and make the drills produce water")
+    parser.add_argument("--fast-forward", action="store_true", help="simulate the whole duration in one event-driven step")
+    args = parser.parse_args()
+
+    simulation = Simulation(load_game_config())
+    if args.staff:
+        for colony in simulation.colonies.values():
+            for building in (building for line in colony.building_grid for building in line if building is not None):
+                if building.name == "drilling_station":
+                    building.produce("water")
+                for worker_type in ("engineers", "scientists"):
+                    building.assign_worker(True, "production", worker_type, all=True)
+
+    start_time = time.perf_counter()
+    if args.fast_forward:
+        simulation.fast_forward(args.duration)
+        ticks_count = simulation.tick_count
+    else:
+        ticks_count = simulation.run(args.duration, args.dt)
+    run_time = time.perf_counter() - start_time
+    print(f"{ticks_count} ticks ({simulation.elapsed_time:.1f} s of game time) in {run_time:.3f} s "
+          f"-> {ticks_count / run_time:.0f} ticks/s")
+    for colony_name, colony in simulation.colonies.items():
+        resources = ", ".join(f"{resource}: {round(value, 1)}" for resource, value in colony.data["resources"].items() if value)
+        print(f"{colony_name}: {resources or "-"}")
@@ -0,0 +1,127 @@
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Any, ContextManager, Optional
+import builtins
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+ROOT_DIR_PATH = str(Path(__file__).resolve().parents[1])
+if ROOT_DIR_PATH not in sys.path:
+    sys.path.insert(0, ROOT_DIR_PATH)
+
+
+class StartupProfiler:
+    "records a timeline of the game startup (imports, config, assets, scenes, first frame), dumped as a Chrome trace"
+
+    def __init__(self):
+        # nothing is recorded until start is called
+        self.enabled = False
+        self.start_time = 0.
+        # trace events, in the Chrome trace event format (open the dump in chrome://tracing or https://ui.perfetto.dev)
+        self.events: list[dict[str]] = []
+        # import function replaced while the profiler is running
+        self.original_import = None
+
+    def start(self):
+        # start recording, the imports done from now on are timed
+        self.enabled = True
+        self.start_time = perf_counter()
+        self.original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        if self.original_import is not None:
+            builtins.__import__ = self.original_import
+            self.original_import = None
+        self.enabled = False
+
+    def _timestamp(self, time: float) -> float:
+        # microseconds since the start of the profile
+        return (time - self.start_time) * 1e6
+
+    def add_span(self, name: str, category: str, start_time: float, end_time: float, args: Optional[dict[str]] = None):
+        # record a span between two perf_counter times, on the current thread
+        if self.enabled:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": self._timestamp(start_time),
+                "dur": (end_time - start_time) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident()
+            }
+            if args:
+                event["args"] = args
+            # list.append is atomic, the asset decoders record their spans from the thread pool
+            self.events.append(event)
+
+    @contextmanager
+    def _span(self, name: str, category: str, args: dict[str]):
+        start_time = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, category, start_time, perf_counter(), args)
+
+    def span(self, name: str, category: str = "startup", **args: Any) -> ContextManager:
+        # context manager recording the time spent in its block (does nothing when the profiler is not running)
+        if not self.enabled:
+            return nullcontext()
+        return self._span(name, category, args)
+
+    def instant(self, name: str, category: str = "startup"):
+        # record a point in time
+        if self.enabled:
+            self.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "i",
+                "s": "g",
+                "ts": self._timestamp(perf_counter()),
+                "pid": os.getpid(),
+                "tid": threading.get_ident()
+            })
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # only the first import of a module does some work (relative imports are not timed)
+        if level or (name in sys.modules):
+            return self.original_import(name, globals, locals, fromlist, level)
+        with self._span(name, "import", {}):
+            return self.original_import(name, globals, locals, fromlist, level)
+
+    def elapsed_time(self) -> float:
+        # seconds since the start of the profile
+        return perf_counter() - self.start_time
+
+    def summary(self) -> dict[str, float]:
+        # total time (milliseconds) of the top-level spans of the main thread, per category
+        main_thread_id = threading.main_thread().ident
+        spans = sorted((event for event in self.events if event["ph"] == "X" and event["tid"] == main_thread_id),
+                       key=lambda event: (event["ts"], -event["dur"]))
+        totals = {}
+        span_end = -1.
+        for event in spans:
+            # the spans nested in a span already counted are skipped
+            if event["ts"] >= span_end:
+                totals[event["cat"]] = totals.get(event["cat"], 0.) + event["dur"] / 1e3
+                span_end = event["ts"] + event["dur"]
+        return totals
+
+    def dump(self, trace_file_path: Path):
+        # write the timeline as a Chrome trace (JSON object format)
+        thread_names = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread.ident, "args": {"name": thread.name}}
+            for thread in threading.enumerate()
+        ]
+        trace_file_path = Path(trace_file_path)
+        trace_file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_file_path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": thread_names + self.events, "displayTimeUnit": "ms"}, trace_file)
+
+
+# shared by the modules timed during the startup, enabled by homebound.py --profile-startup
+startup_profiler = StartupProfiler()